@@ -0,0 +1,178 @@
+"""
+Persistent answer cache for the RAG workflow
+
+Users tend to ask the same handful of questions about the loaded document,
+and each one costs a full retrieve/grade/generate/verify cycle. This module
+stores finished workflow results in SQLite, keyed by a normalized question
+and the version of the indexed corpus, so re-ingesting a document naturally
+invalidates every answer that was computed against the old index.
+
+An optional semantic tier embeds the question and reuses the answer of a
+near-identical cached question when the cosine similarity is above a
+configurable threshold.
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, strip accents, punctuation and redundant whitespace"""
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def answer_cache_key(normalized_question: str, corpus_version: str) -> str:
+    """Cache key combining the normalized question and the corpus version"""
+    return hashlib.sha256(f"{corpus_version}\0{normalized_question}".encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    SQLite-backed cache of RAG workflow results
+
+    Exact hits match the normalized question; semantic hits (enabled by passing
+    an embedding function) match the most similar cached question of the same
+    corpus version. Counters for both tiers are available through get_stats.
+    """
+
+    def __init__(self, db_path: str, embedding_function=None,
+                 similarity_threshold: float = 0.95, max_age_seconds: Optional[float] = None):
+        self.embedding_function = embedding_function
+        self.similarity_threshold = similarity_threshold
+        self.max_age_seconds = max_age_seconds
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                corpus_version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding TEXT,
+                result BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_corpus_version ON answers (corpus_version)"
+        )
+        self._connection.commit()
+
+    def get(self, question: str, corpus_version: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Look up a cached result for the question
+        Returns (result, cache_info) or None on a miss
+        """
+        normalized = normalize_question(question)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT question, result, created_at FROM answers WHERE key = ?",
+                (answer_cache_key(normalized, corpus_version),),
+            ).fetchone()
+
+        if row is not None and not self._is_expired(row[2]):
+            self.exact_hits += 1
+            return pickle.loads(row[1]), self._cache_info("exact", row[0], row[2])
+
+        if self.embedding_function is not None:
+            match = self._semantic_lookup(normalized, corpus_version)
+            if match is not None:
+                self.semantic_hits += 1
+                return match
+
+        self.misses += 1
+        return None
+
+    def put(self, question: str, corpus_version: str, result: Dict[str, Any]):
+        """Store a finished workflow result"""
+        normalized = normalize_question(question)
+        embedding = None
+        if self.embedding_function is not None:
+            embedding = json.dumps(self.embedding_function.embed_query(normalized))
+
+        with self._lock:
+            self._connection.execute(
+                """INSERT OR REPLACE INTO answers
+                   (key, corpus_version, question, embedding, result, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (
+                    answer_cache_key(normalized, corpus_version),
+                    corpus_version,
+                    normalized,
+                    embedding,
+                    pickle.dumps(result),
+                    time.time(),
+                ),
+            )
+            self._connection.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and the number of stored answers"""
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def clear(self):
+        """Remove every cached answer"""
+        with self._lock:
+            self._connection.execute("DELETE FROM answers")
+            self._connection.commit()
+
+    def _semantic_lookup(self, normalized: str, corpus_version: str):
+        """Find the most similar cached question of the same corpus version"""
+        with self._lock:
+            rows = self._connection.execute(
+                """SELECT question, embedding, result, created_at FROM answers
+                   WHERE corpus_version = ? AND embedding IS NOT NULL""",
+                (corpus_version,),
+            ).fetchall()
+        rows = [row for row in rows if not self._is_expired(row[3])]
+        if not rows:
+            return None
+
+        query = np.asarray(self.embedding_function.embed_query(normalized), dtype=np.float32)
+        matrix = np.asarray([json.loads(row[1]) for row in rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        similarities = matrix @ query / np.where(norms == 0, 1.0, norms)
+
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        question, _, result, created_at = rows[best]
+        cache_info = self._cache_info("semantic", question, created_at)
+        cache_info["similarity"] = float(similarities[best])
+        return pickle.loads(result), cache_info
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.max_age_seconds is not None and time.time() - created_at > self.max_age_seconds
+
+    def _cache_info(self, hit_type: str, matched_question: str, created_at: float) -> Dict[str, Any]:
+        return {
+            "hit": hit_type,
+            "matched_question": matched_question,
+            "age_seconds": time.time() - created_at,
+        }
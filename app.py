@@ -20,21 +20,30 @@ Good for understanding how LangGraph works with RAG systems.
 import streamlit as st
 
 # Local imports
-from config import QUESTION_PLACEHOLDER
-from utils import clear_chroma_db, initialize_session_state
+from config import QUESTION_PLACEHOLDER, STREAM_ANSWERS
+from utils import initialize_session_state
 from ui_components import (
     setup_page_config, render_header, render_sidebar, 
     render_upload_section, render_upload_placeholder,
-    render_question_section, render_answer_section,
+    render_question_section, render_answer_section, render_streaming_answer,
 )
 from document_loader import MultiModalDocumentLoader
 from document_processor import DocumentProcessor
-from rag_workflow import RAGWorkflow
+from rag_workflow import LEXICAL_PREFILTER_MARKER, RAGWorkflow
 
 # Initialize components
 document_loader = MultiModalDocumentLoader()
 document_processor = DocumentProcessor(document_loader)
-rag_workflow = RAGWorkflow()
+rag_workflow = RAGWorkflow(embedding_function=document_processor.embedding_function)
+
+# Nomes das etapas do fluxo exibidos na interface
+NODE_LABELS = {
+    "Answer Cache": "Cache de Respostas",
+    "Retrieve Documents": "Recuperação de Documentos",
+    "Grade Documents": "Avaliação dos Documentos",
+    "Generate Answer": "Geração da Resposta",
+    "Check Hallucinations": "Verificação de Alucinações",
+}
 
 
 def handle_question_processing(question):
@@ -43,12 +52,16 @@ def handle_question_processing(question):
     print(f"Processing question: {question}")
     
     with st.container():
-        with st.spinner('🧠 Analisando sua pergunta e recuperando informações relevantes...'):
-            # Process the question - workflow will handle retriever automatically
-            result = rag_workflow.process_question(question)
-        
-        # Render answer section (it will handle its own heading)
-        render_answer_section(result)
+        if STREAM_ANSWERS:
+            # Show answer tokens as they arrive; validation results follow below
+            result = render_streaming_answer(rag_workflow.stream_question(question))
+        else:
+            with st.spinner('🧠 Analisando sua pergunta e recuperando informações relevantes...'):
+                # Process the question - workflow will handle retriever automatically
+                result = rag_workflow.process_question(question)
+            
+            # Render answer section (it will handle its own heading)
+            render_answer_section(result)
         
         # Mostrar avaliações e informações do sistema
         if result:
@@ -69,6 +82,18 @@ def handle_question_processing(question):
             # Tabela resumo
             summary_data = []
             
+            # Cache de respostas
+            if rag_workflow.answer_cache is not None:
+                cache_info = result.get('answer_cache') or {}
+                if cache_info.get('hit'):
+                    hit_label = "exata" if cache_info['hit'] == 'exact' else "semântica"
+                    age_minutes = cache_info['age_seconds'] / 60
+                    summary_data.append(["💾 Cache de Respostas", f"♻️ Reutilizada ({hit_label}, há {age_minutes:.1f} min)"])
+                else:
+                    summary_data.append(["💾 Cache de Respostas", "🆕 Resposta gerada"])
+                cache_stats = rag_workflow.answer_cache.get_stats()
+                summary_data.append(["📈 Taxa de Acerto do Cache", f"{cache_stats['hit_rate']:.0%} ({cache_stats['exact_hits']} exatas, {cache_stats['semantic_hits']} semânticas, {cache_stats['misses']} falhas)"])
+            
             # Resumo das avaliações dos documentos
             if 'document_evaluations' in result and result['document_evaluations']:
                 evaluations = result['document_evaluations']
@@ -76,6 +101,11 @@ def handle_question_processing(question):
                 total_count = len(evaluations)
                 summary_data.append(["📋 Relevância dos Documentos", f"{relevant_count}/{total_count} relevantes"])
                 
+                # Documentos descartados sem chamada ao LLM
+                prefiltered_count = sum(1 for eval in evaluations if eval.coverage_assessment.startswith(LEXICAL_PREFILTER_MARKER))
+                if prefiltered_count:
+                    summary_data.append(["🔤 Descartados pelo Pré-filtro Léxico", f"{prefiltered_count}/{total_count}"])
+                
                 # Média de relevância se disponível
                 if hasattr(evaluations[0], 'relevance_score'):
                     avg_score = sum(eval.relevance_score for eval in evaluations) / len(evaluations)
@@ -101,12 +131,42 @@ def handle_question_processing(question):
                 if hasattr(doc_relevance, 'confidence'):
                     summary_data.append(["🔒 Confiança", f"{doc_relevance.confidence:.2f}"])
             
+            # Contexto enviado ao modelo
+            context_stats = result.get('context_stats')
+            if context_stats:
+                summary_data.append(["📦 Tokens do Contexto", f"{context_stats['tokens_before']} → {context_stats['tokens_after']} ({context_stats['documents_packed']}/{context_stats['documents']} trechos, limite {context_stats['token_budget']})"])
+            
+            # Desempenho da execução
+            metrics = result.get('metrics')
+            if metrics:
+                summary_data.append(["⏱️ Tempo Total", f"{metrics['total_seconds']:.2f} s"])
+                summary_data.append(["🤖 Chamadas ao LLM", f"{metrics['llm_calls']} ({metrics['grader_cache_hits']} avaliações reutilizadas do cache)"])
+                summary_data.append(["🔢 Tokens", f"{metrics['prompt_tokens']} de entrada, {metrics['completion_tokens']} de saída"])
+                summary_data.append(["🔁 Novas Tentativas de Resposta", str(metrics['retries'])])
+
             # Exibir tabela resumo
+            import pandas as pd
             if summary_data:
-                import pandas as pd
                 df = pd.DataFrame(summary_data, columns=["Métrica", "Valor"])
                 st.table(df)
-            
+
+            # Tempo gasto em cada etapa do fluxo
+            if metrics and metrics['nodes']:
+                st.markdown("**⏱️ Tempo por Etapa:**")
+                latency_data = [
+                    [
+                        NODE_LABELS.get(node, node),
+                        stats['runs'],
+                        f"{stats['wall_seconds']:.2f}",
+                        f"{stats['wall_seconds'] / metrics['total_seconds']:.0%}" if metrics['total_seconds'] else "N/A",
+                        stats['llm_calls'],
+                        stats['prompt_tokens'] + stats['completion_tokens'],
+                    ]
+                    for node, stats in metrics['nodes'].items()
+                ]
+                latency_df = pd.DataFrame(latency_data, columns=["Etapa", "Execuções", "Tempo (s)", "% do Total", "Chamadas LLM", "Tokens"])
+                st.dataframe(latency_df, use_container_width=True, hide_index=True)
+
             # Mostrar avaliações detalhadas em seção expansível
             with st.expander("🔧 Resultados Detalhados da Avaliação"):
                 
@@ -171,15 +231,11 @@ def handle_user_interaction(user_file):
 
 def main():
     """Main application function"""
-    # Initialize session state and clear DB only once
+    # Initialize session state
+    # ChromaDB is no longer cleared on startup: DocumentProcessor reopens the
+    # persisted collection when its index manifest matches the source document
     initialize_session_state()
     
-    # Clear ChromaDB only on first run
-    if 'db_cleared' not in st.session_state:
-        clear_chroma_db()
-        st.session_state.db_cleared = True
-        print("ChromaDB cleared on app startup")
-    
     # Setup page and render UI
     setup_page_config()
     render_header()
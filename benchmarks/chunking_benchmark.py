@@ -0,0 +1,98 @@
+"""
+Micro-benchmark: TokenChunker vs the previous per-call tiktoken splitter
+
+Chunks the same pages with both implementations and reports the best and mean
+wall time, the number of chunks, the largest chunk in tokens, and how many
+chunks ended up with the metadata (page) of the wrong parent document.
+
+Usage:
+    python benchmarks/chunking_benchmark.py                      # bundled PDF
+    python benchmarks/chunking_benchmark.py --file some.pdf --repeat 10
+    python benchmarks/chunking_benchmark.py --synthetic-pages 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the repository root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from langchain_text_splitters import CharacterTextSplitter
+
+from benchmarks.corpus import synthetic_pages
+from chunking import TokenChunker, get_encoder
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_ENCODING
+
+DEFAULT_FILE = "local_data/geografo_proposta.pdf"
+
+
+def baseline_chunks(documents):
+    """The splitter previously used by DocumentProcessor._create_document_chunks"""
+    splitter = CharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    doc_splits = splitter.create_documents([doc.page_content for doc in documents])
+    for i, split in enumerate(doc_splits):
+        split.metadata.update(documents[min(i, len(documents) - 1)].metadata)
+        split.metadata.update({"chunk_id": i, "total_chunks": len(doc_splits)})
+    return doc_splits
+
+
+def synthetic_documents(pages, seed=0):
+    """Synthetic pages as documents"""
+    return [
+        Document(page_content=text, metadata={"source": "synthetic", "page": page})
+        for page, text in enumerate(synthetic_pages(pages, seed))
+    ]
+
+
+def misattributed_chunks(documents, chunks):
+    """Chunks whose text does not occur in the page their metadata points to"""
+    pages = {doc.metadata.get("page"): doc.page_content for doc in documents}
+    return sum(1 for chunk in chunks if chunk.page_content not in pages.get(chunk.metadata.get("page"), ""))
+
+
+def measure(name, split_fn, documents, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = split_fn(documents)
+        timings.append(time.perf_counter() - start)
+
+    encoder = get_encoder(CHUNK_ENCODING)
+    max_tokens = max((len(encoder.encode_ordinary(chunk.page_content)) for chunk in chunks), default=0)
+    print(f"{name:<16} best {min(timings) * 1000:8.1f} ms   mean {statistics.mean(timings) * 1000:8.1f} ms   "
+          f"chunks {len(chunks):5d}   max tokens {max_tokens:5d}   "
+          f"wrong page {misattributed_chunks(documents, chunks):5d}")
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=DEFAULT_FILE, help="Document to chunk")
+    parser.add_argument("--synthetic-pages", type=int, default=0, help="Use N synthetic pages instead of --file")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per implementation")
+    args = parser.parse_args()
+
+    if args.synthetic_pages:
+        documents = synthetic_documents(args.synthetic_pages)
+    else:
+        from multimodal_loader import MultiFormatDocumentLoader
+        documents = MultiFormatDocumentLoader().load_document(args.file)
+
+    characters = sum(len(doc.page_content) for doc in documents)
+    print(f"{len(documents)} documents, {characters:,} characters, "
+          f"chunk_size={CHUNK_SIZE}, chunk_overlap={CHUNK_OVERLAP}\n")
+
+    chunker = TokenChunker(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_ENCODING)
+    baseline = measure("baseline", baseline_chunks, documents, args.repeat)
+    token_chunker = measure("TokenChunker", chunker.split_documents, documents, args.repeat)
+    print(f"\nspeedup: {baseline / token_chunker:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Synthetic corpora for the offline benchmarks
+
+Pseudo-Portuguese paragraphs drawn from the domain vocabulary of the bundled
+document, generated deterministically from a seed.
+"""
+import random
+from typing import List
+
+WORDS = (
+    "clima temperatura precipitação evapotranspiração balanço hídrico solo bacia "
+    "relevo vegetação cerrado caatinga estação índice Thornthwaite Köppen mapa "
+    "escala geografia região município chuva seca umidade radiação"
+).split()
+
+
+def synthetic_paragraph(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 160))) + "."
+
+
+def synthetic_pages(pages: int, seed: int = 0) -> List[str]:
+    """Page texts made of 3-8 paragraphs each"""
+    rng = random.Random(seed)
+    return ["\n\n".join(synthetic_paragraph(rng) for _ in range(rng.randint(3, 8))) for _ in range(pages)]
+
+
+def synthetic_text(size_bytes: int, seed: int = 0) -> str:
+    """Paragraphs appended until the UTF-8 size reaches size_bytes"""
+    rng = random.Random(seed)
+    paragraphs, size = [], 0
+    while size < size_bytes:
+        paragraph = synthetic_paragraph(rng)
+        paragraphs.append(paragraph)
+        size += len(paragraph.encode("utf-8")) + 2
+    return "\n\n".join(paragraphs)
+
+
+def synthetic_queries(count: int, seed: int = 0) -> List[str]:
+    """Short keyword questions over the same vocabulary"""
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(WORDS, rng.randint(2, 5))) for _ in range(count)]
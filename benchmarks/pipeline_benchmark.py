@@ -0,0 +1,235 @@
+"""
+Offline benchmark of the ingestion and retrieval stages
+
+Measures, for synthetic corpora of increasing size and for the bundled PDF:
+
+- load:     MultiFormatDocumentLoader.load_document, per file
+- chunk:    DocumentProcessor._create_document_chunks, per file
+- index:    DocumentProcessor._add_to_vector_database, per batch of
+            INGESTION_BATCH_SIZE chunks
+- retrieve: retriever.invoke with the vector and the hybrid retriever,
+            per query
+
+Embeddings come from the deterministic "hashing" backend, uncached, so the
+run needs no network access and repeated runs measure the same work. Every
+stage reports its throughput and p50/p90/p95/p99 latencies. Results are
+written as JSON (with the git commit and settings) so runs can be compared
+over time.
+
+The benchmark runs inside a scratch working directory, so the application's
+.chroma and embedding cache are never touched.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py
+    python benchmarks/pipeline_benchmark.py --sizes 1 10 --queries 50
+    python benchmarks/pipeline_benchmark.py --output results/main.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Add the repository root to path for imports
+sys.path.append(str(REPO_ROOT))
+
+from benchmarks.corpus import synthetic_queries, synthetic_text
+from config import (
+    CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_ENCODING, INGESTION_BATCH_SIZE,
+    RETRIEVER_K, HYBRID_FETCH_K, RRF_K, HASHING_EMBEDDING_DIMENSIONS
+)
+from document_processor import DocumentProcessor
+from embedding_cache import CachedEmbeddings
+from hybrid_retriever import CHUNK_UID_KEY, HybridRetriever
+from lexical_index import BM25Index
+from multimodal_loader import MultiFormatDocumentLoader
+
+BUNDLED_PDF = REPO_ROOT / "local_data" / "geografo_proposta.pdf"
+SYNTHETIC_FILE_BYTES = 1024 * 1024  # Synthetic corpora are split into 1 MB files
+MB = 1024 * 1024
+
+
+def stage_stats(latencies, units=None, unit_name=None):
+    """Latency percentiles (ms) and throughput of one stage"""
+    latencies = np.asarray(latencies, dtype=np.float64)
+    total = float(latencies.sum())
+    stats = {
+        "count": int(latencies.size),
+        "total_seconds": total,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p90_ms": float(np.percentile(latencies, 90) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "max_ms": float(latencies.max() * 1000),
+    }
+    if units is not None:
+        stats[f"{unit_name}_per_second"] = units / total if total else 0.0
+    return stats
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def write_synthetic_corpus(directory, size_mb, seed):
+    """Write size_mb one-megabyte text files and return their paths"""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(size_mb):
+        path = directory / f"synthetic_{i:04d}.txt"
+        path.write_text(synthetic_text(SYNTHETIC_FILE_BYTES, seed=seed + i), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def benchmark_corpus(name, file_paths, processor, loader, queries):
+    """Run every stage over one corpus and return its results"""
+    print(f"\n=== {name}: {len(file_paths)} files ===")
+    size_bytes = sum(path.stat().st_size for path in file_paths)
+
+    # Load
+    documents_per_file, load_latencies = [], []
+    for path in file_paths:
+        documents, elapsed = timed(loader.load_document, path)
+        documents_per_file.append(documents)
+        load_latencies.append(elapsed)
+
+    # Chunk
+    doc_splits, chunk_latencies = [], []
+    for documents in documents_per_file:
+        splits, elapsed = timed(processor._create_document_chunks, documents)
+        doc_splits.extend(splits)
+        chunk_latencies.append(elapsed)
+
+    # Index, in batches into the open collection, like the streaming ingestion pipeline
+    chroma_db, index_latencies = processor._open_vector_database(), []
+    for start in range(0, len(doc_splits), INGESTION_BATCH_SIZE):
+        _, elapsed = timed(processor._add_to_vector_database, chroma_db, doc_splits[start:start + INGESTION_BATCH_SIZE])
+        index_latencies.append(elapsed)
+
+    # Retrieve
+    lexical_index = BM25Index.from_texts(
+        [split.page_content for split in doc_splits],
+        ids=[split.metadata[CHUNK_UID_KEY] for split in doc_splits]
+    )
+    retrievers = {
+        "vector": chroma_db.as_retriever(search_kwargs={"k": RETRIEVER_K}),
+        "hybrid": HybridRetriever(
+            vectorstore=chroma_db, lexical_index=lexical_index,
+            k=RETRIEVER_K, fetch_k=HYBRID_FETCH_K, rrf_k=RRF_K
+        ),
+    }
+    retrieve_stats = {}
+    for retriever_name, retriever in retrievers.items():
+        latencies = [timed(retriever.invoke, query)[1] for query in queries]
+        retrieve_stats[f"retrieve_{retriever_name}"] = stage_stats(latencies, len(queries), "queries")
+
+    chroma_db.delete_collection()
+
+    result = {
+        "name": name,
+        "files": len(file_paths),
+        "size_bytes": size_bytes,
+        "documents": sum(len(documents) for documents in documents_per_file),
+        "chunks": len(doc_splits),
+        "stages": {
+            "load": stage_stats(load_latencies, size_bytes / MB, "mb"),
+            "chunk": stage_stats(chunk_latencies, size_bytes / MB, "mb"),
+            "index": stage_stats(index_latencies, len(doc_splits), "chunks"),
+            **retrieve_stats,
+        },
+    }
+    for stage, stats in result["stages"].items():
+        throughput = next((f"{value:10.1f} {key.replace('_per_second', '')}/s"
+                           for key, value in stats.items() if key.endswith("_per_second")), "")
+        print(f"{stage:<18} n={stats['count']:<6d} p50 {stats['p50_ms']:9.2f} ms   "
+              f"p95 {stats['p95_ms']:9.2f} ms   p99 {stats['p99_ms']:9.2f} ms   {throughput}")
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1, 10, 100], help="Synthetic corpus sizes in MB")
+    parser.add_argument("--skip-pdf", action="store_true", help="Do not benchmark the bundled PDF")
+    parser.add_argument("--queries", type=int, default=100, help="Retrieval queries per corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpora and queries")
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    output = Path(args.output) if args.output else (
+        REPO_ROOT / "benchmarks" / "results" / f"pipeline-{started_at:%Y%m%dT%H%M%SZ}.json"
+    )
+    output = output.resolve()
+    queries = synthetic_queries(args.queries, seed=args.seed)
+
+    corpora = []
+    with tempfile.TemporaryDirectory(prefix="rag-benchmark-") as workdir:
+        # CHROMA_PERSIST_DIR and EMBEDDING_CACHE_DIR are relative to the working directory
+        os.chdir(workdir)
+        workdir = Path(workdir)
+
+        loader = MultiFormatDocumentLoader()
+        processor = DocumentProcessor(loader, embedding_backend="hashing")
+        # Uncached, so that every run embeds the same amount of text
+        if isinstance(processor.embedding_function, CachedEmbeddings):
+            processor.embedding_function = processor.embedding_function.underlying
+
+        for size_mb in args.sizes:
+            file_paths = write_synthetic_corpus(workdir / f"synthetic_{size_mb}mb", size_mb, args.seed)
+            corpora.append(benchmark_corpus(f"synthetic_{size_mb}mb", file_paths, processor, loader, queries))
+
+        if not args.skip_pdf:
+            corpora.append(benchmark_corpus(BUNDLED_PDF.name, [BUNDLED_PDF], processor, loader, queries))
+
+        os.chdir(REPO_ROOT)
+
+    results = {
+        "benchmark": "pipeline",
+        "started_at": started_at.isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "chunk_encoding": CHUNK_ENCODING,
+            "ingestion_batch_size": INGESTION_BATCH_SIZE,
+            "embedding_backend": processor.embedding_backend,
+            "embedding_dimensions": HASHING_EMBEDDING_DIMENSIONS,
+            "retriever_k": RETRIEVER_K,
+            "hybrid_fetch_k": HYBRID_FETCH_K,
+            "queries": args.queries,
+            "seed": args.seed,
+        },
+        "corpora": corpora,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
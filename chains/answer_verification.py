@@ -0,0 +1,69 @@
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+
+from chains.document_relevance import DocumentRelevance
+from chains.grader_cache import memoize_grader
+from chains.question_relevance import QuestionRelevance
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+llm = ChatOpenAI(temperature=0)
+
+
+class AnswerVerification(BaseModel):
+    """Grounding and question relevance of an answer, evaluated in a single call"""
+
+    grounding: DocumentRelevance = Field(
+        description="Whether the answer is grounded in the source documents"
+    )
+
+    question_relevance: QuestionRelevance = Field(
+        description="Whether the answer adequately addresses the user's question"
+    )
+
+
+structured_output = llm.with_structured_output(AnswerVerification)
+
+system = """You are an expert answer verifier for a RAG system. You check an LLM-generated answer against two independent criteria in a single evaluation.
+
+1. GROUNDING (grounding):
+   - Every key fact, claim and detail must be supported by the source documents
+   - Minor paraphrasing or reasonable inference from the documents is acceptable
+   - Contradictions, fabricated details or external knowledge make the answer ungrounded
+   - Be strict: true only if the answer is well-supported by the documents
+
+2. QUESTION RELEVANCE (question_relevance):
+   - Does the answer directly address the core of the user's question?
+   - Are important aspects of the question left unanswered?
+   - Would the answer satisfy the user's information need?
+   - true only if the answer adequately addresses the question
+   - Assess completeness as 'complete', 'partial' or 'minimal' and list missing aspects
+
+Evaluate each criterion on its own merits: a grounded answer can miss the question, and a relevant answer can be ungrounded.
+
+Answer in portuguese."""
+
+verification_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", """Please verify the generated answer.
+
+SOURCE DOCUMENTS:
+{documents}
+
+USER QUESTION:
+{question}
+
+GENERATED ANSWER:
+{solution}
+
+Provide, for grounding: a binary score, a confidence (0.0-1.0) and a brief reasoning.
+Provide, for question relevance: a binary score, a relevance score (0.0-1.0), the completeness, a brief reasoning and the missing aspects (if any)."""),
+    ]
+)
+
+answer_verification: Runnable = memoize_grader(verification_prompt | structured_output, name=__name__)
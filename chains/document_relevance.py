@@ -1,8 +1,10 @@
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 
+from chains.grader_cache import memoize_grader
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -70,4 +72,4 @@ Based on the evaluation criteria, is this answer properly grounded in the source
     ]
 )
 
-document_relevance: RunnableSequence = relevance_prompt | structured_output
\ No newline at end of file
+document_relevance: Runnable = memoize_grader(relevance_prompt | structured_output, name=__name__)
@@ -16,6 +16,8 @@ from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 from langchain_openai import ChatOpenAI
 
+from chains.grader_cache import memoize_grader
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -111,4 +113,4 @@ Provide your comprehensive evaluation based on the framework above."""),
     ]
 )
 
-evaluate_docs = evaluate_prompt | structured_output
\ No newline at end of file
+evaluate_docs = memoize_grader(evaluate_prompt | structured_output, name=__name__)
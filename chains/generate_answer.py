@@ -6,7 +6,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-llm = ChatOpenAI(temperature=0)
+# stream_usage reports token usage for streamed answers too
+llm = ChatOpenAI(temperature=0, stream_usage=True)
 
 # Custom RAG prompt for better answer generation
 system_prompt = """You are an expert assistant specializing in answering questions based on provided documents. Your goal is to provide accurate, helpful, and well-structured answers that directly address the user's question.
@@ -71,4 +72,5 @@ prompt = ChatPromptTemplate.from_messages([
     ("human", human_prompt)
 ])
 
-generate_chain = prompt | llm | StrOutputParser()
\ No newline at end of file
+# Named after the module so callbacks and traces can tell the chain apart
+generate_chain = (prompt | llm | StrOutputParser()).with_config(run_name=__name__)
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Memoization layer for the grader chains
+
+The grading chains (document evaluation, document relevance and question
+relevance) are deterministic at temperature 0 and are re-run on identical
+inputs whenever a question repeats. Wrapping them with memoize_grader serves
+those repeats from an in-process cache shared by every session, keyed by a
+content hash of the chain inputs.
+
+A retried hallucination check that regenerated the same answer from the same
+documents would get the cached failing verdict back, making every retry fail
+until the retry limit. RAGWorkflow runs retried checks inside
+bypass_grader_cache(), which asks the LLM again and stores the new verdict.
+
+Entries expire after a TTL and the least recently used ones are evicted once
+the cache is full.
+"""
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import patch_config
+
+from config import GRADER_CACHE_ENABLED, GRADER_CACHE_MAX_ENTRIES, GRADER_CACHE_TTL_SECONDS
+
+_cache = TTLCache(maxsize=GRADER_CACHE_MAX_ENTRIES, ttl=GRADER_CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+# Set while graders must be re-run instead of served from the cache
+_bypass: ContextVar[bool] = ContextVar("grader_cache_bypass", default=False)
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-friendly representation of grader inputs, stable across runs"""
+    if isinstance(value, Document):
+        return {"page_content": value.page_content, "metadata": _canonical(value.metadata)}
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def grader_cache_key(grader_name: str, grader_input: Any) -> str:
+    """Content hash of a grader invocation"""
+    payload = json.dumps(_canonical(grader_input), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{grader_name}\0{payload}".encode("utf-8")).hexdigest()
+
+
+def get_grader_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters and size of the shared grader cache"""
+    with _cache_lock:
+        return {**_stats, "entries": len(_cache)}
+
+
+def clear_grader_cache():
+    """Drop every memoized grading result"""
+    with _cache_lock:
+        _cache.clear()
+
+
+@contextmanager
+def bypass_grader_cache():
+    """
+    Re-run the graders called inside the block instead of reusing cached results
+
+    The fresh results still replace the cached ones. LangChain copies the
+    context into the threads and tasks of parallel chains, so they see it too.
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class MemoizedGrader(Runnable):
+    """Runnable wrapper that memoizes a grader chain by content hash"""
+
+    def __init__(self, bound: Runnable, name: str):
+        self.bound = bound
+        self.name = name
+
+    @property
+    def InputType(self):
+        return self.bound.InputType
+
+    @property
+    def OutputType(self):
+        return self.bound.OutputType
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self._call_with_config(self._invoke, input, config)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self._acall_with_config(self._ainvoke, input, config)
+
+    def _invoke(self, input, run_manager, config):
+        key = grader_cache_key(self.name, input)
+        cached = self._lookup(key, run_manager)
+        if cached is not None:
+            return cached
+
+        result = self.bound.invoke(input, patch_config(config, callbacks=run_manager.get_child()))
+        self._store(key, result)
+        return result
+
+    async def _ainvoke(self, input, run_manager, config):
+        key = grader_cache_key(self.name, input)
+        cached = self._lookup(key, run_manager)
+        if cached is not None:
+            return cached
+
+        result = await self.bound.ainvoke(input, patch_config(config, callbacks=run_manager.get_child()))
+        self._store(key, result)
+        return result
+
+    def _lookup(self, key, run_manager):
+        if _bypass.get():
+            return None
+        with _cache_lock:
+            result = _cache.get(key)
+            if result is None:
+                _stats["misses"] += 1
+                return None
+            _stats["hits"] += 1
+        run_manager.on_text("grader_cache_hit")
+        # Hand out a copy so callers can't mutate the cached result
+        return result.model_copy(deep=True) if hasattr(result, "model_copy") else result
+
+    def _store(self, key, result):
+        with _cache_lock:
+            _cache[key] = result
+
+
+def memoize_grader(chain: Runnable, name: str) -> Runnable:
+    """Wrap a grader chain with the shared cache (only named when disabled)"""
+    if not GRADER_CACHE_ENABLED:
+        return chain.with_config(run_name=name)
+    return MemoizedGrader(chain, name=name)
@@ -1,8 +1,10 @@
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 
+from chains.grader_cache import memoize_grader
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -99,4 +101,4 @@ Provide your comprehensive evaluation based on the criteria above."""),
     ]
 )
 
-question_relevance: RunnableSequence = relevance_prompt | structured_output
\ No newline at end of file
+question_relevance: Runnable = memoize_grader(relevance_prompt | structured_output, name=__name__)
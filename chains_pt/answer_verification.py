@@ -0,0 +1,67 @@
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+
+from chains.grader_cache import memoize_grader
+from chains_pt.document_relevance import DocumentRelevance
+from chains_pt.question_relevance import QuestionRelevance
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+llm = ChatOpenAI(temperature=0)
+
+
+class AnswerVerification(BaseModel):
+    """Grounding and question relevance of an answer, evaluated in a single call"""
+
+    grounding: DocumentRelevance = Field(
+        description="Whether the answer is grounded in the source documents"
+    )
+
+    question_relevance: QuestionRelevance = Field(
+        description="Whether the answer adequately addresses the user's question"
+    )
+
+
+structured_output = llm.with_structured_output(AnswerVerification)
+
+system = """Você é um verificador especialista de respostas para um sistema RAG. Você avalia uma resposta gerada pela IA segundo dois critérios independentes, em uma única avaliação.
+
+1. FUNDAMENTAÇÃO (grounding):
+   - Todo fato, afirmação e detalhe importante deve ser suportado pelos documentos fonte
+   - Pequenas paráfrases ou inferências razoáveis dos documentos são aceitáveis
+   - Contradições, detalhes fabricados ou conhecimento externo tornam a resposta não fundamentada
+   - Seja rigoroso: true somente se a resposta estiver bem fundamentada nos documentos
+
+2. RELEVÂNCIA PARA A PERGUNTA (question_relevance):
+   - A resposta aborda diretamente o núcleo da pergunta do usuário?
+   - Aspectos importantes da pergunta ficaram sem resposta?
+   - A resposta satisfaria a necessidade de informação do usuário?
+   - true somente se a resposta abordar a pergunta de forma adequada
+   - Avalie a completude como 'complete', 'partial' ou 'minimal' e liste os aspectos ausentes
+
+Avalie cada critério separadamente: uma resposta fundamentada pode não responder à pergunta, e uma resposta relevante pode não ser fundamentada."""
+
+verification_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", """Verifique a resposta gerada.
+
+DOCUMENTOS FONTE:
+{documents}
+
+PERGUNTA DO USUÁRIO:
+{question}
+
+RESPOSTA GERADA:
+{solution}
+
+Forneça, para a fundamentação: uma pontuação binária, uma confiança (0.0-1.0) e um breve raciocínio.
+Forneça, para a relevância: uma pontuação binária, uma pontuação de relevância (0.0-1.0), a completude, um breve raciocínio e os aspectos ausentes (se houver)."""),
+    ]
+)
+
+answer_verification: Runnable = memoize_grader(verification_prompt | structured_output, name=__name__)
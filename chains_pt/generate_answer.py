@@ -6,7 +6,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-llm = ChatOpenAI(temperature=0)
+# stream_usage reports token usage for streamed answers too
+llm = ChatOpenAI(temperature=0, stream_usage=True)
 
 # Custom RAG prompt for better answer generation
 system_prompt = """Você é um assistente especialista em responder perguntas com base em documentos fornecidos.
@@ -66,4 +67,5 @@ prompt = ChatPromptTemplate.from_messages([
     ("human", human_prompt)
 ])
 
-generate_chain = prompt | llm | StrOutputParser()
\ No newline at end of file
+# Named after the module so callbacks and traces can tell the chain apart
+generate_chain = (prompt | llm | StrOutputParser()).with_config(run_name=__name__)
\ No newline at end of file
@@ -1,8 +1,10 @@
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 
+from chains.grader_cache import memoize_grader
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -97,4 +99,4 @@ Forneça sua avaliação detalhada com base nos critérios acima."""),
     ]
 )
 
-question_relevance: RunnableSequence = relevance_prompt | structured_output
\ No newline at end of file
+question_relevance: Runnable = memoize_grader(relevance_prompt | structured_output, name=__name__)
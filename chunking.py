@@ -0,0 +1,155 @@
+"""
+Token-aware chunking engine for the Advanced RAG application
+
+Each document is tokenized exactly once with a shared tiktoken encoder and cut
+into windows of at most CHUNK_SIZE tokens overlapping by CHUNK_OVERLAP tokens.
+Window ends are moved back to the nearest paragraph, line, sentence or word
+boundary when one is close. Token positions are mapped back to character
+offsets, so every chunk carries its exact span in the parent text
+(start_index/end_index) and the metadata of the document it came from.
+
+Tokenizing a batch of documents runs in tiktoken's native thread pool, which
+releases the GIL, so documents are encoded in parallel.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+
+import tiktoken
+from langchain_core.documents import Document
+
+
+@lru_cache(maxsize=None)
+def get_encoder(encoding_name: str):
+    """Shared tiktoken encoder (loading the BPE ranks is expensive)"""
+    return tiktoken.get_encoding(encoding_name)
+
+
+def token_offsets(encoder, tokens: List[int]) -> List[int]:
+    """
+    Character offset at which each token starts
+
+    A token that starts in the middle of a multi-byte character is assigned
+    to the character it continues.
+    """
+    offsets = []
+    text_length = 0
+    for token_bytes in encoder.decode_tokens_bytes(tokens):
+        offsets.append(max(0, text_length - (0x80 <= token_bytes[0] < 0xC0)))
+        text_length += sum(1 for byte in token_bytes if not 0x80 <= byte < 0xC0)
+    return offsets
+
+
+def _boundary_rank(text: str, position: int) -> int:
+    """How natural it is to cut text at position (higher is better)"""
+    before = text[max(0, position - 2):position]
+    after = text[position:position + 2]
+    if "\n\n" in before + after:
+        return 4
+    if before[-1:] == "\n" or after[:1] == "\n":
+        return 3
+    if before[-1:] in (".", "!", "?", ";") and after[:1].isspace():
+        return 2
+    if before[-1:].isspace() or after[:1].isspace():
+        return 1
+    return 0
+
+
+class TokenChunker:
+    """Splits documents into token-bounded chunks with exact character offsets"""
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 100,
+                 encoding_name: str = "cl100k_base", num_threads: int = 8,
+                 boundary_window: float = 0.2):
+        """
+        Args:
+            chunk_size: Maximum number of tokens per chunk
+            chunk_overlap: Tokens shared by consecutive chunks of a document
+            encoding_name: tiktoken encoding used to count tokens
+            num_threads: Threads used to tokenize a batch of documents
+            boundary_window: Share of a chunk that may be given up to end
+                it on a natural boundary instead of mid-word
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.num_threads = num_threads
+        self.boundary_tokens = int(chunk_size * boundary_window)
+        self.encoder = get_encoder(encoding_name)
+
+    def split_text(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start_index, end_index, token_count) of every chunk of text"""
+        return self._split_tokens(text, self.encoder.encode_ordinary(text))
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Chunk documents, copying each parent's metadata into its chunks
+
+        chunk_id/total_chunks number the chunks across the whole call, in
+        document order.
+        """
+        texts = [document.page_content for document in documents]
+        if len(texts) > 1:
+            token_lists = self.encoder.encode_ordinary_batch(texts, num_threads=self.num_threads)
+        else:
+            token_lists = [self.encoder.encode_ordinary(text) for text in texts]
+
+        chunks = []
+        for document, text, tokens in zip(documents, texts, token_lists):
+            for start, end, token_count in self._split_tokens(text, tokens):
+                metadata = dict(document.metadata)
+                metadata.update({
+                    "start_index": start,
+                    "end_index": end,
+                    "token_count": token_count,
+                })
+                chunks.append(Document(page_content=text[start:end], metadata=metadata))
+
+        for i, chunk in enumerate(chunks):
+            chunk.metadata.update({
+                "chunk_id": i,
+                "total_chunks": len(chunks),
+                "chunk_size": len(chunk.page_content)
+            })
+        return chunks
+
+    def _split_tokens(self, text: str, tokens: List[int]) -> List[Tuple[int, int, int]]:
+        if not tokens:
+            return []
+
+        token_count = len(tokens)
+        # boundaries[i] is where token i starts; the last entry closes the text
+        boundaries = token_offsets(self.encoder, tokens)
+        boundaries.append(len(text))
+
+        spans = []
+        start = 0
+        while start < token_count:
+            end = min(start + self.chunk_size, token_count)
+            if end < token_count:
+                end = self._snap_end(text, boundaries, start, end)
+
+            # Trim surrounding whitespace without losing track of the offsets
+            char_start, char_end = boundaries[start], boundaries[end]
+            chunk = text[char_start:char_end]
+            stripped_start = char_start + len(chunk) - len(chunk.lstrip())
+            stripped_end = char_start + len(chunk.rstrip())
+            if stripped_end > stripped_start:
+                spans.append((stripped_start, stripped_end, end - start))
+
+            if end >= token_count:
+                break
+            start = max(end - self.chunk_overlap, start + 1)
+        return spans
+
+    def _snap_end(self, text: str, boundaries: List[int], start: int, end: int) -> int:
+        """Move a window end back to the best nearby boundary (furthest among equals)"""
+        lowest = max(start + self.chunk_overlap + 1, end - self.boundary_tokens)
+        best, best_rank = end, _boundary_rank(text, boundaries[end])
+        for candidate in range(end - 1, lowest - 1, -1):
+            if best_rank == 4:
+                break
+            rank = _boundary_rank(text, boundaries[candidate])
+            if rank > best_rank:
+                best, best_rank = candidate, rank
+        return best
@@ -16,13 +16,94 @@ SIDEBAR_STATE = "expanded"
 # File Processing Configuration
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 100
+CHUNK_ENCODING = "cl100k_base"  # tiktoken encoding used to count chunk tokens
+CHUNKING_THREADS = 8  # Threads used to tokenize documents in parallel
 CHROMA_COLLECTION_NAME = "rag-chroma"
 CHROMA_PERSIST_DIR = "./.chroma"
 
+# PDF Extraction Configuration
+PDF_PARALLEL_WORKERS = None  # None uses every CPU core
+PDF_PARALLEL_MIN_PAGES = 32  # Smaller PDFs are extracted serially
+
+# Embedding Scheduler Configuration
+EMBEDDING_SCHEDULER_ENABLED = True  # Batch, parallelize and throttle embedding requests
+EMBEDDING_BATCH_TOKENS = 50_000  # Token budget of one embedding request
+EMBEDDING_BATCH_MAX_TEXTS = 512  # Maximum texts per embedding request
+EMBEDDING_MAX_CONCURRENCY = 4  # Upper bound of concurrent embedding requests
+EMBEDDING_MAX_RETRIES = 6  # Retries of a throttled or failed request
+EMBEDDING_BACKOFF_SECONDS = 1.0  # Base delay of the exponential backoff
+
+# Streaming Ingestion Configuration
+INGESTION_BATCH_SIZE = 64  # Chunks embedded and added to Chroma per batch
+INGESTION_QUEUE_SIZE = 4  # Bounded queue capacity between pipeline stages
+
+# Deduplication Configuration
+DEDUP_ENABLED = True  # Drop exact and near-duplicate chunks before embedding
+DEDUP_SIMILARITY_THRESHOLD = 0.85  # Estimated Jaccard similarity of word shingles
+DEDUP_NUM_PERM = 128  # MinHash signature length
+DEDUP_BANDS = 16  # LSH bands (DEDUP_NUM_PERM must be divisible by it)
+
+# Multi-file Loading Configuration
+LOADER_IO_WORKERS = 8  # Threads for text-like formats
+LOADER_CPU_WORKERS = None  # Processes for PDF/Word/Excel; None uses every CPU core
+
+# Retrieval Configuration
+RETRIEVAL_MODE = "hybrid"  # "hybrid" (BM25 + vector, fused with RRF) or "vector"
+RETRIEVER_K = 4  # Chunks handed to the workflow per question
+HYBRID_FETCH_K = 20  # Candidates taken from each ranking before fusion
+RRF_K = 60  # Reciprocal rank fusion constant
+BM25_INDEX_FILENAME = "bm25_index.json"  # Stored inside CHROMA_PERSIST_DIR
+
+# Embedding Backend Configuration
+EMBEDDING_BACKEND = "openai"  # "openai" or "hashing" (deterministic, offline)
+HASHING_EMBEDDING_DIMENSIONS = 1024  # Vector size of the hashing backend
+HASHING_EMBEDDING_NGRAM_RANGE = (1, 2)  # Word n-gram sizes hashed by the hashing backend
+
+# Embedding Cache Configuration (kept outside CHROMA_PERSIST_DIR so clearing the DB keeps it)
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_DIR = "./.embedding_cache"
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+
 # Model Configuration
 LLM_TEMPERATURE = 0
 TAVILY_SEARCH_RESULTS = 2
 
+# Workflow Configuration
+GRADING_MAX_CONCURRENCY = 4  # Parallel evaluate_docs calls per question
+STREAM_ANSWERS = True  # Render answer tokens as they are generated
+GENERATION_CONTEXT_TOKEN_BUDGET = 6000  # Maximum tokens of retrieved text packed into the answer prompt
+# "sequential": question relevance is only checked once the answer is grounded
+# "parallel": both checks run speculatively at the same time
+# "combined": a single LLM call returns both verdicts
+HALLUCINATION_CHECK_MODE = "sequential"
+
+# Lexical Prefilter Configuration (BM25 over the chunk store)
+LEXICAL_PREFILTER_ENABLED = True
+LEXICAL_PREFILTER_REJECT_THRESHOLD = 0.02  # Normalized BM25 score below which chunks skip LLM grading
+
+# Answer Cache Configuration
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_PATH = "./.answer_cache/answers.sqlite3"
+ANSWER_CACHE_SEMANTIC = False  # Reuse answers of near-identical questions
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95
+ANSWER_CACHE_MAX_AGE_SECONDS = None  # None keeps answers until the corpus changes
+
+# Grader Cache Configuration (in-process, shared by every session)
+GRADER_CACHE_ENABLED = os.getenv("RAG_GRADER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+GRADER_CACHE_MAX_ENTRIES = 10_000
+GRADER_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Workflow Metrics Configuration
+# One JSON line per question (e.g. ./.metrics/workflow_metrics.jsonl); unset disables the log
+WORKFLOW_METRICS_LOG_PATH = os.getenv("RAG_METRICS_LOG_PATH") or None
+
+# Tracing Configuration (OpenTelemetry, opt-in)
+TRACING_ENABLED = os.getenv("RAG_TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACING_EXPORTERS = os.getenv("RAG_TRACING_EXPORTERS", "console").split(",")  # "console", "file" and/or "otlp"
+TRACING_FILE_PATH = "./.traces/spans.jsonl"  # One JSON span per line for the "file" exporter
+TRACING_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")  # Local collector (gRPC)
+TRACING_SERVICE_NAME = "geomimi-rag"
+
 # Supported File Types
 SUPPORTED_EXTENSIONS = [
     "pdf", "docx", "doc", "csv", "xlsx", "xls", 
@@ -0,0 +1,144 @@
+"""
+Token-budgeted context packing for answer generation
+
+Instead of handing generate_chain the repr of the retrieved Document list
+(metadata included), the context is rendered as plain passages, each headed
+by a short source/page tag. Packing works in two steps:
+
+1. Chunks are taken in retrieval order (best ranked first) while they fit
+   in the token budget; a first chunk that is too long on its own is cut to
+   the budget, and chunks that do not fit are skipped in favour of smaller,
+   lower ranked ones.
+2. The selected chunks of the same source and page are put back in reading
+   order and adjacent ones are merged, dropping the text they share (the
+   chunk overlap). The offsets recorded by TokenChunker (start_index and
+   end_index) tell how much to drop.
+
+Token counts are measured with tiktoken, using the chunking encoding.
+"""
+import os
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from chunking import get_encoder
+
+
+def _location(metadata: Dict[str, Any]) -> Tuple[str, Any, Any]:
+    """Key of the parent document a chunk was cut from"""
+    return metadata.get("source", ""), metadata.get("page"), metadata.get("row")
+
+
+def source_tag(metadata: Dict[str, Any]) -> str:
+    """Compact citation tag for a chunk, e.g. [Fonte: proposta.pdf, página 3]"""
+    source, page, row = _location(metadata)
+    parts = [os.path.basename(str(source)) or "desconhecida"]
+    if isinstance(page, int):
+        # Loaders number pages from zero
+        parts.append(f"página {page + 1}")
+    if isinstance(row, int):
+        parts.append(f"linha {row + 1}")
+    return f"[Fonte: {', '.join(parts)}]"
+
+
+class ContextBuilder:
+    """Packs retrieved chunks into a compact prompt context under a token budget"""
+
+    def __init__(self, token_budget: int = 6000, encoding_name: str = "cl100k_base"):
+        """
+        Args:
+            token_budget: Maximum number of tokens of the packed context
+            encoding_name: tiktoken encoding used to count tokens
+        """
+        self.token_budget = token_budget
+        self.encoding_name = encoding_name
+
+    def count_tokens(self, text: str) -> int:
+        return len(get_encoder(self.encoding_name).encode_ordinary(text))
+
+    def build(self, documents: List[Document]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render documents as a packed context
+
+        Returns the context and its stats: chunk counts, and the prompt
+        tokens of the context before packing (every chunk with its tag, as
+        counted against the budget) and after packing.
+        """
+        selected, truncated, tokens_before = self._select(documents)
+        context = "\n\n".join(
+            f"{source_tag(passage.metadata)}\n{passage.page_content}" for passage in self._merge(selected)
+        )
+        stats = {
+            "documents": len(documents),
+            "documents_packed": len(selected),
+            "documents_truncated": truncated,
+            "token_budget": self.token_budget,
+            "tokens_before": tokens_before,
+            "tokens_after": self.count_tokens(context),
+        }
+        return context, stats
+
+    def _select(self, documents: List[Document]) -> Tuple[List[Document], int, int]:
+        """
+        Best ranked chunks that fit in the budget, counted with their tags
+
+        Also returns the number of truncated chunks and the tokens of all
+        documents, i.e. the context if nothing had been dropped or merged.
+        """
+        encoder = get_encoder(self.encoding_name)
+        selected = []
+        truncated = 0
+        total_tokens = 0
+        remaining = self.token_budget
+        for document in documents:
+            tag_tokens = self.count_tokens(source_tag(document.metadata)) + 2  # Tag line and separator
+            text_tokens = encoder.encode_ordinary(document.page_content)
+            total_tokens += tag_tokens + len(text_tokens)
+            if tag_tokens + len(text_tokens) <= remaining:
+                selected.append(document)
+                remaining -= tag_tokens + len(text_tokens)
+            elif not selected and remaining > tag_tokens:
+                # The best chunk alone exceeds the budget: keep what fits of it
+                text = encoder.decode(text_tokens[:remaining - tag_tokens])
+                metadata = {key: value for key, value in document.metadata.items() if key != "end_index"}
+                selected.append(Document(page_content=text, metadata=metadata))
+                truncated += 1
+                remaining = 0
+        return selected, truncated, total_tokens
+
+    def _merge(self, documents: List[Document]) -> List[Document]:
+        """
+        Merge overlapping chunks of the same parent document into passages
+
+        Passages are ordered by their best ranked chunk; within a passage,
+        text follows the reading order of the parent document.
+        """
+        passages = []  # [rank, metadata, text, end]
+        reading_order = sorted(
+            ((rank, document) for rank, document in enumerate(documents)
+             if isinstance(document.metadata.get("start_index"), int)),
+            key=lambda item: (repr(_location(item[1].metadata)), item[1].metadata["start_index"])
+        )
+        current = None
+        for rank, document in reading_order:
+            start = document.metadata["start_index"]
+            end = document.metadata.get("end_index", start + len(document.page_content))
+            same_parent = current is not None and _location(current[1]) == _location(document.metadata)
+            if same_parent and start <= current[3]:
+                # Keep only the part of this chunk that the passage does not have yet
+                if end > current[3]:
+                    current[2] += document.page_content[current[3] - start:]
+                    current[3] = end
+                current[0] = min(current[0], rank)
+                continue
+            current = [rank, document.metadata, document.page_content, end]
+            passages.append(current)
+
+        # Chunks without offsets (e.g. indexed before TokenChunker) are kept as they are
+        passages.extend(
+            [rank, document.metadata, document.page_content, None]
+            for rank, document in enumerate(documents)
+            if not isinstance(document.metadata.get("start_index"), int)
+        )
+        passages.sort(key=lambda passage: passage[0])
+        return [Document(page_content=text, metadata=metadata) for _, metadata, text, _ in passages]
@@ -0,0 +1,200 @@
+"""
+Near-duplicate chunk detection for the Advanced RAG application
+
+PDFs repeat headers, footers and boilerplate pages, so many chunks of a
+collection are identical or nearly so. They cost embedding calls and crowd
+the retrieved top-k with the same text. The ChunkDeduplicator drops them
+before embedding:
+
+- exact duplicates are found by hashing the whitespace/case-normalized text;
+- near duplicates are found with MinHash signatures over word shingles and
+  locality-sensitive hashing (LSH) bands, then confirmed by the estimated
+  Jaccard similarity against the configured threshold.
+
+The first occurrence is kept and embedded once; the locations of every
+duplicate are recorded in its metadata (duplicate_count and a JSON-encoded
+duplicate_locations, since Chroma only stores scalar metadata values).
+
+Between calls the deduplicator never keeps the chunks themselves. Its memory
+is O(unique chunks) small fixed-size entries: one text hash, one set of LSH
+band keys, one MinHash signature and one chunk id per kept chunk, plus the
+source and page of every duplicate found. Memory grows with the number of
+chunks, but not with their text.
+"""
+import hashlib
+import json
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from hybrid_retriever import CHUNK_UID_KEY
+
+# Mersenne prime used by the MinHash permutations; hashes are 32-bit so a*x + b fits in uint64
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+# Metadata copied into duplicate_locations
+_LOCATION_KEYS = ("source", "page", "row", "start_index")
+
+
+@dataclass
+class DedupStats:
+    """Counters for one ingestion"""
+    chunks_seen: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+
+    @property
+    def chunks_kept(self) -> int:
+        return self.chunks_seen - self.exact_duplicates - self.near_duplicates
+
+    def summary(self) -> str:
+        return (f"Dedup stats: {self.chunks_seen} chunks, {self.exact_duplicates} exact and "
+                f"{self.near_duplicates} near duplicates dropped, {self.chunks_kept} kept")
+
+
+class ChunkDeduplicator:
+    """
+    Stateful exact + MinHash/LSH deduplicator
+
+    One instance covers one ingestion: chunks passed in later calls are also
+    compared with the chunks kept by earlier calls, which is what the
+    streaming upload pipeline needs. Chunks returned by a call are never
+    modified afterwards, since they may be handed to Chroma on another
+    thread; duplicates found later are reported by pop_late_merges instead.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 3, seed: int = 0):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity above which chunks are merged
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must be divisible by it); more bands
+                find more candidates at lower similarities
+            shingle_size: Words per shingle
+            seed: Seed of the MinHash permutations
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+        self.stats = DedupStats()
+        # Kept chunks are referred to by their position in _signatures
+        self._exact: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._signatures: List[np.ndarray] = []
+        self._kept_ids: List[Optional[str]] = []
+        self._locations: Dict[int, List[dict]] = {}
+        self._late_merges: Set[int] = set()
+        # Chunks kept by the running call, which are still safe to modify
+        self._pending: Dict[int, Document] = {}
+
+    def deduplicate(self, chunks: List[Document]) -> List[Document]:
+        """Return the chunks that are not duplicates of anything seen so far"""
+        unique = []
+        try:
+            for chunk in chunks:
+                self.stats.chunks_seen += 1
+                normalized = " ".join(chunk.page_content.lower().split())
+
+                exact_key = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+                position = self._exact.get(exact_key)
+                if position is not None:
+                    self.stats.exact_duplicates += 1
+                    self._merge(position, chunk)
+                    continue
+
+                signature = self._signature(normalized)
+                position = self._find_near_duplicate(signature)
+                if position is not None:
+                    self.stats.near_duplicates += 1
+                    self._merge(position, chunk)
+                    continue
+
+                position = self._add(chunk, signature)
+                self._exact[exact_key] = position
+                self._pending[position] = chunk
+                unique.append(chunk)
+        finally:
+            self._pending = {}
+        return unique
+
+    def pop_late_merges(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Metadata updates for kept chunks that gained duplicates after the call returning them
+
+        In a streaming ingestion those chunks may already be indexed, so the
+        caller writes each (chunk id, metadata) pair to the stored chunk. Only
+        chunks that carried an id when they were kept can be reported.
+        """
+        late_merges = [
+            (self._kept_ids[position], self._duplicate_metadata(position))
+            for position in sorted(self._late_merges)
+            if self._kept_ids[position] is not None
+        ]
+        self._late_merges.clear()
+        return late_merges
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        words = re.findall(r"\w+", normalized)
+        size = self.shingle_size
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        # Values are below 2**31, so the kept signatures fit in half the memory
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _find_near_duplicate(self, signature: np.ndarray):
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        best, best_similarity = None, self.threshold
+        for position in sorted(candidates):
+            similarity = float(np.mean(signature == self._signatures[position]))
+            if similarity >= best_similarity:
+                best, best_similarity = position, similarity
+        return best
+
+    def _add(self, chunk: Document, signature: np.ndarray) -> int:
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        self._kept_ids.append(chunk.metadata.get(CHUNK_UID_KEY))
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(position)
+        return position
+
+    def _merge(self, position: int, duplicate: Document):
+        location = {key: duplicate.metadata[key] for key in _LOCATION_KEYS if key in duplicate.metadata}
+        self._locations.setdefault(position, []).append(location)
+        original = self._pending.get(position)
+        if original is not None:
+            original.metadata.update(self._duplicate_metadata(position))
+        else:
+            # Already returned to the caller: report it instead of modifying it
+            self._late_merges.add(position)
+
+    def _duplicate_metadata(self, position: int) -> Dict[str, Any]:
+        locations = self._locations[position]
+        return {
+            "duplicate_locations": json.dumps(locations, ensure_ascii=False),
+            "duplicate_count": len(locations),
+        }
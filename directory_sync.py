@@ -0,0 +1,131 @@
+"""
+Incremental directory sync manifest
+
+When a folder of documents is indexed, any change used to mean rebuilding the
+whole Chroma collection. The directory manifest remembers, for every indexed
+file, its fingerprint and the ids of the chunks it produced. Diffing the
+manifest against the folder tells which files are new, changed, removed or
+unchanged, so only the affected chunks need to be upserted or deleted.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_ENCODING, CHROMA_PERSIST_DIR
+from index_manifest import compute_file_hash
+
+DIRECTORY_MANIFEST_FILENAME = "directory_manifest.json"
+
+
+@dataclass
+class DirectoryDiff:
+    """Files grouped by what an incremental sync has to do with them"""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    fingerprints: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+def get_directory_manifest_path(persist_dir: str = CHROMA_PERSIST_DIR) -> str:
+    """Location of the directory manifest inside the Chroma directory"""
+    return os.path.join(persist_dir, DIRECTORY_MANIFEST_FILENAME)
+
+
+def load_directory_manifest(embedding_model: str, embedding_backend: str,
+                            persist_dir: str = CHROMA_PERSIST_DIR) -> Dict[str, Any]:
+    """
+    Read the directory manifest
+
+    A missing manifest, or one written with other chunking or embedding
+    settings, yields an empty file table so every file is treated as new.
+    """
+    empty = {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "chunk_encoding": CHUNK_ENCODING,
+        "embedding_backend": embedding_backend,
+        "embedding_model": embedding_model,
+        "files": {},
+    }
+    try:
+        with open(get_directory_manifest_path(persist_dir), "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return empty
+
+    if any(manifest.get(key) != value for key, value in empty.items() if key != "files"):
+        print("Directory manifest was built with different settings - reindexing every file")
+        empty["stale_files"] = manifest.get("files", {})
+        return empty
+    return manifest
+
+
+def save_directory_manifest(manifest: Dict[str, Any], persist_dir: str = CHROMA_PERSIST_DIR):
+    """Write the directory manifest atomically"""
+    os.makedirs(persist_dir, exist_ok=True)
+    manifest_path = get_directory_manifest_path(persist_dir)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def invalidate_directory_manifest(persist_dir: str = CHROMA_PERSIST_DIR):
+    """Remove the directory manifest so the next sync reindexes every file"""
+    try:
+        os.remove(get_directory_manifest_path(persist_dir))
+    except FileNotFoundError:
+        pass
+
+
+def diff_directory(manifest: Dict[str, Any], file_paths: List[Path],
+                   directory: Optional[Union[str, Path]] = None, recursive: bool = True) -> DirectoryDiff:
+    """
+    Compare the files currently in the directory with the manifest
+
+    Files whose size and mtime match the manifest are unchanged without
+    being read; otherwise the content hash decides. The manifest is shared by
+    every synced folder, so only files under directory (or directly in it
+    when not recursive) can be removed; without a directory, every known
+    file missing from file_paths is.
+    """
+    diff = DirectoryDiff()
+    known_files = manifest.get("files", {})
+    current_paths = set()
+
+    for file_path in file_paths:
+        path = str(Path(file_path).resolve())
+        current_paths.add(path)
+        stat = os.stat(path)
+        fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+        entry = known_files.get(path)
+
+        if entry is None:
+            fingerprint["sha256"] = compute_file_hash(path)
+            diff.added.append(path)
+        elif entry["size"] == fingerprint["size"] and entry["mtime"] == fingerprint["mtime"]:
+            fingerprint["sha256"] = entry["sha256"]
+            diff.unchanged.append(path)
+        else:
+            fingerprint["sha256"] = compute_file_hash(path)
+            if fingerprint["sha256"] == entry["sha256"]:
+                diff.unchanged.append(path)
+            else:
+                diff.changed.append(path)
+        diff.fingerprints[path] = fingerprint
+
+    diff.removed = sorted(
+        path for path in known_files
+        if path not in current_paths and (directory is None or _is_under(path, directory, recursive))
+    )
+    return diff
+
+
+def _is_under(path: str, directory: Union[str, Path], recursive: bool) -> bool:
+    """Whether a manifest path belongs to the synced directory"""
+    root = Path(directory).resolve()
+    path = Path(path)
+    return root in path.parents if recursive else path.parent == root
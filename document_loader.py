@@ -5,7 +5,9 @@ Handles loading various document types including PDFs, Word docs, Excel files, a
 
 import tempfile
 import os
-from typing import List
+import shutil
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List
 from pathlib import Path
 import logging
 
@@ -28,46 +30,42 @@ class StreamlitMultiFormatDocumentLoader:
         """Load a document from file path using the multi-format loader"""
         return self.base_loader.load_document(file_path)
     
+    def iter_document(self, file_path: str) -> Iterator[Document]:
+        """Lazily load a document from file path (page by page for PDFs), for streaming ingestion"""
+        return self.base_loader.lazy_load_document(file_path)
+    
+    def find_supported_files(self, directory_path: str, recursive: bool = True) -> List[Path]:
+        """Find all supported files in a directory using the multi-format loader"""
+        return self.base_loader.find_supported_files(directory_path, recursive)
+    
     def load_uploaded_file(self, uploaded_file) -> List[Document]:
         """
         Loads a document from a Streamlit uploaded file
         
+        Text, CSV and PDF uploads are parsed from memory; other formats are
+        written to a temporary file because their loaders need a path.
+        
         Args:
             uploaded_file: Streamlit uploaded file object
             
         Returns:
             List[Document]: Document chunks from the uploaded file
         """
-        # Get file extension
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        # Check if file type is supported
-        if not self.base_loader.is_supported_format(f"dummy.{file_extension}"):
-            raise ValueError(f"Unsupported file type: {file_extension}")
-        
-        # Create temporary file to work with loaders that need file paths
-        with tempfile.NamedTemporaryFile(
-            delete=False, 
-            suffix=f".{file_extension}",
-            prefix=f"uploaded_{uploaded_file.name.split('.')[0]}_"
-        ) as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_file_path = tmp_file.name
+        self._check_upload_format(uploaded_file)
         
         try:
-            logger.info(f"Processing uploaded file: {uploaded_file.name} (size: {len(uploaded_file.getvalue())} bytes)")
+            logger.info(f"Processing uploaded file: {uploaded_file.name} (size: {uploaded_file.size} bytes)")
             
-            # Load document using the loader
-            documents = self.base_loader.load_document(tmp_file_path)
+            if self.base_loader.supports_stream(uploaded_file.name):
+                documents = list(self.base_loader.lazy_load_stream(self._upload_stream(uploaded_file), uploaded_file.name))
+            else:
+                with self._upload_temp_file(uploaded_file) as tmp_file_path:
+                    documents = self.base_loader.load_document(tmp_file_path)
             
             # Update metadata with original filename and upload info
+            upload_metadata = self._upload_metadata(uploaded_file)
             for doc in documents:
-                doc.metadata.update({
-                    "original_filename": uploaded_file.name,
-                    "upload_size": len(uploaded_file.getvalue()),
-                    "upload_type": uploaded_file.type if hasattr(uploaded_file, 'type') else 'unknown',
-                    "processed_via": "streamlit_upload"
-                })
+                doc.metadata.update(upload_metadata)
             
             logger.info(f"Successfully processed {uploaded_file.name}: {len(documents)} chunks extracted")
             return documents
@@ -75,6 +73,79 @@ class StreamlitMultiFormatDocumentLoader:
         except Exception as e:
             logger.error(f"Error processing uploaded file {uploaded_file.name}: {str(e)}")
             raise Exception(f"Failed to process uploaded file {uploaded_file.name}: {str(e)}")
+    
+    def iter_uploaded_file(self, uploaded_file) -> Iterator[Document]:
+        """
+        Lazily loads a document from a Streamlit uploaded file
+        
+        Yields documents one at a time (page by page for PDFs) so that the
+        ingestion pipeline can split and index them while loading continues.
+        Like load_uploaded_file, only formats that need a path touch the disk.
+        
+        Args:
+            uploaded_file: Streamlit uploaded file object
+            
+        Yields:
+            Document: Document chunks from the uploaded file
+        """
+        self._check_upload_format(uploaded_file)
+        upload_metadata = self._upload_metadata(uploaded_file)
+        
+        try:
+            logger.info(f"Streaming uploaded file: {uploaded_file.name} (size: {uploaded_file.size} bytes)")
+            if self.base_loader.supports_stream(uploaded_file.name):
+                documents = self.base_loader.lazy_load_stream(self._upload_stream(uploaded_file), uploaded_file.name)
+                for doc in documents:
+                    doc.metadata.update(upload_metadata)
+                    yield doc
+            else:
+                with self._upload_temp_file(uploaded_file) as tmp_file_path:
+                    for doc in self.base_loader.lazy_load_document(tmp_file_path):
+                        doc.metadata.update(upload_metadata)
+                        yield doc
+        except Exception as e:
+            logger.error(f"Error processing uploaded file {uploaded_file.name}: {str(e)}")
+            raise Exception(f"Failed to process uploaded file {uploaded_file.name}: {str(e)}")
+    
+    def _check_upload_format(self, uploaded_file):
+        """Raises ValueError for unsupported upload extensions"""
+        file_extension = uploaded_file.name.split('.')[-1].lower()
+        if not self.base_loader.is_supported_format(f"dummy.{file_extension}"):
+            raise ValueError(f"Unsupported file type: {file_extension}")
+    
+    def _upload_metadata(self, uploaded_file) -> dict:
+        return {
+            "original_filename": uploaded_file.name,
+            "upload_size": uploaded_file.size,
+            "upload_type": uploaded_file.type if hasattr(uploaded_file, 'type') else 'unknown',
+            "processed_via": "streamlit_upload"
+        }
+    
+    def _upload_stream(self, uploaded_file) -> BinaryIO:
+        """
+        Binary stream over the upload content, without copying it
+        
+        Streamlit's UploadedFile already is an in-memory BytesIO, so it is
+        rewound and read in place rather than copied with getvalue().
+        """
+        uploaded_file.seek(0)
+        return uploaded_file
+    
+    @contextmanager
+    def _upload_temp_file(self, uploaded_file) -> Iterator[str]:
+        """Writes the upload to a temporary file for loaders that need a path"""
+        file_extension = uploaded_file.name.split('.')[-1].lower()
+        with tempfile.NamedTemporaryFile(
+            delete=False, 
+            suffix=f".{file_extension}",
+            prefix=f"uploaded_{uploaded_file.name.split('.')[0]}_"
+        ) as tmp_file:
+            # Copied in small blocks, so no second full copy is held in memory
+            shutil.copyfileobj(self._upload_stream(uploaded_file), tmp_file)
+            tmp_file_path = tmp_file.name
+        
+        try:
+            yield tmp_file_path
         finally:
             # Clean up temporary file
             try:
@@ -137,7 +208,7 @@ class StreamlitMultiFormatDocumentLoader:
         
         return {
             "filename": uploaded_file.name,
-            "size": len(uploaded_file.getvalue()),
+            "size": uploaded_file.size,
             "extension": file_extension,
             "is_supported": self.is_supported_file(uploaded_file.name),
             "type": uploaded_file.type if hasattr(uploaded_file, 'type') else 'unknown'
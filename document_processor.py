@@ -1,13 +1,41 @@
 """
 Document processing module for the Advanced RAG application
 """
+import hashlib
+import itertools
+import os
 import streamlit as st
 import time
-from langchain.text_splitter import CharacterTextSplitter
+from contextlib import contextmanager
+import chromadb
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 
-from config import CHUNK_SIZE, CHUNK_OVERLAP, CHROMA_COLLECTION_NAME, CHROMA_PERSIST_DIR
+from config import (
+    CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_ENCODING, CHUNKING_THREADS,
+    CHROMA_COLLECTION_NAME, CHROMA_PERSIST_DIR, EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_SCHEDULER_ENABLED, EMBEDDING_BATCH_TOKENS, EMBEDDING_BATCH_MAX_TEXTS,
+    EMBEDDING_MAX_CONCURRENCY, EMBEDDING_MAX_RETRIES, EMBEDDING_BACKOFF_SECONDS,
+    RETRIEVAL_MODE, RETRIEVER_K, HYBRID_FETCH_K, RRF_K, BM25_INDEX_FILENAME,
+    INGESTION_BATCH_SIZE, INGESTION_QUEUE_SIZE,
+    DEDUP_ENABLED, DEDUP_SIMILARITY_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS
+)
+from chunking import TokenChunker
+from dedup import ChunkDeduplicator, DedupStats
+from directory_sync import (
+    diff_directory, invalidate_directory_manifest, load_directory_manifest, save_directory_manifest
+)
+from embedding_backends import get_embedding_backend
+from embedding_cache import CachedEmbeddings, embedding_model_name
+from embedding_scheduler import ScheduledEmbeddings
+from index_manifest import (
+    build_manifest, get_index_version, invalidate_manifest, load_manifest,
+    manifest_matches, new_index_version, save_manifest
+)
+from ingestion_pipeline import StreamingIngestionPipeline
+from hybrid_retriever import CHUNK_UID_KEY, HybridRetriever
+from lexical_index import BM25Index
+from tracing import set_attributes, span
 from utils import get_file_key
 from ui_components import render_file_analysis
 
@@ -15,9 +43,49 @@ from ui_components import render_file_analysis
 class DocumentProcessor:
     """Processes documents and creates embeddings for the vector database"""
     
-    def __init__(self, document_loader):
+    def __init__(self, document_loader, embedding_function=None, embedding_backend=EMBEDDING_BACKEND):
+        """
+        Args:
+            document_loader: Loader used for local files and uploads
+            embedding_function: Explicit embedding function (recorded as the "custom" backend)
+            embedding_backend: Registered backend name, used when no function is given
+        """
         self.document_loader = document_loader
-        self.embedding_function = OpenAIEmbeddings()
+        if embedding_function is None:
+            backend = get_embedding_backend(embedding_backend)
+            embedding_function = backend.factory()
+            remote = backend.remote
+        else:
+            embedding_backend = "custom"
+            remote = True
+        self.embedding_backend = embedding_backend
+        
+        # Requests to remote providers are packed into token-budgeted batches and throttled on rate limits
+        if EMBEDDING_SCHEDULER_ENABLED and remote:
+            embedding_function = ScheduledEmbeddings(
+                embedding_function,
+                max_batch_tokens=EMBEDDING_BATCH_TOKENS,
+                max_batch_texts=EMBEDDING_BATCH_MAX_TEXTS,
+                max_concurrency=EMBEDDING_MAX_CONCURRENCY,
+                max_retries=EMBEDDING_MAX_RETRIES,
+                backoff_seconds=EMBEDDING_BACKOFF_SECONDS,
+                encoding_name=CHUNK_ENCODING
+            )
+        
+        # Only chunks that were never embedded before reach the provider
+        if EMBEDDING_CACHE_ENABLED:
+            embedding_function = CachedEmbeddings(
+                embedding_function,
+                cache_dir=EMBEDDING_CACHE_DIR,
+                max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+            )
+        self.embedding_function = embedding_function
+        self.chunker = TokenChunker(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            encoding_name=CHUNK_ENCODING,
+            num_threads=CHUNKING_THREADS
+        )
     
     def process_local_file(self, file_path):
         """
@@ -33,41 +101,72 @@ class DocumentProcessor:
             return st.session_state.get('retriever')
         
         try:
+            # Reopen the persisted collection when it was built from this exact input
+            retriever = self._reuse_persisted_index(file_path, current_file_key)
+            if retriever is not None:
+                return retriever
             return self._process_local_file_pipeline(file_path, current_file_key)
         except Exception as e:
             st.error(f"❌ Error processing local file: {str(e)}")
             st.info("💡 Please make sure the file exists and is in a supported format.")
             return None
     
+    def _reuse_persisted_index(self, file_path, current_file_key):
+        """
+        Reopens the persisted ChromaDB collection if its manifest matches
+        Returns retriever or None if the collection has to be rebuilt
+        """
+        start_time = time.time()
+        with span("rag.ingestion.reuse_index", **{"rag.source": file_path}) as reuse_span:
+            if not manifest_matches(file_path, embedding_model_name(self.embedding_function), self.embedding_backend):
+                set_attributes(reuse_span, **{"rag.index.reused": False})
+                return None
+            
+            chroma_db = self._open_vector_database()
+            
+            # Guard against a manifest that outlived its collection
+            if not chroma_db.get(limit=1)["ids"]:
+                print("Index manifest found but collection is empty - rebuilding")
+                invalidate_manifest()
+                set_attributes(reuse_span, **{"rag.index.reused": False})
+                return None
+            
+            lexical_index = self._load_lexical_index(chroma_db)
+            set_attributes(reuse_span, **{"rag.index.reused": True, "rag.chunks.count": len(lexical_index)})
+        retriever = self._create_retriever(chroma_db)
+        st.session_state.processed_file = current_file_key
+        st.session_state.retriever = retriever
+        st.session_state.index_version = get_index_version(load_manifest())
+        print(f"Reused persisted index for {file_path} in {time.time() - start_time:.3f}s")
+        return retriever
+    
     def _process_local_file_pipeline(self, file_path, current_file_key):
         """Runs the complete processing pipeline for local files"""
         st.markdown("### 🔄 Processing Status")
         
+        # The persisted collection is stale: start from an empty one
+        self._reset_vector_database()
+        
         # Initialize progress tracking
         progress_bar = st.progress(0)
         status_text = st.empty()
         
         try:
-            # Etapa 1: Carregar documento
+            chroma_db = self._open_vector_database()
+            
+            # Etapas 1-4: carregar, dividir e indexar em lotes, em fluxo contínuo
             status_text.text("🔄 Carregando documento local...")
-            progress_bar.progress(25)
-            documents = self.document_loader.load_document(file_path)
-
-            # Etapa 2: Extrair conteúdo
-            status_text.text("🔍 Extraindo conteúdo...")
-            progress_bar.progress(50)
+            self._stream_documents(
+                chroma_db,
+                self.document_loader.iter_document(file_path),
+                "rag.ingest_file",
+                file_path,
+                self._progress_reporter(progress_bar, status_text)
+            )
+            manifest = build_manifest(file_path, embedding_model_name(self.embedding_function), self.embedding_backend)
+            save_manifest(manifest)
             st.success(f"✅ Conteúdo extraído com sucesso de {file_path}")
 
-            # Etapa 3: Dividir em partes
-            progress_bar.progress(75)
-            status_text.text("✂️ Dividindo em partes...")
-            doc_splits = self._create_document_chunks(documents)
-
-            # Etapa 4: Criar embeddings
-            progress_bar.progress(90)
-            status_text.text("🧠 Criando embeddings...")
-            chroma_db = self._create_vector_database(doc_splits)
-
             # Etapa 5: Concluído
             progress_bar.progress(100)
             status_text.text("✅ Processamento concluído!")
@@ -78,9 +177,10 @@ class DocumentProcessor:
             status_text.empty()
             
             # Store in session state
-            retriever = chroma_db.as_retriever()
+            retriever = self._create_retriever(chroma_db)
             st.session_state.processed_file = current_file_key
             st.session_state.retriever = retriever
+            st.session_state.index_version = get_index_version(manifest)
             
             # Debug: Confirm retriever creation and test it
             print(f"Local file retriever created successfully: {retriever is not None}")
@@ -100,6 +200,112 @@ class DocumentProcessor:
             status_text.empty()
             raise e
     
+    def sync_directory(self, directory_path, recursive=True):
+        """
+        Incrementally syncs the collection with a folder of documents
+        
+        Only new or modified files are loaded, chunked and embedded; chunks of
+        modified and removed files are deleted from ChromaDB and the BM25 index.
+        Returns a summary of the diff and the estimated time saved.
+        """
+        with span("rag.sync_directory", **{"rag.source": os.path.abspath(directory_path)}) as sync_span:
+            summary = self._sync_directory(directory_path, recursive)
+            set_attributes(sync_span, **{
+                f"rag.files.{key}": len(summary[key]) for key in ("added", "changed", "removed", "unchanged", "failed")
+            })
+        return summary
+    
+    def _sync_directory(self, directory_path, recursive):
+        """Runs the incremental sync described in sync_directory"""
+        start_time = time.time()
+        embedding_model = embedding_model_name(self.embedding_function)
+        manifest = load_directory_manifest(embedding_model, self.embedding_backend)
+        chroma_db = self._open_vector_database()
+        lexical_index = self._load_lexical_index(chroma_db)
+        
+        # Guard against a manifest that outlived its collection
+        if manifest["files"] and not chroma_db.get(limit=1)["ids"]:
+            print("Directory manifest found but collection is empty - reindexing every file")
+            manifest["files"] = {}
+        
+        diff = diff_directory(
+            manifest, self.document_loader.find_supported_files(directory_path, recursive),
+            directory=directory_path, recursive=recursive
+        )
+        files = manifest["files"]
+        failed = []
+        dedup_stats = DedupStats()
+        
+        def delete_chunks(chunk_ids):
+            if chunk_ids:
+                chroma_db.delete(ids=chunk_ids)
+            for chunk_id in chunk_ids:
+                lexical_index.remove(chunk_id)
+        
+        # Files indexed with other settings, and files that disappeared
+        delete_chunks([chunk_id for entry in manifest.pop("stale_files", {}).values() for chunk_id in entry["chunk_ids"]])
+        for path in diff.removed:
+            delete_chunks(files.pop(path)["chunk_ids"])
+        
+        for path in diff.added + diff.changed:
+            file_start = time.time()
+            try:
+                doc_splits = self._create_document_chunks(self._load_document(path))
+                # Per file, so that no chunk is shared by the entries of two files
+                deduplicator = self._new_deduplicator()
+                if deduplicator is not None:
+                    doc_splits = self._deduplicate(deduplicator, doc_splits)
+                    dedup_stats.chunks_seen += deduplicator.stats.chunks_seen
+                    dedup_stats.exact_duplicates += deduplicator.stats.exact_duplicates
+                    dedup_stats.near_duplicates += deduplicator.stats.near_duplicates
+            except Exception as e:
+                # Keep the previous chunks of a file that can no longer be loaded
+                print(f"Failed to sync {path}: {e}")
+                failed.append(path)
+                continue
+            
+            if path in files:
+                delete_chunks(files[path]["chunk_ids"])
+            chunk_ids = self._add_to_vector_database(chroma_db, doc_splits)
+            self._update_lexical_index(doc_splits, persist=False)
+            files[path] = {
+                **diff.fingerprints[path],
+                "chunk_ids": chunk_ids,
+                "index_seconds": time.time() - file_start,
+            }
+        
+        # Unchanged files may have a refreshed mtime after a hash comparison
+        for path in diff.unchanged:
+            files[path].update(diff.fingerprints[path])
+        
+        save_directory_manifest(manifest)
+        self._save_lexical_index()
+        if DEDUP_ENABLED:
+            print(dedup_stats.summary())
+        self._log_embedding_stats()
+        # The collection no longer matches the single-file manifest
+        invalidate_manifest()
+        
+        summary = {
+            "added": diff.added,
+            "changed": diff.changed,
+            "removed": diff.removed,
+            "unchanged": diff.unchanged,
+            "failed": failed,
+            "elapsed_seconds": time.time() - start_time,
+            "time_saved_seconds": sum(files[path]["index_seconds"] for path in diff.unchanged),
+        }
+        print(f"Directory sync of {directory_path}: {len(diff.added)} added, {len(diff.changed)} changed, "
+              f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged, {len(failed)} failed "
+              f"in {summary['elapsed_seconds']:.2f}s (~{summary['time_saved_seconds']:.2f}s saved)")
+        
+        current_file_key = f"dir_{os.path.abspath(directory_path)}"
+        retriever = self._create_retriever(chroma_db)
+        st.session_state.processed_file = current_file_key
+        st.session_state.retriever = retriever
+        st.session_state.index_version = new_index_version(current_file_key)
+        return summary
+    
     def process_file(self, user_file):
         """
         Processes an uploaded file and creates embeddings
@@ -144,26 +350,21 @@ class DocumentProcessor:
         status_text = st.empty()
         
         try:
-            # Etapa 1: Carregar documento
+            # Uploads are added to the shared collection, which no longer matches the manifest
+            invalidate_manifest()
+            chroma_db = self._open_vector_database()
+            
+            # Etapas 1-4: carregar, dividir e indexar em lotes, em fluxo contínuo
             status_text.text("🔄 Carregando documento...")
-            progress_bar.progress(25)
-            documents = self.document_loader.load_uploaded_file(user_file)
-
-            # Etapa 2: Extrair conteúdo
-            status_text.text("🔍 Extraindo conteúdo...")
-            progress_bar.progress(50)
+            self._stream_documents(
+                chroma_db,
+                self.document_loader.iter_uploaded_file(user_file),
+                "rag.ingest_upload",
+                file_info['filename'],
+                self._progress_reporter(progress_bar, status_text)
+            )
             st.success(f"✅ Conteúdo extraído com sucesso de {file_info['filename']}")
 
-            # Etapa 3: Dividir em partes
-            progress_bar.progress(75)
-            status_text.text("✂️ Dividindo em partes...")
-            doc_splits = self._create_document_chunks(documents)
-
-            # Etapa 4: Criar embeddings
-            progress_bar.progress(90)
-            status_text.text("🧠 Criando embeddings...")
-            chroma_db = self._create_vector_database(doc_splits)
-
             # Etapa 5: Concluído
             progress_bar.progress(100)
             status_text.text("✅ Processamento concluído!")
@@ -174,9 +375,10 @@ class DocumentProcessor:
             status_text.empty()
             
             # Store in session state
-            retriever = chroma_db.as_retriever()
+            retriever = self._create_retriever(chroma_db)
             st.session_state.processed_file = current_file_key
             st.session_state.retriever = retriever
+            st.session_state.index_version = new_index_version(current_file_key)
             
             # Debug: Confirm retriever creation and test it
             # Debug: Confirmar criação do retriever e testá-lo
@@ -197,33 +399,263 @@ class DocumentProcessor:
             status_text.empty()
             raise e
     
-    def _create_document_chunks(self, documents):
-        """Splits documents into smaller chunks"""
-        document_texts = [doc.page_content for doc in documents]
+    def _stream_documents(self, chroma_db, documents, span_name, source, progress_callback):
+        """
+        Loads, splits, deduplicates and indexes documents into an open collection
+        
+        Runs StreamingIngestionPipeline, so chunks are embedded in batches while
+        loading continues, then persists the BM25 index and writes the
+        duplicate locations found for chunks that were already indexed.
+        """
+        chunk_counter = itertools.count()
+        deduplicator = self._new_deduplicator()
+        
+        def split_document(document):
+            # Chunk ids keep counting across the whole input
+            doc_splits = self._create_document_chunks([document])
+            for split in doc_splits:
+                split.metadata["chunk_id"] = next(chunk_counter)
+                split.metadata.pop("total_chunks", None)
+            # Ids come before dedup, so duplicates found after indexing can be written by id
+            self._assign_chunk_uids(doc_splits)
+            if deduplicator is not None:
+                doc_splits = self._deduplicate(deduplicator, doc_splits)
+            return doc_splits
+        
+        def index_batch(doc_splits):
+            self._add_to_vector_database(chroma_db, doc_splits)
+            self._update_lexical_index(doc_splits, persist=False)
         
-        splitter = CharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=CHUNK_SIZE, 
-            chunk_overlap=CHUNK_OVERLAP
+        pipeline = StreamingIngestionPipeline(
+            split_fn=split_document,
+            index_fn=index_batch,
+            batch_size=INGESTION_BATCH_SIZE,
+            queue_size=INGESTION_QUEUE_SIZE
         )
-        doc_splits = splitter.create_documents(document_texts)
-        
-        # Add metadata
-        for i, split in enumerate(doc_splits):
-            original_doc_index = min(i, len(documents) - 1)
-            split.metadata.update(documents[original_doc_index].metadata)
-            split.metadata.update({
-                "chunk_id": i,
-                "total_chunks": len(doc_splits),
-                "chunk_size": len(split.page_content)
+        with span(span_name, **{"rag.source": source}) as ingest_span:
+            progress = pipeline.run(documents, progress_callback)
+            set_attributes(ingest_span, **{
+                "rag.documents.count": progress.documents_loaded,
+                "rag.chunks.count": progress.chunks_indexed,
+                "rag.batches.count": progress.batches_indexed,
+            })
+        self._save_lexical_index()
+        if deduplicator is not None:
+            self._update_duplicate_locations(deduplicator.pop_late_merges())
+            print(deduplicator.stats.summary())
+        self._log_embedding_stats()
+        print(f"Streaming ingestion: {progress.documents_loaded} documents, "
+              f"{progress.chunks_indexed} chunks in {progress.batches_indexed} batches "
+              f"({progress.elapsed_seconds:.2f}s)")
+        return progress
+    
+    def _progress_reporter(self, progress_bar, status_text):
+        """Progress callback that shows the pipeline counters under the progress bar"""
+        def update_progress(progress):
+            # Called on the script thread, so Streamlit updates are safe here
+            progress_bar.progress(int(progress.fraction * 100))
+            status_text.text(
+                f"📄 {progress.documents_loaded} partes carregadas"
+                f"{'' if progress.loading_done else '...'} · "
+                f"✂️ {progress.chunks_split} trechos divididos · "
+                f"🧠 {progress.chunks_indexed} trechos indexados"
+            )
+        return update_progress
+    
+    def _load_document(self, file_path):
+        """Loads a file from disk, tracing how many documents it produced"""
+        with span("rag.ingestion.load", **{"rag.source": str(file_path)}) as load_span:
+            documents = self.document_loader.load_document(file_path)
+            set_attributes(load_span, **{"rag.documents.count": len(documents)})
+        return documents
+    
+    def _create_document_chunks(self, documents):
+        """Splits documents into token-bounded chunks that keep their source metadata"""
+        with span("rag.ingestion.chunk", **{"rag.documents.count": len(documents)}) as chunk_span:
+            doc_splits = self.chunker.split_documents(documents)
+            set_attributes(chunk_span, **{
+                "rag.chunks.count": len(doc_splits),
+                "rag.chunks.tokens": sum(split.metadata.get("token_count", 0) for split in doc_splits),
             })
-        
         return doc_splits
     
-    def _create_vector_database(self, doc_splits):
-        """Creates a ChromaDB vector database from document chunks"""
-        return Chroma.from_documents(
-            documents=doc_splits, 
-            collection_name=CHROMA_COLLECTION_NAME, 
-            embedding=self.embedding_function,
-            persist_directory=CHROMA_PERSIST_DIR
+    def _deduplicate(self, deduplicator, doc_splits):
+        """Drops duplicate chunks, tracing how many were removed"""
+        with span("rag.ingestion.dedup", **{"rag.chunks.count": len(doc_splits)}) as dedup_span:
+            before = (deduplicator.stats.exact_duplicates, deduplicator.stats.near_duplicates)
+            kept = deduplicator.deduplicate(doc_splits)
+            set_attributes(dedup_span, **{
+                "rag.chunks.kept": len(kept),
+                "rag.dedup.exact_duplicates": deduplicator.stats.exact_duplicates - before[0],
+                "rag.dedup.near_duplicates": deduplicator.stats.near_duplicates - before[1],
+            })
+        return kept
+    
+    def _new_deduplicator(self):
+        """Creates the chunk deduplicator for one ingestion, or None when disabled"""
+        if not DEDUP_ENABLED:
+            return None
+        return ChunkDeduplicator(
+            threshold=DEDUP_SIMILARITY_THRESHOLD,
+            num_perm=DEDUP_NUM_PERM,
+            bands=DEDUP_BANDS
+        )
+    
+    def _update_duplicate_locations(self, late_merges):
+        """Writes the duplicate locations found for chunks that were already indexed"""
+        if not late_merges:
+            return
+        # Metadata-only update: chromadb merges the given keys and keeps the stored embeddings
+        self._collection().update(
+            ids=[chunk_uid for chunk_uid, _ in late_merges],
+            metadatas=[metadata for _, metadata in late_merges]
         )
+    
+    def _create_retriever(self, chroma_db):
+        """Creates the retriever for the configured RETRIEVAL_MODE"""
+        lexical_index = st.session_state.get('lexical_index')
+        if RETRIEVAL_MODE == "hybrid" and lexical_index is not None:
+            return HybridRetriever(
+                vectorstore=chroma_db,
+                lexical_index=lexical_index,
+                k=RETRIEVER_K,
+                fetch_k=HYBRID_FETCH_K,
+                rrf_k=RRF_K
+            )
+        return chroma_db.as_retriever(search_kwargs={"k": RETRIEVER_K})
+    
+    def _update_lexical_index(self, doc_splits, persist=True):
+        """Adds chunks to the BM25 index and persists it next to the collection"""
+        lexical_index = st.session_state.get('lexical_index') or BM25Index.load(self._lexical_index_path()) or BM25Index()
+        for split in doc_splits:
+            lexical_index.add(split.metadata[CHUNK_UID_KEY], split.page_content)
+        st.session_state.lexical_index = lexical_index
+        if persist:
+            self._save_lexical_index()
+        return lexical_index
+    
+    def _save_lexical_index(self):
+        """Persists the session BM25 index next to the collection"""
+        lexical_index = st.session_state.get('lexical_index')
+        if lexical_index is None:
+            return
+        lexical_index.save(self._lexical_index_path())
+        print(f"Lexical index saved: {len(lexical_index)} chunks, {len(lexical_index.postings)} terms")
+    
+    def _load_lexical_index(self, chroma_db):
+        """Loads the persisted BM25 index, rebuilding it from the collection if needed"""
+        lexical_index = BM25Index.load(self._lexical_index_path())
+        if lexical_index is None:
+            print("Persisted lexical index not found - rebuilding from the collection")
+            stored = chroma_db.get(include=["documents"])
+            lexical_index = BM25Index.from_texts(stored["documents"], ids=stored["ids"])
+            lexical_index.save(self._lexical_index_path())
+        st.session_state.lexical_index = lexical_index
+        return lexical_index
+    
+    def _lexical_index_path(self):
+        return os.path.join(CHROMA_PERSIST_DIR, BM25_INDEX_FILENAME)
+    
+    def _assign_chunk_uids(self, doc_splits):
+        """Gives every chunk a stable id shared by Chroma and the BM25 index"""
+        chunk_uids = []
+        for split in doc_splits:
+            metadata = split.metadata
+            identity = f"{metadata.get('source')}|{metadata.get('page')}|{metadata.get('chunk_id')}|{split.page_content}"
+            chunk_uid = hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+            metadata[CHUNK_UID_KEY] = chunk_uid
+            chunk_uids.append(chunk_uid)
+        return chunk_uids
+    
+    def _collection_metadata(self):
+        """Embedding settings stored on the collection, so vectors of different backends never mix"""
+        return {
+            "embedding_backend": self.embedding_backend,
+            "embedding_model": embedding_model_name(self.embedding_function),
+        }
+    
+    def _open_vector_database(self):
+        """
+        Opens (or creates) the persisted ChromaDB collection without adding documents
+        
+        A collection built with another embedding backend or model is dropped,
+        together with the manifests and the BM25 index that describe it.
+        """
+        chroma_db = self._chroma()
+        stored = self._collection().metadata or {}
+        expected = self._collection_metadata()
+        if any(stored.get(key) != value for key, value in expected.items()):
+            if chroma_db.get(limit=1)["ids"]:
+                print(f"Collection was built with {stored.get('embedding_backend')}/{stored.get('embedding_model')} "
+                      f"instead of {expected['embedding_backend']}/{expected['embedding_model']} - dropping it")
+            self._reset_vector_database()
+            chroma_db = self._chroma()
+        return chroma_db
+    
+    def _reset_vector_database(self):
+        """
+        Drops the persisted collection with the manifests and the BM25 index that describe it
+        
+        Goes through chromadb's client instead of deleting CHROMA_PERSIST_DIR:
+        chromadb keeps one client per path for the whole process, and a client
+        opened earlier would keep using the deleted database files.
+        """
+        try:
+            chromadb.PersistentClient(path=CHROMA_PERSIST_DIR).delete_collection(CHROMA_COLLECTION_NAME)
+        except ValueError:
+            # Nothing was indexed yet
+            pass
+        invalidate_manifest()
+        invalidate_directory_manifest()
+        if os.path.exists(self._lexical_index_path()):
+            os.remove(self._lexical_index_path())
+        st.session_state.lexical_index = None
+    
+    def _collection(self):
+        """The persisted collection, through chromadb's client API (for operations the wrapper lacks)"""
+        client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+        return client.get_collection(CHROMA_COLLECTION_NAME, embedding_function=None)
+    
+    def _chroma(self):
+        return Chroma(
+            collection_name=CHROMA_COLLECTION_NAME,
+            embedding_function=self.embedding_function,
+            persist_directory=CHROMA_PERSIST_DIR,
+            collection_metadata=self._collection_metadata()
+        )
+    
+    def _add_to_vector_database(self, chroma_db, doc_splits):
+        """Embeds chunks into an open collection and returns their ids"""
+        chunk_ids = self._assign_chunk_uids(doc_splits)
+        if doc_splits:
+            with self._index_span(doc_splits):
+                chroma_db.add_documents(doc_splits, ids=chunk_ids)
+        return chunk_ids
+    
+    @contextmanager
+    def _index_span(self, doc_splits):
+        """Traces one embed + upsert, with the embedding cache hits and misses it caused"""
+        cache = self.embedding_function if isinstance(self.embedding_function, CachedEmbeddings) else None
+        before = (cache.hits, cache.misses) if cache is not None else None
+        with span("rag.ingestion.index", **{"rag.chunks.count": len(doc_splits)}) as index_span:
+            yield
+            if before is not None:
+                set_attributes(index_span, **{
+                    "rag.embedding_cache.hits": cache.hits - before[0],
+                    "rag.embedding_cache.misses": cache.misses - before[1],
+                })
+    
+    def _log_embedding_stats(self):
+        """Prints embedding cache and scheduler counters"""
+        embedding_function = self.embedding_function
+        if isinstance(embedding_function, CachedEmbeddings):
+            stats = embedding_function.get_stats()
+            print(f"Embedding cache stats: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['entries']} entries, {stats['evictions']} evictions")
+            embedding_function = embedding_function.underlying
+        if isinstance(embedding_function, ScheduledEmbeddings):
+            stats = embedding_function.get_stats()
+            print(f"Embedding scheduler stats: {stats['chunks']} chunks in {stats['batches']} batches, "
+                  f"{stats['chunks_per_second']:.1f} chunks/s, {stats['tokens_per_second']:.0f} tokens/s, "
+                  f"{stats['retries']} retries ({stats['throttled']} throttled), "
+                  f"concurrency limit {stats['concurrency_limit']:.1f}")
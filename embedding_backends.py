@@ -0,0 +1,116 @@
+"""
+Embedding backends for the Advanced RAG application
+
+The embedding function used for ingestion and retrieval is chosen by name
+(EMBEDDING_BACKEND in config.py) from a small registry:
+
+- "openai": OpenAIEmbeddings, the production backend;
+- "hashing": HashingEmbeddings, a deterministic local embedder that hashes
+  word n-grams into a fixed number of dimensions with NumPy. It needs no
+  network access or model download, which makes it suitable for tests and
+  large offline benchmarks; its retrieval quality is roughly that of a
+  TF-weighted bag of n-grams.
+
+Other backends can be added with register_embedding_backend.
+"""
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import (
+    EMBEDDING_SCHEDULER_ENABLED, HASHING_EMBEDDING_DIMENSIONS, HASHING_EMBEDDING_NGRAM_RANGE
+)
+from lexical_index import tokenize
+
+
+@dataclass(frozen=True)
+class EmbeddingBackend:
+    """A named way to build an embedding function"""
+    name: str
+    factory: Callable[[], Embeddings]
+    remote: bool  # Remote backends go through the rate-limit-aware scheduler
+
+
+EMBEDDING_BACKENDS: Dict[str, EmbeddingBackend] = {}
+
+
+def register_embedding_backend(name: str, remote: bool = False):
+    """Decorator registering a zero-argument embedding factory under name"""
+    def decorator(factory: Callable[[], Embeddings]) -> Callable[[], Embeddings]:
+        EMBEDDING_BACKENDS[name] = EmbeddingBackend(name=name, factory=factory, remote=remote)
+        return factory
+    return decorator
+
+
+def get_embedding_backend(name: str) -> EmbeddingBackend:
+    """Look up a registered backend, failing with the list of known names"""
+    try:
+        return EMBEDDING_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding backend: {name!r} (available: {', '.join(sorted(EMBEDDING_BACKENDS))})"
+        ) from None
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic feature-hashing embedder
+
+    Each text is tokenized like the BM25 index, its word n-grams are hashed
+    (CRC32, stable across processes) to a dimension and a sign, counts are
+    log-scaled and the vector is L2-normalized, so cosine similarity behaves
+    like a TF-weighted n-gram overlap.
+    """
+
+    def __init__(self, dimensions: int = 1024, ngram_range: Tuple[int, int] = (1, 2)):
+        self.dimensions = dimensions
+        self.ngram_range = tuple(ngram_range)
+        self.model = f"hashing-{dimensions}d-{self.ngram_range[0]}-{self.ngram_range[1]}gram"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one vectorized pass"""
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(zlib.crc32(feature.encode("utf-8")) for feature in features)
+
+        hashes = np.asarray(hashes, dtype=np.uint32)
+        columns = (hashes >> 1) % self.dimensions
+        signs = np.where(hashes & 1, 1.0, -1.0).astype(np.float32)
+
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.int64), columns), signs)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return matrix.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _features(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        low, high = self.ngram_range
+        return [
+            " ".join(tokens[i:i + n])
+            for n in range(low, high + 1)
+            for i in range(len(tokens) - n + 1)
+        ]
+
+
+@register_embedding_backend("openai", remote=True)
+def _openai_embeddings() -> Embeddings:
+    from langchain_openai import OpenAIEmbeddings
+
+    # The scheduler handles 429s itself, so the client must not hide them behind its own retries
+    return OpenAIEmbeddings(max_retries=0) if EMBEDDING_SCHEDULER_ENABLED else OpenAIEmbeddings()
+
+
+@register_embedding_backend("hashing")
+def _hashing_embeddings() -> Embeddings:
+    return HashingEmbeddings(dimensions=HASHING_EMBEDDING_DIMENSIONS, ngram_range=HASHING_EMBEDDING_NGRAM_RANGE)
@@ -0,0 +1,163 @@
+"""
+Persistent embedding cache for the Advanced RAG application
+
+Embedding every chunk through a remote provider is the slowest and most
+expensive step when a document is (re)indexed. This module wraps any
+LangChain ``Embeddings`` implementation with a content-addressed on-disk cache
+so that only chunks that have never been embedded before reach the provider.
+
+Cache entries are keyed by a SHA-256 hash of the embedding model name and the
+chunk text, stored in a small SQLite database, and evicted least-recently-used
+first once the configured number of entries is exceeded.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+def embedding_model_name(embeddings) -> str:
+    """Best-effort name of the model behind an embedding function"""
+    for attribute in ("model_name", "model"):
+        value = getattr(embeddings, attribute, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(embeddings).__name__
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """Content-addressed cache key for a (model, text) pair"""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves previously computed vectors from disk
+
+    Works with any embedding function passed in: the wrapped object only needs
+    ``embed_documents`` and ``embed_query``. Only document embeddings are
+    cached; queries go straight to the wrapped object. Hit and miss counters
+    are kept for the lifetime of the instance and can be read with ``get_stats``.
+    """
+
+    def __init__(self, underlying: Embeddings, cache_dir: str,
+                 max_entries: Optional[int] = None, model_name: Optional[str] = None):
+        self.underlying = underlying
+        self.model_name = model_name or embedding_model_name(underlying)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "embeddings.sqlite3")
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._connection.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, calling the underlying model only for unseen texts"""
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        cached = self._lookup(keys)
+
+        # Embed each distinct missing text once, even if it repeats in the batch
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        hit_count = sum(1 for key in keys if key in cached)
+        self.hits += hit_count
+        self.misses += len(texts) - hit_count
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new_entries = dict(zip(missing.keys(), vectors))
+            self._store(new_entries)
+            cached.update(new_entries)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query without caching it, so queries never evict or count as chunk vectors"""
+        return self.underlying.embed_query(text)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of cached entries"""
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
+
+    def clear(self):
+        """Remove every cached embedding"""
+        with self._lock:
+            self._connection.execute("DELETE FROM embeddings")
+            self._connection.commit()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for the given keys and refresh their access time"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = json.loads(vector)
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._connection.commit()
+        return found
+
+    def _store(self, entries: Dict[str, List[float]]):
+        """Persist new vectors and evict the least recently used overflow"""
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, json.dumps(vector), now) for key, vector in entries.items()],
+            )
+            if self.max_entries is not None:
+                total = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                overflow = total - self.max_entries
+                if overflow > 0:
+                    self._connection.execute(
+                        """DELETE FROM embeddings WHERE key IN (
+                            SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?
+                        )""",
+                        (overflow,),
+                    )
+                    self.evictions += overflow
+            self._connection.commit()
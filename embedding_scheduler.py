@@ -0,0 +1,224 @@
+"""
+Rate-limit-aware embedding scheduler for the Advanced RAG application
+
+Handing every chunk of an upload to the provider in one go either produces
+oversized requests or, with several uploads in flight, a burst that runs into
+the provider's rate limits and stalls. ScheduledEmbeddings wraps any LangChain
+``Embeddings`` implementation and:
+
+- packs texts into batches bounded by a token budget and a text count;
+- sends several batches concurrently;
+- adapts the concurrency to throttling (additive increase on success,
+  multiplicative decrease on HTTP 429), pausing every worker for the
+  Retry-After delay or an exponential backoff;
+- retries throttled and transient failures with jittered exponential backoff.
+
+Throughput counters (chunks/s, tokens/s, retries, throttles) are available
+through get_stats.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from chunking import get_encoder
+from embedding_cache import embedding_model_name
+
+# Exception class names of transient provider/network failures worth retrying
+_TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailableError"}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether the provider rejected the request because of throttling"""
+    return _status_code(error) == 429 or "RateLimit" in type(error).__name__
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether the request may succeed if simply retried"""
+    status_code = _status_code(error)
+    return (status_code is not None and status_code >= 500) or type(error).__name__ in _TRANSIENT_ERRORS
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-After delay suggested by the provider, in seconds"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit shared by the embedding workers
+
+    Each success raises the limit by about one slot per window of requests;
+    each throttled request halves it and pauses new requests for a while.
+    """
+
+    def __init__(self, max_concurrency: int, min_concurrency: int = 1):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, throttled: bool = False, pause_seconds: float = 0.0):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.paused_until = max(self.paused_until, time.monotonic() + pause_seconds)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Embeddings wrapper that batches, parallelizes and throttles provider calls"""
+
+    def __init__(self, underlying: Embeddings, max_batch_tokens: int = 50_000,
+                 max_batch_texts: int = 512, max_concurrency: int = 4,
+                 max_retries: int = 6, backoff_seconds: float = 1.0,
+                 max_backoff_seconds: float = 60.0, encoding_name: str = "cl100k_base",
+                 token_counter: Optional[Callable[[List[str]], List[int]]] = None):
+        """
+        Args:
+            underlying: Embedding function that actually calls the provider
+            max_batch_tokens: Token budget of one request (a longer text is sent alone)
+            max_batch_texts: Maximum number of texts per request
+            max_concurrency: Upper bound of concurrent requests
+            max_retries: Retries per batch before the error is raised
+            backoff_seconds: Base delay of the exponential backoff
+            max_backoff_seconds: Cap of a single backoff delay
+            encoding_name: tiktoken encoding used to count tokens
+            token_counter: Counts the tokens of a list of texts (defaults to tiktoken)
+        """
+        self.underlying = underlying
+        self.model_name = embedding_model_name(underlying)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_texts = max_batch_texts
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.encoding_name = encoding_name
+        self.token_counter = token_counter or self._count_tokens
+        self.limiter = AdaptiveConcurrencyLimiter(max_concurrency)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "chunks": 0,
+            "tokens": 0,
+            "batches": 0,
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "elapsed_seconds": 0.0,
+        }
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in token-budgeted batches sent concurrently"""
+        if not texts:
+            return []
+        start_time = time.monotonic()
+        token_counts = self.token_counter(texts)
+        batches = self._make_batches(token_counts)
+
+        if len(batches) == 1:
+            results = [self._embed_batch(texts, batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches)),
+                                    thread_name_prefix="embedding") as executor:
+                results = list(executor.map(lambda batch: self._embed_batch(texts, batch), batches))
+
+        with self._stats_lock:
+            self._stats["chunks"] += len(texts)
+            self._stats["tokens"] += sum(token_counts)
+            self._stats["batches"] += len(batches)
+            self._stats["elapsed_seconds"] += time.monotonic() - start_time
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, with the same throttling and retries as documents"""
+        return self._call_with_retries(lambda: self.underlying.embed_query(text))
+
+    def get_stats(self) -> Dict[str, float]:
+        """Counters since creation, plus throughput and the current concurrency limit"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        elapsed = stats["elapsed_seconds"]
+        stats["chunks_per_second"] = stats["chunks"] / elapsed if elapsed else 0.0
+        stats["tokens_per_second"] = stats["tokens"] / elapsed if elapsed else 0.0
+        stats["concurrency_limit"] = self.limiter.limit
+        return stats
+
+    def _make_batches(self, token_counts: List[int]) -> List[range]:
+        """Greedy packing of consecutive texts, keeping the input order"""
+        batches = []
+        start, batch_tokens = 0, 0
+        for i, tokens in enumerate(token_counts):
+            batch_full = i - start >= self.max_batch_texts or batch_tokens + tokens > self.max_batch_tokens
+            if i > start and batch_full:
+                batches.append(range(start, i))
+                start, batch_tokens = i, 0
+            batch_tokens += tokens
+        batches.append(range(start, len(token_counts)))
+        return batches
+
+    def _embed_batch(self, texts: List[str], batch: range) -> List[List[float]]:
+        batch_texts = [texts[i] for i in batch]
+        return self._call_with_retries(lambda: self.underlying.embed_documents(batch_texts))
+
+    def _call_with_retries(self, call):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            with self._stats_lock:
+                self._stats["requests"] += 1
+            try:
+                result = call()
+            except Exception as e:
+                throttled = is_rate_limit_error(e)
+                delay = self._backoff(attempt, e if throttled else None)
+                self.limiter.release(throttled=throttled, pause_seconds=delay)
+                if not (throttled or is_transient_error(e)) or attempt == self.max_retries:
+                    raise
+                with self._stats_lock:
+                    self._stats["retries"] += 1
+                    self._stats["throttled"] += int(throttled)
+                print(f"Embedding request failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s "
+                      f"(concurrency limit {self.limiter.limit:.1f})")
+                time.sleep(delay)
+            else:
+                self.limiter.release()
+                return result
+
+    def _backoff(self, attempt: int, rate_limit_error: Optional[Exception] = None) -> float:
+        retry_after = _retry_after(rate_limit_error) if rate_limit_error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff_seconds)
+        delay = self.backoff_seconds * 2 ** attempt
+        return min(delay + random.uniform(0, self.backoff_seconds), self.max_backoff_seconds)
+
+    def _count_tokens(self, texts: List[str]) -> List[int]:
+        return [len(tokens) for tokens in get_encoder(self.encoding_name).encode_ordinary_batch(texts)]
@@ -0,0 +1,63 @@
+"""
+Hybrid retrieval for the Advanced RAG application
+
+Dense retrieval alone misses exact terms that matter in our corpus, such as
+formula names, author names ("Thornthwaite") or station codes. The
+HybridRetriever combines ChromaDB similarity search with the BM25 index built
+from the same chunks and merges both rankings with reciprocal rank fusion
+(RRF), which only depends on ranks and therefore needs no score calibration.
+
+It is a regular LangChain retriever, so it can be passed straight to
+RAGWorkflow.set_retriever.
+"""
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Metadata key holding the Chroma id of each chunk
+CHUNK_UID_KEY = "chunk_uid"
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = 60) -> List[str]:
+    """Fuse several ranked id lists; ties keep first-seen order"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """Vector + BM25 retriever fused with reciprocal rank fusion"""
+
+    vectorstore: Any
+    lexical_index: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents_by_id: Dict[str, Document] = {}
+
+        dense_ranking = []
+        for document in self.vectorstore.similarity_search(query, k=self.fetch_k):
+            doc_id = document.metadata.get(CHUNK_UID_KEY) or document.id or document.page_content
+            documents_by_id.setdefault(doc_id, document)
+            dense_ranking.append(doc_id)
+
+        lexical_ranking = [doc_id for doc_id, _ in self.lexical_index.search(query, k=self.fetch_k)]
+
+        fused = reciprocal_rank_fusion([dense_ranking, lexical_ranking], rrf_k=self.rrf_k)[:self.k]
+
+        # Chunks only found by BM25 still have to be fetched from Chroma
+        missing = [doc_id for doc_id in fused if doc_id not in documents_by_id]
+        if missing:
+            stored = self.vectorstore.get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                documents_by_id[doc_id] = Document(id=doc_id, page_content=text, metadata=metadata or {})
+
+        return [documents_by_id[doc_id] for doc_id in fused if doc_id in documents_by_id]
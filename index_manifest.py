@@ -0,0 +1,157 @@
+"""
+Index manifest for the persisted ChromaDB collection
+
+Chroma already persists the collection to disk, so rebuilding it on every
+startup only makes sense when something that affects the index has changed.
+The manifest stored next to the collection records the source file
+fingerprint (size, mtime, content hash), the chunking settings and the
+embedding backend and model. When all of them match, the collection can simply be reopened.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_ENCODING, CHROMA_COLLECTION_NAME, CHROMA_PERSIST_DIR
+
+MANIFEST_FILENAME = "index_manifest.json"
+
+
+def get_manifest_path(persist_dir: str = CHROMA_PERSIST_DIR) -> str:
+    """Location of the manifest inside the Chroma directory"""
+    return os.path.join(persist_dir, MANIFEST_FILENAME)
+
+
+def compute_file_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in blocks to keep memory flat"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_file(file_path: str, include_hash: bool = True) -> Dict[str, Any]:
+    """Size, modification time and (optionally) content hash of a source file"""
+    stat = os.stat(file_path)
+    fingerprint = {
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+    if include_hash:
+        fingerprint["sha256"] = compute_file_hash(file_path)
+    return fingerprint
+
+
+def build_manifest(file_path: str, embedding_model: str, embedding_backend: str) -> Dict[str, Any]:
+    """Describe the index that is about to be built from file_path"""
+    return {
+        "source": fingerprint_file(file_path),
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "chunk_encoding": CHUNK_ENCODING,
+        "embedding_backend": embedding_backend,
+        "embedding_model": embedding_model,
+        "collection_name": CHROMA_COLLECTION_NAME,
+        "created_at": time.time(),
+    }
+
+
+def get_index_version(manifest: Dict[str, Any]) -> str:
+    """
+    Stable identifier of the indexed corpus described by a manifest
+
+    The mtime is left out so that refreshing it does not invalidate anything
+    keyed by the version, while a rebuild (new created_at) always does.
+    """
+    source = manifest.get("source", {})
+    identity = {
+        "sha256": source.get("sha256"),
+        "chunk_size": manifest.get("chunk_size"),
+        "chunk_overlap": manifest.get("chunk_overlap"),
+        "chunk_encoding": manifest.get("chunk_encoding"),
+        "embedding_backend": manifest.get("embedding_backend"),
+        "embedding_model": manifest.get("embedding_model"),
+        "collection_name": manifest.get("collection_name"),
+        "created_at": manifest.get("created_at"),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def new_index_version(source_key: str) -> str:
+    """Fresh corpus version for an index built without a manifest (e.g. uploads)"""
+    return hashlib.sha256(f"{source_key}:{time.time()}".encode("utf-8")).hexdigest()[:16]
+
+
+def load_manifest(persist_dir: str = CHROMA_PERSIST_DIR) -> Optional[Dict[str, Any]]:
+    """Read the manifest, returning None if it is missing or unreadable"""
+    try:
+        with open(get_manifest_path(persist_dir), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(manifest: Dict[str, Any], persist_dir: str = CHROMA_PERSIST_DIR):
+    """Write the manifest atomically next to the collection"""
+    os.makedirs(persist_dir, exist_ok=True)
+    manifest_path = get_manifest_path(persist_dir)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def invalidate_manifest(persist_dir: str = CHROMA_PERSIST_DIR):
+    """Drop the manifest so the next startup rebuilds the collection"""
+    try:
+        os.remove(get_manifest_path(persist_dir))
+    except FileNotFoundError:
+        pass
+
+
+def manifest_matches(file_path: str, embedding_model: str, embedding_backend: str,
+                     persist_dir: str = CHROMA_PERSIST_DIR) -> bool:
+    """
+    Check whether the persisted collection was built from this exact input
+
+    Size and settings are compared first. The content hash is only computed
+    when the modification time differs, so an untouched file is verified
+    without reading it.
+    """
+    manifest = load_manifest(persist_dir)
+    if manifest is None or not os.path.exists(file_path):
+        return False
+
+    expected_settings = {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "chunk_encoding": CHUNK_ENCODING,
+        "embedding_backend": embedding_backend,
+        "embedding_model": embedding_model,
+        "collection_name": CHROMA_COLLECTION_NAME,
+    }
+    for key, value in expected_settings.items():
+        if manifest.get(key) != value:
+            print(f"Index manifest mismatch on '{key}': {manifest.get(key)!r} != {value!r}")
+            return False
+
+    source = manifest.get("source", {})
+    current = fingerprint_file(file_path, include_hash=False)
+    if source.get("path") != current["path"] or source.get("size") != current["size"]:
+        print("Index manifest mismatch on source path or size")
+        return False
+
+    if source.get("mtime") == current["mtime"]:
+        return True
+
+    if source.get("sha256") == compute_file_hash(file_path):
+        # Same content with a new mtime (e.g. a fresh checkout): refresh the manifest
+        manifest["source"]["mtime"] = current["mtime"]
+        save_manifest(manifest, persist_dir)
+        return True
+
+    print("Index manifest mismatch on source content hash")
+    return False
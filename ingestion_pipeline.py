@@ -0,0 +1,169 @@
+"""
+Streaming ingestion pipeline for the Advanced RAG application
+
+Instead of materializing every loaded document, then every chunk, and
+handing them all to Chroma at once, the pipeline streams documents through
+three stages connected by bounded queues:
+
+    load (thread) -> split (thread) -> embed + upsert (caller's thread)
+
+Chunks are indexed in fixed-size batches. When indexing falls behind, the
+bounded queues block the upstream stages (backpressure), so peak memory is
+bounded by the queue sizes rather than by the size of the upload.
+
+The indexing stage runs on the calling thread, which keeps Streamlit progress
+updates (which must happen on the script thread) safe.
+"""
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+# Marks the end of a stage's output
+_END = object()
+
+
+@dataclass
+class IngestionProgress:
+    """Per-stage counters, updated while the pipeline runs"""
+    documents_loaded: int = 0
+    chunks_split: int = 0
+    chunks_indexed: int = 0
+    batches_indexed: int = 0
+    loading_done: bool = False
+    splitting_done: bool = False
+    elapsed_seconds: float = 0.0
+
+    @property
+    def fraction(self) -> float:
+        """Share of the known work that is done (exact once splitting has finished)"""
+        if self.chunks_split == 0:
+            return 0.0
+        fraction = self.chunks_indexed / self.chunks_split
+        return fraction if self.splitting_done else min(fraction, 0.95)
+
+
+class StreamingIngestionPipeline:
+    """Load -> split -> batch index pipeline with bounded queues"""
+
+    def __init__(self, split_fn: Callable[[Document], List[Document]],
+                 index_fn: Callable[[List[Document]], None],
+                 batch_size: int = 64, queue_size: int = 4):
+        """
+        Args:
+            split_fn: Splits one loaded document into chunks
+            index_fn: Embeds and upserts one batch of chunks
+            batch_size: Number of chunks per index_fn call
+            queue_size: Capacity of each inter-stage queue
+        """
+        self.split_fn = split_fn
+        self.index_fn = index_fn
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def run(self, documents: Iterable[Document],
+            progress_callback: Optional[Callable[[IngestionProgress], None]] = None) -> IngestionProgress:
+        """
+        Stream documents through the pipeline
+
+        progress_callback is called from the calling thread after each batch
+        and periodically while waiting for upstream stages.
+        """
+        progress = IngestionProgress()
+        document_queue = queue.Queue(maxsize=self.queue_size)
+        batch_queue = queue.Queue(maxsize=self.queue_size)
+        stop_event = threading.Event()
+        errors = []
+        start_time = time.time()
+
+        def put(target_queue, item):
+            # Wait for space, but give up if another stage failed
+            while not stop_event.is_set():
+                try:
+                    target_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def load_stage():
+            try:
+                for document in documents:
+                    if not put(document_queue, document):
+                        return
+                    progress.documents_loaded += 1
+            except Exception as e:
+                errors.append(e)
+                stop_event.set()
+            finally:
+                progress.loading_done = True
+                put(document_queue, _END)
+
+        def split_stage():
+            batch = []
+            try:
+                while not stop_event.is_set():
+                    try:
+                        document = document_queue.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if document is _END:
+                        break
+                    for chunk in self.split_fn(document):
+                        batch.append(chunk)
+                        progress.chunks_split += 1
+                        if len(batch) >= self.batch_size:
+                            if not put(batch_queue, batch):
+                                return
+                            batch = []
+                if batch:
+                    put(batch_queue, batch)
+            except Exception as e:
+                errors.append(e)
+                stop_event.set()
+            finally:
+                progress.splitting_done = True
+                put(batch_queue, _END)
+
+        # Each stage runs in a copy of the caller's context, so tracing spans keep their parent
+        workers = [
+            threading.Thread(target=contextvars.copy_context().run, args=(load_stage,), name="ingestion-load", daemon=True),
+            threading.Thread(target=contextvars.copy_context().run, args=(split_stage,), name="ingestion-split", daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            while not stop_event.is_set():
+                try:
+                    batch = batch_queue.get(timeout=0.2)
+                except queue.Empty:
+                    self._report(progress, start_time, progress_callback)
+                    continue
+                if batch is _END:
+                    break
+                self.index_fn(batch)
+                progress.chunks_indexed += len(batch)
+                progress.batches_indexed += 1
+                self._report(progress, start_time, progress_callback)
+        except Exception:
+            stop_event.set()
+            raise
+        finally:
+            for worker in workers:
+                worker.join(timeout=5)
+
+        if errors:
+            raise errors[0]
+
+        self._report(progress, start_time, progress_callback)
+        return progress
+
+    def _report(self, progress, start_time, progress_callback):
+        progress.elapsed_seconds = time.time() - start_time
+        if progress_callback is not None:
+            progress_callback(progress)
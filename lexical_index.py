@@ -0,0 +1,172 @@
+"""
+Lexical (BM25) index over the chunk store
+
+A small inverted index built from the same chunks that are embedded into
+ChromaDB. It provides cheap local relevance scores, which the RAG workflow
+uses to reject chunks that share almost no vocabulary with the question
+before paying for an LLM grading call, and keyword search for the hybrid
+retriever. The index is persisted as JSON next to the Chroma collection.
+"""
+import heapq
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Very common Portuguese and English words carry no topical signal
+STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "ela", "ele",
+    "em", "entre", "era", "essa", "esse", "esta", "este", "eu", "foi", "ha", "isso", "isto",
+    "ja", "mais", "mas", "me", "mesmo", "na", "nas", "nao", "no", "nos", "o", "os", "ou",
+    "para", "pela", "pelo", "por", "qual", "quais", "quando", "que", "quem", "se", "ser",
+    "seu", "sua", "sao", "sobre", "tambem", "tem", "um", "uma", "umas", "uns",
+    "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of",
+    "on", "or", "that", "the", "this", "to", "was", "what", "when", "which", "who", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-free word tokens without stopwords"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [token for token in re.findall(r"\w+", text) if len(token) > 1 and token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Inverted BM25 index keyed by chunk id
+
+    Chunks can be added and removed incrementally. Scores can be computed for
+    indexed chunks or for any external text, using the corpus statistics.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], ids: Optional[Iterable[str]] = None, **kwargs) -> "BM25Index":
+        """Build an index from chunk texts (ids default to their position)"""
+        index = cls(**kwargs)
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [str(i) for i in range(len(texts))]
+        for doc_id, text in zip(ids, texts):
+            index.add(doc_id, text)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    def add(self, doc_id: str, text: str):
+        """Index a chunk, replacing any previous version with the same id"""
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        term_freqs = Counter(tokenize(text))
+        for term, freq in term_freqs.items():
+            self.postings.setdefault(term, {})[doc_id] = freq
+        length = sum(term_freqs.values())
+        self.doc_lengths[doc_id] = length
+        self.doc_terms[doc_id] = list(term_freqs)
+        self.total_length += length
+
+    def remove(self, doc_id: str):
+        """Drop a chunk from the index"""
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id, []):
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency (always positive)"""
+        doc_freq = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_lengths) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def known_terms(self, query: str) -> List[str]:
+        """Distinct query terms that occur somewhere in the corpus"""
+        return [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+
+    def score_text(self, query: str, text: str) -> float:
+        """BM25 score of an arbitrary text against the query"""
+        term_freqs = Counter(tokenize(text))
+        length = sum(term_freqs.values())
+        return sum(
+            self._term_score(term, term_freqs.get(term, 0), length)
+            for term in dict.fromkeys(tokenize(query))
+        )
+
+    def normalized_score(self, query: str, text: str) -> Optional[float]:
+        """
+        Score scaled to [0, 1) by the best score any text could reach
+
+        Returns None when no query term is known to the corpus, since nothing
+        can be concluded lexically in that case.
+        """
+        terms = self.known_terms(query)
+        if not terms:
+            return None
+        upper_bound = sum(self.idf(term) * (self.k1 + 1) for term in terms)
+        return self.score_text(" ".join(terms), text) / upper_bound
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """Top-k (chunk id, score) pairs, visiting only postings of query terms"""
+        scores: Dict[str, float] = {}
+        for term in dict.fromkeys(tokenize(query)):
+            for doc_id, freq in self.postings.get(term, {}).items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + self._term_score(term, freq, self.doc_lengths[doc_id])
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self, path: str):
+        """Persist the index as JSON (written atomically)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths,
+            }, file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """Load a persisted index, returning None if it is missing or unreadable"""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.total_length = sum(index.doc_lengths.values())
+        index.doc_terms = {doc_id: [] for doc_id in index.doc_lengths}
+        for term, docs in index.postings.items():
+            for doc_id in docs:
+                index.doc_terms[doc_id].append(term)
+        return index
+
+    def _term_score(self, term: str, freq: int, length: int) -> float:
+        if freq == 0:
+            return 0.0
+        average_length = self.average_length or 1.0
+        saturation = freq * (self.k1 + 1) / (
+            freq + self.k1 * (1 - self.b + self.b * length / average_length)
+        )
+        return self.idf(term) * saturation
@@ -0,0 +1,309 @@
+"""
+Local OpenAI-compatible stub server for load tests
+
+Serves the endpoints the RAG application uses, with configurable latency,
+jitter and failure rates, so that the real chains in chains/ can be driven
+at high concurrency without network access or API costs:
+
+- POST /v1/chat/completions: plain text answers (optionally streamed as
+  server-sent events), or a tool call when the request forces a function,
+  which is how with_structured_output asks for grader results (a JSON
+  response_format is answered the same way). Arguments are filled in from
+  the JSON schema; "yes"/true verdicts are returned with probability
+  grade_yes_rate.
+- POST /v1/embeddings: deterministic unit vectors derived from the text.
+
+Requests are counted so that callers can compute LLM calls per question.
+
+Run standalone with:
+    python loadtest/fake_openai_server.py --port 8765 --latency-ms 400 --jitter-ms 150
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+import numpy as np
+from aiohttp import web
+
+
+@dataclass
+class FakeServerConfig:
+    """Simulated provider behaviour"""
+    latency_ms: float = 300.0  # Mean time to answer a request
+    jitter_ms: float = 100.0  # Uniform +/- variation of the latency
+    error_rate: float = 0.0  # Share of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # Share of requests answered with HTTP 429
+    grade_yes_rate: float = 1.0  # Probability of a positive grader verdict
+    completion_words: int = 120  # Length of generated answers
+    embedding_dimensions: int = 256
+    seed: int = 0
+
+
+@dataclass
+class FakeServerStats:
+    """Request counters, readable while the server runs"""
+    chat_requests: int = 0
+    tool_call_requests: int = 0
+    embedding_requests: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    by_tool: Dict[str, int] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.__dict__, "by_tool": dict(self.by_tool)}
+
+
+def _approximate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAIServer:
+    """aiohttp application implementing the stubbed endpoints"""
+
+    def __init__(self, config: FakeServerConfig = None):
+        self.config = config or FakeServerConfig()
+        self.stats = FakeServerStats()
+        self._random = random.Random(self.config.seed)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_post("/v1/embeddings", self.embeddings)
+        return app
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats.chat_requests += 1
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+
+        prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", []))
+        prompt_tokens = _approximate_tokens(prompt)
+        tool = self._forced_tool(body)
+
+        if tool is not None:
+            self.stats.tool_call_requests += 1
+            self.stats.by_tool[tool["name"]] = self.stats.by_tool.get(tool["name"], 0) + 1
+            arguments = json.dumps(self._fill_schema(tool.get("parameters", {})), ensure_ascii=False)
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": tool["name"], "arguments": arguments},
+                }],
+            }
+            completion_tokens = _approximate_tokens(arguments)
+            finish_reason = "tool_calls"
+        elif (body.get("response_format") or {}).get("type") == "json_schema":
+            # Structured output requested through response_format instead of a tool
+            json_schema = body["response_format"].get("json_schema", {})
+            text = json.dumps(self._fill_schema(json_schema.get("schema", {})), ensure_ascii=False)
+            message = {"role": "assistant", "content": text}
+            completion_tokens = _approximate_tokens(text)
+            finish_reason = "stop"
+        else:
+            text = self._answer_text()
+            message = {"role": "assistant", "content": text}
+            completion_tokens = _approximate_tokens(text)
+            finish_reason = "stop"
+
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        if body.get("stream") and finish_reason == "stop":
+            return await self._stream_text(request, body, message["content"], usage)
+
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+            "usage": usage,
+        })
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.stats.embedding_requests += 1
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = []
+        for index, text in enumerate(inputs):
+            rng = np.random.default_rng(zlib.crc32(str(text).encode("utf-8")))
+            vector = rng.standard_normal(self.config.embedding_dimensions)
+            data.append({"object": "embedding", "index": index, "embedding": (vector / np.linalg.norm(vector)).tolist()})
+        tokens = sum(_approximate_tokens(str(text)) for text in inputs)
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake-embedding-model"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    async def _simulate(self):
+        """Sleep for the simulated latency; return an error response if this request should fail"""
+        config = self.config
+        latency = config.latency_ms + self._random.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(0.0, latency) / 1000)
+
+        draw = self._random.random()
+        if draw < config.rate_limit_rate:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached (simulated)", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429, headers={"retry-after": "1"}
+            )
+        if draw < config.rate_limit_rate + config.error_rate:
+            self.stats.errors += 1
+            return web.json_response(
+                {"error": {"message": "Internal error (simulated)", "type": "server_error", "code": None}},
+                status=500
+            )
+        return None
+
+    def _forced_tool(self, body):
+        """The function definition a request forces, if any"""
+        tools = body.get("tools") or []
+        tool_choice = body.get("tool_choice")
+        if not tools or tool_choice in (None, "none"):
+            return None
+        if isinstance(tool_choice, dict):
+            name = tool_choice.get("function", {}).get("name")
+            for tool in tools:
+                if tool.get("function", {}).get("name") == name:
+                    return tool["function"]
+        return tools[0].get("function")
+
+    def _fill_schema(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Plausible arguments for a function's JSON schema"""
+        verdict = self._random.random() < self.config.grade_yes_rate
+        arguments = {}
+        for name, spec in schema.get("properties", {}).items():
+            kind = spec.get("type")
+            if kind == "boolean":
+                arguments[name] = verdict
+            elif kind in ("number", "integer"):
+                low, high = spec.get("minimum", 0.0), spec.get("maximum", 1.0)
+                value = low + (high - low) * (0.8 if verdict else 0.2)
+                arguments[name] = int(value) if kind == "integer" else round(value, 2)
+            elif kind == "array":
+                arguments[name] = []
+            elif kind == "object":
+                arguments[name] = self._fill_schema(spec)
+            elif name == "score":
+                arguments[name] = "yes" if verdict else "no"
+            else:
+                arguments[name] = "simulado"
+        return arguments
+
+    def _answer_text(self) -> str:
+        words = ["Resposta", "simulada", "com", "base", "nos", "documentos", "fornecidos"]
+        return " ".join(words[i % len(words)] for i in range(self.config.completion_words)) + "."
+
+    async def _stream_text(self, request, body, text, usage):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def event(delta, finish_reason=None, include_usage=False):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake-model"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+            }
+            if include_usage:
+                chunk["choices"] = []
+                chunk["usage"] = usage
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        await response.write(event({"role": "assistant", "content": ""}))
+        for word in text.split(" "):
+            await response.write(event({"content": word + " "}))
+            await asyncio.sleep(0.002)
+        await response.write(event({}, finish_reason="stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await response.write(event({}, include_usage=True))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+class BackgroundServer:
+    """Runs a FakeOpenAIServer on its own event loop thread"""
+
+    def __init__(self, server: FakeOpenAIServer, host: str = "127.0.0.1", port: int = 8765):
+        self.server = server
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fake-openai-server", daemon=True)
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.server.create_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--grade-yes-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(FakeServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        grade_yes_rate=args.grade_yes_rate,
+    ))
+    print(f"Fake OpenAI server on http://{args.host}:{args.port}/v1")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+End-to-end load test of the RAG workflow against a fake OpenAI server
+
+Starts the stub server from fake_openai_server.py, points the chains in
+chains/ at it (OPENAI_BASE_URL / OPENAI_API_BASE are set before they are
+imported) and drives N simulated concurrent sessions through
+RAGWorkflow.aprocess_question. Each session asks its questions one after the
+other, like a user waiting for each answer.
+
+For every concurrency level it reports p50/p95/p99 latency, throughput and
+LLM calls per question (counted by the server, by grader), so the level at
+which latency collapses can be found before production does.
+
+Retrieval runs locally over a synthetic corpus embedded with the hashing
+backend. Every question is unique and no index_version is set, so the answer
+cache never hides LLM calls. Graders can still repeat across questions (e.g.
+the same answer checked against the same chunks), so the grader cache is
+disabled unless --grader-cache is given. Grader cache hits per question are
+reported next to the LLM calls either way.
+
+Usage:
+    python loadtest/run_load_test.py --sessions 1 4 16 64 --questions-per-session 5
+    python loadtest/run_load_test.py --sessions 16 --check-mode combined
+    python loadtest/run_load_test.py --sessions 16 --grader-cache
+    python loadtest/run_load_test.py --sessions 32 --latency-ms 800 --jitter-ms 400 \\
+        --error-rate 0.02 --rate-limit-rate 0.05 --grade-yes-rate 0.7 --output loadtest.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Add the repository root and this directory to path for imports
+sys.path.append(str(REPO_ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from fake_openai_server import BackgroundServer, FakeOpenAIServer, FakeServerConfig
+
+
+class SessionState(dict):
+    """Stand-in for st.session_state outside a Streamlit run"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def build_retriever(pages, seed):
+    """Local retriever over synthetic pages, embedded with the hashing backend"""
+    from langchain_core.documents import Document
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    from benchmarks.corpus import synthetic_pages
+    from config import RETRIEVER_K
+    from embedding_backends import get_embedding_backend
+
+    vectorstore = InMemoryVectorStore(get_embedding_backend("hashing").factory())
+    vectorstore.add_documents([
+        Document(page_content=text, metadata={"source": "synthetic", "page": page})
+        for page, text in enumerate(synthetic_pages(pages, seed))
+    ])
+    return vectorstore.as_retriever(search_kwargs={"k": RETRIEVER_K})
+
+
+async def run_level(workflow, server, sessions, questions_per_session, queries, verbose):
+    """Run one concurrency level and summarize it"""
+    from chains.grader_cache import clear_grader_cache, get_grader_cache_stats
+
+    clear_grader_cache()
+    before = server.stats.snapshot()
+    cache_hits_before = get_grader_cache_stats()["hits"]
+    latencies, failures = [], []
+    counter = iter(range(sessions * questions_per_session))
+
+    async def session():
+        for _ in range(questions_per_session):
+            number = next(counter)
+            question = f"{queries[number % len(queries)]} (pergunta {number})"
+            start = time.perf_counter()
+            try:
+                await workflow.aprocess_question(question)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                failures.append(f"{type(e).__name__}: {e}")
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with output:
+        await asyncio.gather(*(session() for _ in range(sessions)))
+    duration = time.perf_counter() - start
+
+    after = server.stats.snapshot()
+    questions = len(latencies) + len(failures)
+    cache_hits = get_grader_cache_stats()["hits"] - cache_hits_before
+
+    def per_question(key):
+        return (after[key] - before[key]) / questions if questions else 0.0
+
+    latencies_ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "sessions": sessions,
+        "questions": questions,
+        "failed": len(failures),
+        "failure_examples": sorted(set(failures))[:5],
+        "duration_seconds": duration,
+        "throughput_qps": len(latencies) / duration if duration else 0.0,
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "latency_p99_ms": float(np.percentile(latencies_ms, 99)),
+        "latency_max_ms": float(latencies_ms.max()),
+        "llm_calls_per_question": per_question("chat_requests"),
+        "llm_calls_per_question_by_tool": {
+            tool: (count - before["by_tool"].get(tool, 0)) / questions
+            for tool, count in after["by_tool"].items() if questions
+        },
+        "grader_cache_hits_per_question": cache_hits / questions if questions else 0.0,
+        "provider_errors": after["errors"] - before["errors"],
+        "provider_rate_limited": after["rate_limited"] - before["rate_limited"],
+        "prompt_tokens_per_question": per_question("prompt_tokens"),
+        "completion_tokens_per_question": per_question("completion_tokens"),
+    }
+
+
+async def run_all(workflow, server, args, queries):
+    results = []
+    print(f"{'sessions':>8} {'questions':>9} {'failed':>6} {'q/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'LLM calls/q':>12} {'cache hits/q':>13}")
+    for sessions in args.sessions:
+        level = await run_level(workflow, server, sessions, args.questions_per_session, queries, args.verbose)
+        results.append(level)
+        print(f"{level['sessions']:>8} {level['questions']:>9} {level['failed']:>6} {level['throughput_qps']:>8.2f} "
+              f"{level['latency_p50_ms']:>9.0f} {level['latency_p95_ms']:>9.0f} {level['latency_p99_ms']:>9.0f} "
+              f"{level['llm_calls_per_question']:>12.2f} {level['grader_cache_hits_per_question']:>13.2f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 64], help="Concurrency levels to run")
+    parser.add_argument("--questions-per-session", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean simulated LLM latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Uniform +/- latency variation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of LLM requests failing with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of LLM requests failing with HTTP 429")
+    parser.add_argument("--grade-yes-rate", type=float, default=1.0, help="Probability of positive grader verdicts")
+    parser.add_argument("--check-mode", choices=["sequential", "parallel", "combined"],
+                        help="Override HALLUCINATION_CHECK_MODE, to compare the verification strategies")
+    parser.add_argument("--grader-cache", action="store_true",
+                        help="Keep the grader cache on, to measure the LLM calls it saves")
+    parser.add_argument("--corpus-pages", type=int, default=200, help="Synthetic pages to retrieve from")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show the workflow's own logging")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(FakeServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        grade_yes_rate=args.grade_yes_rate,
+        seed=args.seed,
+    ))
+    background = BackgroundServer(server, port=args.port).start()
+
+    # The chains build their ChatOpenAI clients at import time, so the endpoint must be set first
+    os.environ["OPENAI_API_KEY"] = "sk-loadtest"
+    os.environ["OPENAI_BASE_URL"] = background.base_url
+    os.environ["OPENAI_API_BASE"] = background.base_url
+    # Read by config when the chains are imported, like the endpoint
+    os.environ["RAG_GRADER_CACHE_ENABLED"] = "true" if args.grader_cache else "false"
+
+    import rag_workflow
+    from benchmarks.corpus import synthetic_queries
+    from rag_workflow import RAGWorkflow
+
+    if args.check_mode:
+        rag_workflow.HALLUCINATION_CHECK_MODE = args.check_mode
+
+    try:
+        # No index_version, so the answer cache stays out of the measurement
+        with patch("streamlit.session_state", SessionState()):
+            workflow = RAGWorkflow()
+            workflow.set_retriever(build_retriever(args.corpus_pages, args.seed))
+            queries = synthetic_queries(100, seed=args.seed)
+            results = asyncio.run(run_all(workflow, server, args, queries))
+    finally:
+        background.stop()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "benchmark": "load_test",
+            "settings": {key: value for key, value in vars(args).items() if key not in ("output", "verbose")},
+            "levels": results,
+        }, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Per-node timing and LLM call instrumentation for the RAG workflow
+
+A WorkflowMetrics instance collects, for one question, the wall time of each
+graph node (and of the answer cache lookup in front of the graph), how many
+LLM calls were made from it and how many prompt and completion tokens they
+used.
+
+Nodes are timed by RAGWorkflow while they run and LLM calls are attributed
+to the node that is currently running through a context variable, which
+LangChain copies into the threads and tasks it uses for batched and parallel
+chain calls.
+"""
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Graph node the current code runs under, used to attribute LLM calls
+_current_node: ContextVar[Optional[str]] = ContextVar("current_node", default=None)
+
+# Key of the collector in RunnableConfig["configurable"]
+METRICS_CONFIG_KEY = "workflow_metrics"
+
+# Node name for LLM calls made outside any timed node
+UNTRACKED_NODE = "Outros"
+
+
+def _empty_node() -> Dict[str, Any]:
+    return {
+        "runs": 0,
+        "wall_seconds": 0.0,
+        "llm_calls": 0,
+        "llm_errors": 0,
+        "grader_cache_hits": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+    }
+
+
+class WorkflowMetrics:
+    """Timing and LLM usage of one workflow run, broken down by node"""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def config(self) -> Dict[str, Any]:
+        """RunnableConfig that reports LLM calls and exposes this collector to the nodes"""
+        return {
+            "callbacks": [MetricsCallbackHandler(self)],
+            "configurable": {METRICS_CONFIG_KEY: self},
+        }
+
+    @contextmanager
+    def node(self, name: str):
+        """Time a node and attribute the LLM calls made inside it"""
+        token = _current_node.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_node.reset(token)
+            with self._lock:
+                stats = self.nodes.setdefault(name, _empty_node())
+                stats["runs"] += 1
+                stats["wall_seconds"] += elapsed
+
+    def record(self, field: str, amount: int = 1):
+        """Add to a counter of the node that is currently running"""
+        name = _current_node.get() or UNTRACKED_NODE
+        with self._lock:
+            self.nodes.setdefault(name, _empty_node())[field] += amount
+
+    def summary(self, retry_count: int = 0) -> Dict[str, Any]:
+        """JSON-serializable totals and per-node breakdown"""
+        with self._lock:
+            nodes = {name: dict(stats) for name, stats in self.nodes.items()}
+
+        def total(field):
+            return sum(stats[field] for stats in nodes.values())
+
+        return {
+            "total_seconds": time.perf_counter() - self._start,
+            "llm_calls": total("llm_calls"),
+            "llm_errors": total("llm_errors"),
+            "grader_cache_hits": total("grader_cache_hits"),
+            "prompt_tokens": total("prompt_tokens"),
+            "completion_tokens": total("completion_tokens"),
+            # Answers regenerated after a failed hallucination check
+            "retries": max(retry_count - 1, 0),
+            "nodes": nodes,
+        }
+
+
+@contextmanager
+def node_metrics(config: Optional[Dict[str, Any]], name: str):
+    """Time a node with the collector carried in its config, if any"""
+    metrics = ((config or {}).get("configurable") or {}).get(METRICS_CONFIG_KEY)
+    if metrics is None:
+        yield
+        return
+    with metrics.node(name):
+        yield
+
+
+def token_usage(response) -> tuple:
+    """Prompt and completion tokens of an LLMResult"""
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if prompt_tokens or completion_tokens:
+        return prompt_tokens, completion_tokens
+
+    # Providers that only report usage in llm_output
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Counts LLM calls and tokens for a WorkflowMetrics collector"""
+
+    # Run in the caller's thread/task so the current node is visible
+    run_inline = True
+
+    def __init__(self, metrics: WorkflowMetrics):
+        self.metrics = metrics
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.metrics.record("llm_calls")
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.metrics.record("llm_calls")
+
+    def on_llm_end(self, response, **kwargs):
+        prompt_tokens, completion_tokens = token_usage(response)
+        self.metrics.record("prompt_tokens", prompt_tokens)
+        self.metrics.record("completion_tokens", completion_tokens)
+
+    def on_llm_error(self, error, **kwargs):
+        self.metrics.record("llm_errors")
+
+    def on_text(self, text, **kwargs):
+        # Emitted by chains.grader_cache when a grading result is reused
+        if text == "grader_cache_hit":
+            self.metrics.record("grader_cache_hits")
+
+
+def metrics_log_line(question: str, summary: Dict[str, Any]) -> str:
+    """
+    One JSON line describing a workflow run, for log processing
+
+    The question is logged as a hash, which still groups repeated questions
+    without writing what users asked to disk.
+    """
+    question_hash = hashlib.sha256(question.encode("utf-8")).hexdigest()[:16]
+    return json.dumps({"event": "workflow_metrics", "question_sha256": question_hash, **summary}, ensure_ascii=False)
@@ -3,8 +3,13 @@ Multi-Format Document Loader for Advanced RAG System
 Handles loading various document types including PDFs, Word docs, Excel files, and text files
 """
 
+import csv
+import io
 import os
-from typing import List, Dict, Any, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from functools import partial
+from typing import List, Dict, Any, BinaryIO, Iterator, Optional, Tuple, Union
 from pathlib import Path
 import logging
 
@@ -17,16 +22,69 @@ from langchain_community.document_loaders import (
     TextLoader
 )
 
+from config import PDF_PARALLEL_WORKERS, PDF_PARALLEL_MIN_PAGES, LOADER_IO_WORKERS, LOADER_CPU_WORKERS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Formats whose parsing is CPU-bound are loaded in worker processes, the rest in threads
+CPU_BOUND_FORMATS = {"pdf", "docx", "doc", "xlsx", "xls"}
+
+# Formats that can be parsed straight from an in-memory stream, without a file path
+STREAM_FORMATS = {"pdf", "csv", "txt", "md", "py", "js", "html", "xml"}
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """
+    Extract the text of pages [start, end) of a PDF
+    
+    Module-level so it can be pickled and run in a worker process.
+    """
+    from pypdf import PdfReader
+    
+    reader = PdfReader(file_path)
+    return [(page_number, reader.pages[page_number].extract_text()) for page_number in range(start, end)]
+
+
+# PDF parsed once per worker process from an uploaded stream's bytes
+_worker_pdf_reader = None
+
+
+def _open_pdf_in_worker(data: bytes):
+    """Process pool initializer: parse the uploaded PDF once in this worker"""
+    global _worker_pdf_reader
+    from pypdf import PdfReader
+    
+    _worker_pdf_reader = PdfReader(io.BytesIO(data))
+
+
+def _extract_stream_pdf_pages(start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract the text of pages [start, end) of the PDF opened by _open_pdf_in_worker"""
+    return [(page_number, _worker_pdf_reader.pages[page_number].extract_text()) for page_number in range(start, end)]
+
+
+def _load_document_in_process(file_path: str) -> List[Document]:
+    """
+    Load one document inside a worker process
+    
+    Page-parallel PDF extraction is disabled here to avoid nesting process pools.
+    """
+    return MultiFormatDocumentLoader(pdf_workers=1).load_document(file_path)
+
 
 class MultiFormatDocumentLoader:
     """Handles loading various document types"""
     
-    def __init__(self):
+    def __init__(self, pdf_workers: Optional[int] = PDF_PARALLEL_WORKERS,
+                 pdf_parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES,
+                 io_workers: int = LOADER_IO_WORKERS,
+                 cpu_workers: Optional[int] = LOADER_CPU_WORKERS):
         """Initialize the multi-format document loader with supported file types"""
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        self.pdf_parallel_min_pages = pdf_parallel_min_pages
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
         self.loaders = {
             "pdf": PyPDFLoader,
             "docx": Docx2txtLoader,
@@ -88,15 +146,15 @@ class MultiFormatDocumentLoader:
             loader_class = self.loaders[extension]
             
             # Special handling for different file types
-            if extension in ["csv"]:
+            if extension in ["pdf"]:
+                # Large PDFs are extracted page-parallel across processes
+                documents = self._load_pdf(file_path)
+            elif extension in ["csv"]:
                 # For CSV files, we might want to specify encoding
-                loader = loader_class(str(file_path), encoding="utf-8")
+                documents = loader_class(str(file_path), encoding="utf-8").load()
             else:
                 # Standard loading for other formats
-                loader = loader_class(str(file_path))
-            
-            # Load the document
-            documents = loader.load()
+                documents = loader_class(str(file_path)).load()
             
             # Add metadata about the file
             for doc in documents:
@@ -114,26 +172,191 @@ class MultiFormatDocumentLoader:
             logger.error(f"Error loading document {file_path}: {str(e)}")
             raise Exception(f"Failed to load document {file_path}: {str(e)}")
     
+    def lazy_load_document(self, file_path: Union[str, Path]) -> Iterator[Document]:
+        """
+        Load a document one piece at a time (e.g. page by page for PDFs)
+        
+        Memory-friendly counterpart of load_document for streaming ingestion.
+        
+        Args:
+            file_path: Path to the document file
+            
+        Yields:
+            Document: Loaded document chunks, with the same metadata as load_document
+            
+        Raises:
+            ValueError: If file type is not supported
+            FileNotFoundError: If file doesn't exist
+        """
+        file_path = Path(file_path)
+        
+        # Check if file exists
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        # Check if format is supported
+        extension = self.get_file_extension(file_path)
+        if not self.is_supported_format(file_path):
+            raise ValueError(f"Unsupported file type: {extension}")
+        
+        logger.info(f"Lazily loading document: {file_path} (format: {extension})")
+        
+        loader_class = self.loaders[extension]
+        if extension in ["pdf"]:
+            # Large PDFs are extracted page-parallel across processes, like in load_document
+            documents = self._lazy_load_pdf(file_path)
+        elif extension in ["csv"]:
+            documents = loader_class(str(file_path), encoding="utf-8").lazy_load()
+        else:
+            documents = loader_class(str(file_path)).lazy_load()
+        
+        file_metadata = {
+            "source": str(file_path),
+            "file_type": extension,
+            "file_name": file_path.name,
+            "file_size": file_path.stat().st_size,
+        }
+        for doc in documents:
+            doc.metadata.update(file_metadata)
+            yield doc
+    
+    def supports_stream(self, file_name: str) -> bool:
+        """Check if the format can be parsed from memory by lazy_load_stream"""
+        return self.get_file_extension(file_name) in STREAM_FORMATS
+    
+    def lazy_load_stream(self, stream: BinaryIO, file_name: str) -> Iterator[Document]:
+        """
+        Load a document from a binary stream without writing it to disk
+        
+        The stream is read in place (PDF pages are parsed from it directly),
+        so an in-memory upload is not copied again. Large PDFs are the
+        exception: their bytes are handed once to each worker process of the
+        page-parallel extractor, as load_document does for files on disk.
+        
+        Args:
+            stream: Seekable binary stream with the file content
+            file_name: Original file name, used for the format and metadata
+            
+        Yields:
+            Document: Loaded document chunks, with the same metadata layout as lazy_load_document
+            
+        Raises:
+            ValueError: If the format cannot be parsed from a stream
+        """
+        extension = self.get_file_extension(file_name)
+        if extension not in STREAM_FORMATS:
+            raise ValueError(f"File type cannot be loaded from memory: {extension}")
+        
+        stream.seek(0, io.SEEK_END)
+        file_metadata = {
+            "source": file_name,
+            "file_type": extension,
+            "file_name": Path(file_name).name,
+            "file_size": stream.tell(),
+        }
+        stream.seek(0)
+        logger.info(f"Loading document from memory: {file_name} (format: {extension})")
+        
+        if extension == "pdf":
+            from pypdf import PdfReader
+            
+            reader = PdfReader(stream)
+            page_count = len(reader.pages)
+            if self._use_parallel_pdf(page_count):
+                stream.seek(0)
+                pages = self._iter_parallel_pdf_pages(
+                    page_count, _extract_stream_pdf_pages,
+                    initializer=_open_pdf_in_worker, initargs=(stream.read(),),
+                )
+            else:
+                pages = ((page_number, page.extract_text()) for page_number, page in enumerate(reader.pages))
+            for page_number, text in pages:
+                yield Document(page_content=text, metadata={**file_metadata, "page": page_number})
+            return
+        
+        # The wrapper is detached afterwards so that it does not close the caller's stream
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="" if extension == "csv" else None)
+        try:
+            if extension == "csv":
+                # Same layout as CSVLoader: one document per row, "column: value" lines
+                for row_number, row in enumerate(csv.DictReader(text_stream)):
+                    content = "\n".join(
+                        f"{key.strip() if key is not None else key}: "
+                        f"{value.strip() if isinstance(value, str) else ','.join(map(str.strip, value)) if isinstance(value, list) else value}"
+                        for key, value in row.items()
+                    )
+                    yield Document(page_content=content, metadata={**file_metadata, "row": row_number})
+            else:
+                yield Document(page_content=text_stream.read(), metadata=dict(file_metadata))
+        finally:
+            text_stream.detach()
+    
+    def _load_pdf(self, file_path: Path) -> List[Document]:
+        """Load a PDF, splitting the page range across a process pool (see _lazy_load_pdf)"""
+        return list(self._lazy_load_pdf(file_path))
+    
+    def _lazy_load_pdf(self, file_path: Path) -> Iterator[Document]:
+        """
+        Lazily load a PDF, splitting the page range across a process pool
+        
+        Falls back to the serial PyPDFLoader for small files or a single
+        worker. Documents come in page order with the same metadata
+        PyPDFLoader produces ("source" and "page").
+        """
+        from pypdf import PdfReader
+        
+        page_count = len(PdfReader(str(file_path)).pages)
+        if not self._use_parallel_pdf(page_count):
+            yield from self.loaders["pdf"](str(file_path)).lazy_load()
+            return
+        
+        pages = self._iter_parallel_pdf_pages(page_count, partial(_extract_pdf_pages, str(file_path)))
+        for page_number, text in pages:
+            yield Document(page_content=text, metadata={"source": str(file_path), "page": page_number})
+    
+    def _use_parallel_pdf(self, page_count: int) -> bool:
+        """Whether a PDF is large enough to be worth extracting across processes"""
+        return min(self.pdf_workers, page_count) > 1 and page_count >= self.pdf_parallel_min_pages
+    
+    def _iter_parallel_pdf_pages(self, page_count: int, extract, initializer=None,
+                                 initargs: tuple = ()) -> Iterator[Tuple[int, str]]:
+        """
+        Run extract(start, end) over the page range on a process pool
+        
+        Yields (page number, text) in page order, as soon as each range and
+        the ones before it are done.
+        """
+        workers = min(self.pdf_workers, page_count)
+        # Several small ranges per worker even out pages of uneven complexity
+        range_size = max(1, -(-page_count // (workers * 4)))
+        page_ranges = [(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)]
+        
+        logger.info(f"Extracting {page_count} PDF pages with {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+            futures = [executor.submit(extract, start, end) for start, end in page_ranges]
+            try:
+                for future in futures:
+                    yield from future.result()
+            finally:
+                # Don't keep extracting pages nobody will consume
+                for future in futures:
+                    future.cancel()
+    
     def load_multiple_documents(self, file_paths: List[Union[str, Path]]) -> List[Document]:
         """
         Load multiple documents from a list of file paths
         
+        Files are loaded concurrently; the result keeps the order of file_paths.
+        
         Args:
             file_paths: List of paths to document files
             
         Returns:
             List[Document]: Combined list of loaded document chunks
         """
-        all_documents = []
         failed_files = []
-        
-        for file_path in file_paths:
-            try:
-                documents = self.load_document(file_path)
-                all_documents.extend(documents)
-            except Exception as e:
-                logger.warning(f"Failed to load {file_path}: {str(e)}")
-                failed_files.append(str(file_path))
+        loaded_files = sorted(self._iter_loaded_files(file_paths, failed_files), key=lambda loaded: loaded[0])
+        all_documents = [document for _, documents in loaded_files for document in documents]
         
         if failed_files:
             logger.warning(f"Failed to load {len(failed_files)} files: {failed_files}")
@@ -141,6 +364,78 @@ class MultiFormatDocumentLoader:
         logger.info(f"Successfully loaded {len(all_documents)} total document chunks from {len(file_paths) - len(failed_files)} files")
         return all_documents
     
+    def iter_documents(self, file_paths: List[Union[str, Path]],
+                       failed_files: Optional[List[str]] = None) -> Iterator[Document]:
+        """
+        Load files concurrently, yielding documents as soon as each file finishes
+        
+        Lets downstream stages start before every file has been parsed. Files
+        are yielded in completion order, not in the order of file_paths.
+        
+        Args:
+            file_paths: List of paths to document files
+            failed_files: Optional list that collects the paths that failed to load
+            
+        Yields:
+            Document: Loaded document chunks
+        """
+        failed_files = failed_files if failed_files is not None else []
+        for _, documents in self._iter_loaded_files(file_paths, failed_files):
+            yield from documents
+        
+        if failed_files:
+            logger.warning(f"Failed to load {len(failed_files)} files: {failed_files}")
+    
+    def _iter_loaded_files(self, file_paths: List[Union[str, Path]],
+                           failed_files: List[str]) -> Iterator[Tuple[int, List[Document]]]:
+        """
+        Load files on worker pools and yield (position, documents) as they complete
+        
+        CPU-bound formats are parsed in worker processes, everything else in
+        threads. Failed files are logged and appended to failed_files.
+        """
+        file_paths = [Path(file_path) for file_path in file_paths]
+        
+        # A single file gains nothing from a pool (and keeps parallel PDF extraction)
+        if len(file_paths) == 1:
+            try:
+                yield 0, self.load_document(file_paths[0])
+            except Exception as e:
+                logger.warning(f"Failed to load {file_paths[0]}: {str(e)}")
+                failed_files.append(str(file_paths[0]))
+            return
+        
+        with ExitStack() as stack:
+            thread_pool = None
+            process_pool = None
+            futures = {}
+            
+            for position, file_path in enumerate(file_paths):
+                if self.get_file_extension(file_path) in CPU_BOUND_FORMATS:
+                    if process_pool is None:
+                        process_pool = stack.enter_context(ProcessPoolExecutor(max_workers=self.cpu_workers))
+                    future = process_pool.submit(_load_document_in_process, str(file_path))
+                else:
+                    if thread_pool is None:
+                        thread_pool = stack.enter_context(ThreadPoolExecutor(max_workers=self.io_workers))
+                    future = thread_pool.submit(self.load_document, file_path)
+                futures[future] = (position, file_path)
+            
+            try:
+                for future in as_completed(futures):
+                    position, file_path = futures[future]
+                    try:
+                        documents = future.result()
+                    except Exception as e:
+                        logger.warning(f"Failed to load {file_path}: {str(e)}")
+                        failed_files.append(str(file_path))
+                        continue
+                    yield position, documents
+            finally:
+                # Don't keep parsing files nobody will consume
+                for future in futures:
+                    future.cancel()
+    
     def load_directory(self, directory_path: Union[str, Path], recursive: bool = True) -> List[Document]:
         """
         Load all supported documents from a directory
@@ -152,6 +447,25 @@ class MultiFormatDocumentLoader:
         Returns:
             List[Document]: Combined list of loaded document chunks
         """
+        # Load all found files
+        return self.load_multiple_documents(self.find_supported_files(directory_path, recursive))
+    
+    def iter_directory(self, directory_path: Union[str, Path], recursive: bool = True,
+                       failed_files: Optional[List[str]] = None) -> Iterator[Document]:
+        """Streaming counterpart of load_directory (see iter_documents)"""
+        yield from self.iter_documents(self.find_supported_files(directory_path, recursive), failed_files)
+    
+    def find_supported_files(self, directory_path: Union[str, Path], recursive: bool = True) -> List[Path]:
+        """
+        Find all supported files in a directory
+        
+        Args:
+            directory_path: Path to the directory
+            recursive: Whether to search subdirectories recursively
+            
+        Returns:
+            List[Path]: Supported files, sorted by path
+        """
         directory_path = Path(directory_path)
         
         if not directory_path.exists() or not directory_path.is_dir():
@@ -166,9 +480,7 @@ class MultiFormatDocumentLoader:
                 all_files.append(file_path)
         
         logger.info(f"Found {len(all_files)} supported files in {directory_path}")
-        
-        # Load all found files
-        return self.load_multiple_documents(all_files)
+        return sorted(all_files)
     
     def get_supported_extensions(self) -> List[str]:
         """Get list of all supported file extensions"""
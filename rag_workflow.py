@@ -14,16 +14,40 @@ The LangGraph workflow includes:
 This demonstrates practical LangGraph RAG patterns for building robust
 question-answering systems with proper workflow orchestration.
 """
+import os
+from contextlib import nullcontext
+
 import streamlit as st
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda, RunnableParallel
 from langgraph.graph import END, StateGraph
 
+from answer_cache import AnswerCache
+from context_builder import ContextBuilder
+from config import (
+    CHUNK_ENCODING, GENERATION_CONTEXT_TOKEN_BUDGET, GRADING_MAX_CONCURRENCY, HALLUCINATION_CHECK_MODE, LEXICAL_PREFILTER_ENABLED,
+    LEXICAL_PREFILTER_REJECT_THRESHOLD, ANSWER_CACHE_ENABLED, ANSWER_CACHE_PATH, ANSWER_CACHE_SEMANTIC,
+    ANSWER_CACHE_SIMILARITY_THRESHOLD, ANSWER_CACHE_MAX_AGE_SECONDS, WORKFLOW_METRICS_LOG_PATH
+)
+from metrics import WorkflowMetrics, metrics_log_line, node_metrics
 from state import GraphState
+from tracing import set_attributes, span, tracing_callbacks
+from chains.answer_verification import answer_verification
 from chains.document_relevance import document_relevance
-from chains.evaluate import evaluate_docs
+from chains.evaluate import EvaluateDocs, evaluate_docs
 from chains.generate_answer import generate_chain
+from chains.grader_cache import bypass_grader_cache
 from chains.question_relevance import question_relevance
 
+# Marks document evaluations decided locally, without an LLM grading call
+LEXICAL_PREFILTER_MARKER = "[pré-filtro léxico]"
+
+# Both answer checks at once; each prompt only reads the keys it needs
+speculative_verification = RunnableParallel(
+    document_relevance=document_relevance,
+    question_relevance=question_relevance,
+)
+
 
 class RAGWorkflow:
     """
@@ -42,10 +66,26 @@ class RAGWorkflow:
     Good for understanding how to build RAG systems with LangGraph in practice.
     """
     
-    def __init__(self):
+    def __init__(self, embedding_function=None):
         self.graph = None
         self.retriever = None
         self._current_session_retriever_key = None
+        
+        # Retrieved chunks are packed into a compact, token-bounded prompt context
+        self.context_builder = ContextBuilder(GENERATION_CONTEXT_TOKEN_BUDGET, CHUNK_ENCODING)
+        
+        # How often the speculative question check turned out to be unnecessary
+        self.verification_stats = {"speculative_checks": 0, "wasted_question_checks": 0}
+        
+        # Answers are cached per corpus version; the semantic tier needs embeddings
+        self.answer_cache = None
+        if ANSWER_CACHE_ENABLED:
+            self.answer_cache = AnswerCache(
+                ANSWER_CACHE_PATH,
+                embedding_function=embedding_function if ANSWER_CACHE_SEMANTIC else None,
+                similarity_threshold=ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                max_age_seconds=ANSWER_CACHE_MAX_AGE_SECONDS
+            )
     
     def get_graph(self):
         """Get or create the graph instance (cached for performance)"""
@@ -89,20 +129,185 @@ class RAGWorkflow:
         current_retriever = self.get_current_retriever()
         self.set_retriever(current_retriever)
         
-        graph = self.get_graph()
-        result = graph.invoke(input={"question": question})
+        with span("rag.process_question", **{"rag.question.length": len(question)}) as root_span:
+            metrics = WorkflowMetrics()
+            cached_result = self._get_cached_answer(question, metrics)
+            if cached_result is not None:
+                return self._record_metrics(question, cached_result, metrics, root_span)
+            
+            graph = self.get_graph()
+            result = graph.invoke(input={"question": question}, config=self._run_config(metrics))
+            self._cache_answer(question, result)
+            self._record_metrics(question, result, metrics, root_span)
         
         print(f"RAG WORKFLOW COMPLETED")
         return result
     
+    async def aprocess_question(self, question):
+        """
+        Process a question through the RAG workflow without blocking
+        
+        Every node and routing function has an async counterpart, so a single
+        event loop can serve many concurrent questions.
+        """
+        print(f"STARTING ASYNC RAG WORKFLOW for question: '{question}'")
+        
+        # Ensure we have the most current retriever
+        current_retriever = self.get_current_retriever()
+        self.set_retriever(current_retriever)
+        
+        with span("rag.process_question", **{"rag.question.length": len(question)}) as root_span:
+            metrics = WorkflowMetrics()
+            cached_result = self._get_cached_answer(question, metrics)
+            if cached_result is not None:
+                return self._record_metrics(question, cached_result, metrics, root_span)
+            
+            graph = self.get_graph()
+            result = await graph.ainvoke(input={"question": question}, config=self._run_config(metrics))
+            self._cache_answer(question, result)
+            self._record_metrics(question, result, metrics, root_span)
+        
+        print(f"ASYNC RAG WORKFLOW COMPLETED")
+        return result
+    
+    def stream_question(self, question):
+        """
+        Process a question while streaming the generated answer
+        
+        Yields ("answer_start", None) whenever a new answer attempt begins
+        (the first generation or a retry after hallucinations), ("token", text)
+        for each answer token as it arrives, ("answer_end", None) once that
+        attempt's Generate Answer step has finished and validation starts, and
+        finally ("result", state) with the complete state once all validation
+        checks have finished.
+        """
+        print(f"STARTING STREAMING RAG WORKFLOW for question: '{question}'")
+        
+        # Ensure we have the most current retriever
+        current_retriever = self.get_current_retriever()
+        self.set_retriever(current_retriever)
+        
+        with span("rag.process_question", **{"rag.question.length": len(question), "rag.streaming": True}) as root_span:
+            metrics = WorkflowMetrics()
+            cached_result = self._get_cached_answer(question, metrics)
+            if cached_result is not None:
+                yield ("result", self._record_metrics(question, cached_result, metrics, root_span))
+                return
+            
+            graph = self.get_graph()
+            result = None
+            answer_in_progress = False
+            
+            stream = graph.stream({"question": question}, config=self._run_config(metrics), stream_mode=["messages", "values"])
+            for mode, chunk in stream:
+                if mode == "values":
+                    # A step finished, so the next answer tokens belong to a new attempt
+                    result = chunk
+                    if answer_in_progress:
+                        answer_in_progress = False
+                        yield ("answer_end", None)
+                    continue
+            
+                message, metadata = chunk
+                # Only the answer is streamed; grader outputs carry no text content anyway
+                if metadata.get("langgraph_node") != "Generate Answer":
+                    continue
+                if not isinstance(message.content, str) or not message.content:
+                    continue
+            
+                if not answer_in_progress:
+                    answer_in_progress = True
+                    yield ("answer_start", None)
+                yield ("token", message.content)
+            
+            self._cache_answer(question, result)
+            self._record_metrics(question, result, metrics, root_span)
+        
+        print(f"STREAMING RAG WORKFLOW COMPLETED")
+        yield ("result", result)
+    
+    def _get_cached_answer(self, question, metrics):
+        """Return a cached result for the current corpus, or None on a miss"""
+        corpus_version = st.session_state.get('index_version')
+        if self.answer_cache is None or corpus_version is None:
+            return None
+        
+        with metrics.node("Answer Cache"):
+            cached = self.answer_cache.get(question, corpus_version)
+        if cached is None:
+            print("Answer cache miss")
+            return None
+        
+        result, cache_info = cached
+        print(f"Answer cache {cache_info['hit']} hit (age {cache_info['age_seconds']:.0f}s)")
+        result = dict(result)
+        result["answer_cache"] = cache_info
+        return result
+    
+    def _cache_answer(self, question, result):
+        """Store a freshly computed result for the current corpus"""
+        corpus_version = st.session_state.get('index_version')
+        if self.answer_cache is None or corpus_version is None or not result:
+            return
+        
+        # Fallback answers depend on transient retriever failures, so keep them out
+        if result.get("no_documents_available") or not result.get("documents"):
+            return
+        
+        # Only verified answers are reused; an answer given up on at the retry
+        # limit failed its checks and would otherwise be served until the corpus changes
+        if result.get("verification_result") != "Answers Question" or result.get("retry_limit_reached"):
+            return
+        
+        try:
+            self.answer_cache.put(question, corpus_version, result)
+        except Exception as e:
+            print(f"Error caching answer: {e}")
+        result["answer_cache"] = {"hit": None}
+    
+    def _run_config(self, metrics):
+        """Graph run config with the metrics collector and, when enabled, the tracing callbacks"""
+        config = metrics.config()
+        config["callbacks"] += tracing_callbacks()
+        return config
+    
+    def _record_metrics(self, question, result, metrics, root_span=None):
+        """Store the run's metrics in the result, log them as a JSON line and add them to the root span"""
+        if not result:
+            return result
+        
+        # Added after caching, so cached answers never carry another run's metrics
+        result["metrics"] = metrics.summary(retry_count=result.get("retry_count", 0))
+        set_attributes(root_span, **{
+            "rag.answer_cache.hit": (result.get("answer_cache") or {}).get("hit") or "miss",
+            "rag.documents.count": len(result.get("documents") or []),
+            "rag.retries": result["metrics"]["retries"],
+            "rag.llm.calls": result["metrics"]["llm_calls"],
+            "rag.grader_cache.hits": result["metrics"]["grader_cache_hits"],
+            "gen_ai.usage.input_tokens": result["metrics"]["prompt_tokens"],
+            "gen_ai.usage.output_tokens": result["metrics"]["completion_tokens"],
+        })
+        line = metrics_log_line(question, result["metrics"])
+        print(line)
+        
+        if WORKFLOW_METRICS_LOG_PATH:
+            try:
+                os.makedirs(os.path.dirname(WORKFLOW_METRICS_LOG_PATH) or ".", exist_ok=True)
+                with open(WORKFLOW_METRICS_LOG_PATH, "a", encoding="utf-8") as log_file:
+                    log_file.write(line + "\n")
+            except OSError as e:
+                print(f"Error writing workflow metrics: {e}")
+        return result
+    
     def _create_graph(self):
         """Create and configure the state graph for handling queries"""
         workflow = StateGraph(GraphState)
         
-        # Add nodes
-        workflow.add_node("Retrieve Documents", self._retrieve)
-        workflow.add_node("Grade Documents", self._evaluate)
-        workflow.add_node("Generate Answer", self._generate_answer)
+        # Add nodes (sync and async implementations, picked by invoke/ainvoke)
+        workflow.add_node("Retrieve Documents", self._timed_step("Retrieve Documents", self._retrieve, self._aretrieve))
+        workflow.add_node("Grade Documents", self._timed_step("Grade Documents", self._evaluate, self._aevaluate))
+        workflow.add_node("Generate Answer", self._timed_step("Generate Answer", self._generate_answer, self._agenerate_answer))
+        workflow.add_node("Check Hallucinations", self._timed_step("Check Hallucinations", self._check_hallucinations, self._acheck_hallucinations))
         # workflow.add_node("Search Online", self._search_online)
 
         # Set entry point and edges
@@ -110,16 +315,18 @@ class RAGWorkflow:
         workflow.add_edge("Retrieve Documents", "Grade Documents")
         workflow.add_conditional_edges(
             "Grade Documents",
-            self._any_doc_irrelevant,
+            RunnableLambda(self._any_doc_irrelevant, afunc=self._aany_doc_irrelevant),
             {
                 # "Search Online": "Search Online",
                 "Generate Answer": "Generate Answer",
             },
         )
 
+        # The check is a node, so the scores it stores reach the final state
+        workflow.add_edge("Generate Answer", "Check Hallucinations")
         workflow.add_conditional_edges(
-            "Generate Answer",
-            self._check_hallucinations,
+            "Check Hallucinations",
+            RunnableLambda(self._verification_route, afunc=self._averification_route),
             {
                 "Hallucinations detected": "Generate Answer",
                 "Answers Question": END,
@@ -128,18 +335,26 @@ class RAGWorkflow:
         )
 
         # workflow.add_edge("Search Online", "Generate Answer")
-        workflow.add_edge("Generate Answer", END)
 
         return workflow.compile()
     
+    def _timed_step(self, name, func, afunc):
+        """Wrap a node or routing function so its time and LLM calls are recorded under name"""
+        def run(state, config):
+            with node_metrics(config, name):
+                return func(state)
+        
+        async def arun(state, config):
+            with node_metrics(config, name):
+                return await afunc(state)
+        
+        return RunnableLambda(run, afunc=arun, name=name)
+    
     def _retrieve(self, state: GraphState):
         """Retrieve documents relevant to the user's question"""
         print("GRAPH STATE: Retrieve Documents")
         question = state["question"]
         
-        # Initialize retry counter
-        retry_count = 0
-        
         # Get the current retriever (with fallback to session state)
         current_retriever = self.get_current_retriever()
         
@@ -148,51 +363,85 @@ class RAGWorkflow:
         
         if current_retriever is None:
             print("No retriever available - going to online search")
-            return {
-                "documents": [], 
-                "question": question, 
-                "online_search": True,
-                "retry_count": retry_count
-            }
+            return self._retrieval_failure(question)
         
         try:
             documents = current_retriever.invoke(question)
-            print(f"Retrieved {len(documents)} documents from ChromaDB")
-            return {
-                "documents": documents, 
-                "question": question,
-                "retry_count": retry_count
-            }
+            return self._retrieval_result(question, documents)
         except Exception as e:
-            print(f"Error retrieving documents: {e}")
+            return self._retrieval_failure(question, e)
+    
+    async def _aretrieve(self, state: GraphState):
+        """Async version of _retrieve"""
+        print("GRAPH STATE: Retrieve Documents")
+        question = state["question"]
+        
+        # Get the current retriever (with fallback to session state)
+        current_retriever = self.get_current_retriever()
+        
+        # Debug: Print retriever status
+        print(f"Current retriever status: {current_retriever is not None}")
+        
+        if current_retriever is None:
+            print("No retriever available - going to online search")
+            return self._retrieval_failure(question)
+        
+        try:
+            documents = await current_retriever.ainvoke(question)
+            return self._retrieval_result(question, documents)
+        except Exception as e:
+            return self._retrieval_failure(question, e)
+    
+    def _retrieval_result(self, question, documents):
+        """Build the state update for a successful retrieval"""
+        print(f"Retrieved {len(documents)} documents from ChromaDB")
+        return {
+            "documents": documents, 
+            "question": question,
+            "retry_count": 0
+        }
+    
+    def _retrieval_failure(self, question, error=None):
+        """Build the state update when no documents could be retrieved"""
+        if error is not None:
+            print(f"Error retrieving documents: {error}")
             print("Clearing invalid retriever and falling back to online search")
             # Clear the invalid retriever
             self.retriever = None
             st.session_state.retriever = None
-            return {
-                "documents": [], 
-                "question": question, 
-                "online_search": True,
-                "retry_count": retry_count
-            }
+        return {
+            "documents": [], 
+            "question": question, 
+            "online_search": True,
+            "retry_count": 0
+        }
     
     def _evaluate(self, state: GraphState):
         """Filter documents based on their relevance to the question"""
         print("GRAPH STATE: Grade Documents")
+        print(f"Evaluating {len(state['documents'])} documents, online_search: {state.get('online_search', False)}")
+        
+        document_evaluations = self._grade_documents(state["question"], state["documents"])
+        return self._evaluation_result(state, document_evaluations)
+    
+    async def _aevaluate(self, state: GraphState):
+        """Async version of _evaluate"""
+        print("GRAPH STATE: Grade Documents")
+        print(f"Evaluating {len(state['documents'])} documents, online_search: {state.get('online_search', False)}")
+        
+        document_evaluations = await self._agrade_documents(state["question"], state["documents"])
+        return self._evaluation_result(state, document_evaluations)
+    
+    def _evaluation_result(self, state, document_evaluations):
+        """Keep the relevant documents and decide the search method"""
         question = state["question"]
         documents = state["documents"]
 
         # Check if online search is already required
         online_search = state.get("online_search", False)
-        print(f"Evaluating {len(documents)} documents, online_search: {online_search}")
         
         filtered_docs = []
-        document_evaluations = []
-        
-        for document in documents:
-            response = evaluate_docs.invoke({"question": question, "document": document.page_content})
-            document_evaluations.append(response)
-            
+        for document, response in zip(documents, document_evaluations):
             result = response.score
             if result.lower() == "yes":
                 filtered_docs.append(document)
@@ -212,8 +461,113 @@ class RAGWorkflow:
             "document_evaluations": document_evaluations
         }
     
+    def _grade_documents(self, question, documents):
+        """
+        Grade all documents concurrently, keeping the retrieval order
+        
+        Chunks rejected by the lexical prefilter skip the LLM entirely, and a
+        failed grading call is recorded as an irrelevant document instead of
+        aborting the whole batch.
+        """
+        evaluations = self._lexical_prefilter(question, documents)
+        pending = [document for document, evaluation in zip(documents, evaluations) if evaluation is None]
+        responses = evaluate_docs.batch(
+            self._grading_inputs(question, pending),
+            config={"max_concurrency": GRADING_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        return self._merge_evaluations(evaluations, responses)
+    
+    async def _agrade_documents(self, question, documents):
+        """Async version of _grade_documents"""
+        evaluations = self._lexical_prefilter(question, documents)
+        pending = [document for document, evaluation in zip(documents, evaluations) if evaluation is None]
+        responses = await evaluate_docs.abatch(
+            self._grading_inputs(question, pending),
+            config={"max_concurrency": GRADING_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        return self._merge_evaluations(evaluations, responses)
+    
+    def _grading_inputs(self, question, documents):
+        """Build the evaluate_docs inputs for each document"""
+        return [{"question": question, "document": document.page_content} for document in documents]
+    
+    def _lexical_prefilter(self, question, documents):
+        """
+        Reject chunks that share almost no vocabulary with the question
+        
+        Returns one entry per document: an EvaluateDocs marked with
+        LEXICAL_PREFILTER_MARKER for rejected chunks, or None for chunks
+        that still need an LLM grading call.
+        """
+        lexical_index = st.session_state.get('lexical_index')
+        if not LEXICAL_PREFILTER_ENABLED or lexical_index is None:
+            return [None] * len(documents)
+        
+        evaluations = []
+        for document in documents:
+            score = lexical_index.normalized_score(question, document.page_content)
+            if score is None or score >= LEXICAL_PREFILTER_REJECT_THRESHOLD:
+                evaluations.append(None)
+                continue
+            evaluations.append(EvaluateDocs(
+                score="no",
+                relevance_score=0.0,
+                coverage_assessment=f"{LEXICAL_PREFILTER_MARKER} Sem vocabulário em comum com a pergunta (BM25 {score:.3f})",
+                missing_information="Documento descartado sem avaliação por LLM"
+            ))
+        
+        skipped = sum(1 for evaluation in evaluations if evaluation is not None)
+        print(f"Lexical prefilter: {skipped}/{len(documents)} documents rejected without LLM grading")
+        return evaluations
+    
+    def _merge_evaluations(self, evaluations, responses):
+        """Slot the LLM grading responses back into the prefiltered positions"""
+        responses = iter(responses)
+        return [
+            evaluation if evaluation is not None else self._grading_result(next(responses))
+            for evaluation in evaluations
+        ]
+    
+    def _grading_result(self, response):
+        """Turn a failed grading call into a negative evaluation"""
+        if not isinstance(response, Exception):
+            return response
+        
+        print(f"Error grading document: {response}")
+        return EvaluateDocs(
+            score="no",
+            relevance_score=0.0,
+            coverage_assessment="Falha na avaliação do documento",
+            missing_information=str(response)
+        )
+    
     def _generate_answer(self, state: GraphState):
         """Generate an answer based on the retrieved documents"""
+        fallback = self._fallback_answer_result(state)
+        if fallback is not None:
+            return fallback
+        
+        context, context_stats = self._pack_context(state["documents"])
+        solution = generate_chain.invoke({"context": context, "question": state["question"]})
+        return self._answer_result(state, solution, context_stats)
+    
+    async def _agenerate_answer(self, state: GraphState):
+        """Async version of _generate_answer"""
+        fallback = self._fallback_answer_result(state)
+        if fallback is not None:
+            return fallback
+        
+        context, context_stats = self._pack_context(state["documents"])
+        solution = await generate_chain.ainvoke({"context": context, "question": state["question"]})
+        return self._answer_result(state, solution, context_stats)
+    
+    def _fallback_answer_result(self, state):
+        """
+        Log the generation attempt and build the fallback state update
+        Returns None when there are documents to generate from
+        """
         print("GRAPH STATE: Generate Answer")
         question = state["question"]
         documents = state["documents"]
@@ -224,24 +578,35 @@ class RAGWorkflow:
         print(f"Generating answer using {len(documents)} documents (attempt {retry_count + 1})")
         
         # If no documents available, provide a fallback response
-        if len(documents) == 0:
-            print("No relevant documents found - providing fallback response")
-            solution = self._generate_fallback_response(question)
-            return {
-                "documents": documents, 
-                "question": question, 
-                "solution": solution,
-                "retry_count": retry_count + 1,
-                "no_documents_available": True
-            }
+        if len(documents) > 0:
+            return None
         
-        solution = generate_chain.invoke({"context": documents, "question": question})
-        print(f"Answer generated: {len(solution)} characters")
+        print("No relevant documents found - providing fallback response")
+        solution = self._generate_fallback_response(question)
         return {
             "documents": documents, 
             "question": question, 
             "solution": solution,
-            "retry_count": retry_count + 1
+            "retry_count": retry_count + 1,
+            "no_documents_available": True
+        }
+    
+    def _pack_context(self, documents):
+        """Render the documents as the answer prompt context, within the token budget"""
+        context, stats = self.context_builder.build(documents)
+        print(f"Context packed: {stats['tokens_before']} -> {stats['tokens_after']} tokens "
+              f"({stats['documents_packed']}/{stats['documents']} chunks, budget {stats['token_budget']})")
+        return context, stats
+    
+    def _answer_result(self, state, solution, context_stats):
+        """Build the state update for a generated answer"""
+        print(f"Answer generated: {len(solution)} characters")
+        return {
+            "documents": state["documents"], 
+            "question": state["question"], 
+            "solution": solution,
+            "retry_count": state.get("retry_count", 0) + 1,
+            "context_stats": context_stats
         }
     
     def _generate_fallback_response(self, question):
@@ -268,50 +633,153 @@ Você poderia reformular sua pergunta de forma mais específica sobre o conteúd
         next_state = "Generate Answer"
         return next_state
     
+    async def _aany_doc_irrelevant(self, state):
+        """Async version of _any_doc_irrelevant"""
+        return self._any_doc_irrelevant(state)
+    
     def _check_hallucinations(self, state: GraphState):
-        """Check for hallucinations in the generated answers"""
+        """Check for hallucinations in the generated answers and store the verdict"""
+        early_result = self._hallucination_precheck(state)
+        if early_result is not None:
+            return early_result
+        
+        with self._grader_cache_scope(state):
+            if HALLUCINATION_CHECK_MODE == "combined":
+                print("Checking document and question relevance in a single call...")
+                verification = answer_verification.invoke(self._verification_inputs(state))
+                return self._hallucination_route(state, verification.grounding, verification.question_relevance)
+        
+            if HALLUCINATION_CHECK_MODE == "parallel":
+                print("Checking document and question relevance in parallel...")
+                scores = speculative_verification.invoke(self._verification_inputs(state))
+                return self._speculative_route(state, scores)
+
+            print("Checking document relevance...")
+            doc_relevance_score = document_relevance.invoke(
+                {"documents": state["documents"], "solution": state["solution"]}
+            )
+
+            question_relevance_score = None
+            if doc_relevance_score.binary_score:
+                print("Document relevance check passed")
+                print("Checking question relevance...")
+                question_relevance_score = question_relevance.invoke(
+                    {"question": state["question"], "solution": state["solution"]}
+                )
+        
+            return self._hallucination_route(state, doc_relevance_score, question_relevance_score)
+    
+    async def _acheck_hallucinations(self, state: GraphState):
+        """Async version of _check_hallucinations"""
+        early_result = self._hallucination_precheck(state)
+        if early_result is not None:
+            return early_result
+        
+        with self._grader_cache_scope(state):
+            if HALLUCINATION_CHECK_MODE == "combined":
+                print("Checking document and question relevance in a single call...")
+                verification = await answer_verification.ainvoke(self._verification_inputs(state))
+                return self._hallucination_route(state, verification.grounding, verification.question_relevance)
+        
+            if HALLUCINATION_CHECK_MODE == "parallel":
+                print("Checking document and question relevance in parallel...")
+                scores = await speculative_verification.ainvoke(self._verification_inputs(state))
+                return self._speculative_route(state, scores)
+
+            print("Checking document relevance...")
+            doc_relevance_score = await document_relevance.ainvoke(
+                {"documents": state["documents"], "solution": state["solution"]}
+            )
+
+            question_relevance_score = None
+            if doc_relevance_score.binary_score:
+                print("Document relevance check passed")
+                print("Checking question relevance...")
+                question_relevance_score = await question_relevance.ainvoke(
+                    {"question": state["question"], "solution": state["solution"]}
+                )
+        
+            return self._hallucination_route(state, doc_relevance_score, question_relevance_score)
+    
+    def _grader_cache_scope(self, state):
+        """Bypasses the grader cache when verifying a regenerated answer, which may repeat the failed one"""
+        if state.get("retry_count", 0) > 1:
+            return bypass_grader_cache()
+        return nullcontext()
+    
+    def _hallucination_precheck(self, state):
+        """
+        Decide the route without calling the graders when no check is needed
+        Returns None when the answer still has to be verified
+        """
         print("GRAPH STATE: Check Hallucinations")
-        question = state["question"]
         documents = state["documents"]
-        solution = state["solution"]
         retry_count = state.get("retry_count", 0)
         no_documents_available = state.get("no_documents_available", False)
 
         # If no documents are available, skip hallucination check and end
         if no_documents_available or len(documents) == 0:
             print("No documents available - skipping hallucination check and ending workflow")
-            return "Question not addressed"
+            return {"verification_result": "Question not addressed"}
         
         # Prevent infinite loops by limiting retries
         MAX_RETRIES = 3
         if retry_count >= MAX_RETRIES:
             print(f"Maximum retries ({MAX_RETRIES}) reached - ending workflow to prevent infinite loop")
-            # Store the final scores
-            state["retry_limit_reached"] = True
-            return "Question not addressed"
-
-        print("Checking document relevance...")
-        doc_relevance_score = document_relevance.invoke(
-            {"documents": documents, "solution": solution}
-        )
-
+            return {"verification_result": "Question not addressed", "retry_limit_reached": True}
+        
+        return None
+    
+    def _verification_inputs(self, state):
+        """Inputs shared by the document and question relevance checks"""
+        return {
+            "documents": state["documents"],
+            "question": state["question"],
+            "solution": state["solution"]
+        }
+    
+    def _speculative_route(self, state, scores):
+        """Route on speculative results, counting question checks that were not needed"""
+        doc_relevance_score = scores["document_relevance"]
+        self.verification_stats["speculative_checks"] += 1
+        if not doc_relevance_score.binary_score:
+            # The sequential path would never have asked for the question check
+            self.verification_stats["wasted_question_checks"] += 1
+        
+        stats = self.verification_stats
+        print(f"Speculative question checks wasted: {stats['wasted_question_checks']}/{stats['speculative_checks']}")
+        return self._hallucination_route(state, doc_relevance_score, scores["question_relevance"])
+    
+    def _hallucination_route(self, state, doc_relevance_score, question_relevance_score):
+        """Build the state update with the grader scores and the next step of the workflow"""
+        retry_count = state.get("retry_count", 0)
+        
         if doc_relevance_score.binary_score:
-            print("Document relevance check passed")
-            print("Checking question relevance...")
-            question_relevance_score = question_relevance.invoke({"question": question, "solution": solution})
-            
             # Store the evaluation scores in state
-            state["document_relevance_score"] = doc_relevance_score
-            state["question_relevance_score"] = question_relevance_score
+            update = {
+                "document_relevance_score": doc_relevance_score,
+                "question_relevance_score": question_relevance_score
+            }
             
             if question_relevance_score.binary_score:
                 print("ROUTING DECISION: Going to 'END' (Answers Question)")
-                return "Answers Question"
+                update["verification_result"] = "Answers Question"
             else:
                 print("ROUTING DECISION: Going to 'END' (Question not addressed)")
-                return "Question not addressed"
+                update["verification_result"] = "Question not addressed"
+            return update
         else:
             print(f"ROUTING DECISION: Going to 'Generate Answer' (Hallucinations detected, retry {retry_count + 1})")
             # Store the document relevance score even if it failed
-            state["document_relevance_score"] = doc_relevance_score
-            return "Hallucinations detected"
+            return {
+                "document_relevance_score": doc_relevance_score,
+                "verification_result": "Hallucinations detected"
+            }
+    
+    def _verification_route(self, state):
+        """Route on the verdict stored by the Check Hallucinations node"""
+        return state["verification_result"]
+    
+    async def _averification_route(self, state):
+        """Async version of _verification_route"""
+        return self._verification_route(state)
@@ -39,4 +39,8 @@ class GraphState(TypedDict):
     question_relevance_score: Optional[Dict[str, Any]]  # Store question relevance check
     retry_count: Optional[int]  # Track retry attempts to prevent infinite loops
     no_documents_available: Optional[bool]  # Flag when no relevant documents found
-    retry_limit_reached: Optional[bool]  # Flag when maximum retries exceeded
\ No newline at end of file
+    retry_limit_reached: Optional[bool]  # Flag when maximum retries exceeded
+    verification_result: Optional[str]  # Verdict of the hallucination check, used for routing
+    answer_cache: Optional[Dict[str, Any]]  # Answer cache hit type and age (set outside the graph)
+    context_stats: Optional[Dict[str, Any]]  # Prompt context tokens before and after packing
+    metrics: Optional[Dict[str, Any]]  # Per-node wall time, LLM calls and tokens (set outside the graph)
@@ -0,0 +1,108 @@
+"""
+Tests for the persistent answer cache
+
+Verifies exact and semantic hits, that a new index version invalidates old
+answers, and that RAGWorkflow only stores answers that passed verification.
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from answer_cache import AnswerCache
+from index_manifest import get_index_version
+
+
+class KeywordEmbeddings:
+    """Fake embedding function: one dimension per known keyword"""
+
+    keywords = ["balanco", "hidrico", "chuva", "solo"]
+
+    def embed_query(self, text):
+        return [float(keyword in text) for keyword in self.keywords]
+
+
+def make_manifest(sha256="abc", created_at=1.0):
+    return {
+        "source": {"sha256": sha256, "mtime": 10.0},
+        "chunk_size": 500,
+        "chunk_overlap": 50,
+        "embedding_model": "fake-embedding-model",
+        "collection_name": "rag-chroma",
+        "created_at": created_at,
+    }
+
+
+def test_exact_hit_matches_normalized_question(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    cache.put("O que é balanço hídrico?", "v1", {"solution": "resposta"})
+
+    hit = cache.get("  o que e BALANCO hidrico ", "v1")
+
+    assert hit is not None
+    result, cache_info = hit
+    assert result == {"solution": "resposta"}
+    assert cache_info["hit"] == "exact"
+    assert cache.get("O que é evapotranspiração?", "v1") is None
+    stats = cache.get_stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 0, 1)
+
+
+def test_semantic_hit_reuses_similar_question(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), embedding_function=KeywordEmbeddings(),
+                        similarity_threshold=0.9)
+    cache.put("Como calcular o balanço hídrico?", "v1", {"solution": "resposta"})
+
+    hit = cache.get("Qual o cálculo do balanço hídrico?", "v1")
+
+    assert hit is not None
+    result, cache_info = hit
+    assert result == {"solution": "resposta"}
+    assert cache_info["hit"] == "semantic"
+    assert cache_info["similarity"] >= 0.9
+    # Below the threshold: a different topic is a miss
+    assert cache.get("Qual o tipo de solo?", "v1") is None
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+def test_new_index_version_invalidates_answers(tmp_path):
+    manifest = make_manifest()
+    refreshed = dict(make_manifest(), source={"sha256": "abc", "mtime": 99.0})
+    rebuilt = make_manifest(created_at=2.0)
+    changed = make_manifest(sha256="def")
+
+    # Touching the file keeps the version; rebuilding or changing it does not
+    assert get_index_version(refreshed) == get_index_version(manifest)
+    assert get_index_version(rebuilt) != get_index_version(manifest)
+    assert get_index_version(changed) != get_index_version(manifest)
+
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), embedding_function=KeywordEmbeddings())
+    cache.put("O que é balanço hídrico?", get_index_version(manifest), {"solution": "resposta"})
+
+    assert cache.get("O que é balanço hídrico?", get_index_version(manifest)) is not None
+    # Neither tier matches answers of another corpus version
+    assert cache.get("O que é balanço hídrico?", get_index_version(changed)) is None
+
+
+def test_workflow_only_caches_verified_answers(tmp_path):
+    from rag_workflow import RAGWorkflow
+
+    with patch('rag_workflow.ANSWER_CACHE_ENABLED', False):
+        workflow = RAGWorkflow()
+    workflow.answer_cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    verified = {"documents": ["chunk"], "solution": "ok", "verification_result": "Answers Question"}
+    given_up = {"documents": ["chunk"], "solution": "sem fundamento",
+                "verification_result": "Question not addressed", "retry_limit_reached": True}
+    not_addressed = {"documents": ["chunk"], "solution": "parcial", "verification_result": "Question not addressed"}
+
+    with patch('streamlit.session_state', {"index_version": "v1"}):
+        workflow._cache_answer("verificada", verified)
+        workflow._cache_answer("limite de tentativas", given_up)
+        workflow._cache_answer("não respondida", not_addressed)
+
+    assert workflow.answer_cache.get("verificada", "v1") is not None
+    assert workflow.answer_cache.get("limite de tentativas", "v1") is None
+    assert workflow.answer_cache.get("não respondida", "v1") is None
@@ -0,0 +1,55 @@
+"""
+Tests for the token-aware chunker
+
+Verifies that chunks respect the token budget, that their offsets point at
+their exact text in the parent document, and that each chunk keeps the
+metadata of the page it came from.
+"""
+
+import os
+import sys
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+
+from chunking import TokenChunker
+
+
+def _pages():
+    return [
+        Document(
+            page_content="\n\n".join(f"Parágrafo {page}.{i}: balanço hídrico e evapotranspiração na bacia." for i in range(40)),
+            metadata={"source": "doc.pdf", "page": page},
+        )
+        for page in range(3)
+    ]
+
+
+def test_chunks_have_exact_offsets_and_parent_metadata():
+    pages = _pages()
+    chunker = TokenChunker(chunk_size=50, chunk_overlap=10)
+    chunks = chunker.split_documents(pages)
+
+    assert len(chunks) > len(pages)
+    for chunk in chunks:
+        parent = pages[chunk.metadata["page"]].page_content
+        assert parent[chunk.metadata["start_index"]:chunk.metadata["end_index"]] == chunk.page_content
+        assert len(chunker.encoder.encode_ordinary(chunk.page_content)) <= 50
+
+    assert [chunk.metadata["chunk_id"] for chunk in chunks] == list(range(len(chunks)))
+    assert {chunk.metadata["page"] for chunk in chunks} == {0, 1, 2}
+
+
+def test_consecutive_chunks_overlap_and_cover_the_text():
+    text = " ".join(f"palavra{i}" for i in range(500))
+    spans = TokenChunker(chunk_size=60, chunk_overlap=15).split_text(text)
+
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    for (_, previous_end, _), (start, _, _) in zip(spans, spans[1:]):
+        assert start < previous_end
+
+
+def test_empty_documents_produce_no_chunks():
+    assert TokenChunker(chunk_size=50, chunk_overlap=10).split_documents([Document(page_content="")]) == []
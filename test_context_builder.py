@@ -0,0 +1,69 @@
+"""
+Tests for the token-budgeted context builder
+
+Verifies that overlapping chunks are merged without repeating text, that
+the packed context stays within the token budget, and that the tokens before
+packing are counted in the same units as the packed context.
+"""
+
+import os
+import sys
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+
+from context_builder import ContextBuilder
+
+
+def _chunk(text, start, end, **metadata):
+    return Document(
+        page_content=text[start:end],
+        metadata={"source": "docs/proposta.pdf", "page": 0, "start_index": start, "end_index": end, **metadata}
+    )
+
+
+def test_overlapping_chunks_are_merged_in_reading_order():
+    text = "Primeira frase do texto. Segunda frase do texto. Terceira frase do texto."
+    # Retrieval ranked the later chunk first
+    documents = [_chunk(text, 25, len(text)), _chunk(text, 0, 48)]
+
+    context, stats = ContextBuilder(token_budget=1000).build(documents)
+
+    assert context == f"[Fonte: proposta.pdf, página 1]\n{text}"
+    assert stats["documents_packed"] == 2
+    assert stats["tokens_after"] < stats["tokens_before"]
+
+
+def test_context_respects_the_token_budget():
+    builder = ContextBuilder(token_budget=40)
+    documents = [
+        Document(page_content="palavra " * 100, metadata={"source": "a.txt"}),
+        Document(page_content="curto", metadata={"source": "b.txt"}),
+    ]
+
+    context, stats = builder.build(documents)
+
+    assert stats["tokens_after"] <= 40
+    assert stats["documents_truncated"] == 1
+    assert "[Fonte: a.txt]" in context
+
+
+def test_tokens_before_counts_chunks_like_the_packed_context():
+    builder = ContextBuilder(token_budget=1000)
+    passages = ["Primeira frase do texto.", "Outra passagem, de outro arquivo."]
+    plain = [Document(page_content=text, metadata={"source": f"{i}.txt"}) for i, text in enumerate(passages)]
+    # Metadata that never reaches the prompt must not be counted
+    annotated = [
+        Document(page_content=document.page_content,
+                 metadata={**document.metadata, "chunk_uid": "f" * 32, "duplicate_locations": "[]" * 50})
+        for document in plain
+    ]
+
+    _, plain_stats = builder.build(plain)
+    _, annotated_stats = builder.build(annotated)
+
+    assert annotated_stats["tokens_before"] == plain_stats["tokens_before"]
+    # Nothing is dropped or merged, so packing only changes the separators
+    assert abs(plain_stats["tokens_before"] - plain_stats["tokens_after"]) <= 2 * len(passages)
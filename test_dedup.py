@@ -0,0 +1,91 @@
+"""
+Tests for the chunk deduplicator
+
+Verifies that exact and near-duplicate chunks are dropped with their
+locations recorded on the kept chunk, and that duplicates found after a chunk
+was returned are reported by id instead of modifying it.
+"""
+
+import json
+import os
+import sys
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+
+from dedup import ChunkDeduplicator
+from hybrid_retriever import CHUNK_UID_KEY
+
+WORDS = ("evapotranspiracao potencial precipitacao armazenamento deficit excedente balanco hidrico "
+         "temperatura media mensal latitude fotoperiodo indice calorico solo capacidade agua disponivel").split()
+
+
+def make_text(seed, length=60):
+    return " ".join(WORDS[(seed + i * i) % len(WORDS)] for i in range(length))
+
+
+def make_chunk(text, page, chunk_uid=None):
+    metadata = {"source": "proposta.pdf", "page": page}
+    if chunk_uid is not None:
+        metadata[CHUNK_UID_KEY] = chunk_uid
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_exact_duplicates_are_merged_into_the_first_chunk():
+    deduplicator = ChunkDeduplicator()
+    text = make_text(0)
+
+    kept = deduplicator.deduplicate([
+        make_chunk(text, 0),
+        make_chunk(make_text(7), 1),
+        make_chunk("  " + text.upper() + "\n", 2),
+    ])
+
+    assert [chunk.metadata["page"] for chunk in kept] == [0, 1]
+    assert kept[0].metadata["duplicate_count"] == 1
+    assert json.loads(kept[0].metadata["duplicate_locations"]) == [{"source": "proposta.pdf", "page": 2}]
+    assert "duplicate_count" not in kept[1].metadata
+    assert deduplicator.stats.exact_duplicates == 1
+    assert deduplicator.stats.near_duplicates == 0
+
+
+def test_near_duplicates_are_merged_and_distinct_chunks_kept():
+    deduplicator = ChunkDeduplicator(threshold=0.85)
+    text = make_text(0)
+    # Same page with a different last word, e.g. a footer with another page number
+    near_duplicate = text.rsplit(" ", 1)[0] + " rodape"
+
+    kept = deduplicator.deduplicate([
+        make_chunk(text, 0),
+        make_chunk(near_duplicate, 1),
+        make_chunk(make_text(11), 2),
+    ])
+
+    assert [chunk.metadata["page"] for chunk in kept] == [0, 2]
+    assert kept[0].metadata["duplicate_count"] == 1
+    assert deduplicator.stats.near_duplicates == 1
+    assert deduplicator.stats.chunks_kept == 2
+
+
+def test_late_duplicates_are_reported_without_touching_returned_chunks():
+    deduplicator = ChunkDeduplicator()
+    text = make_text(0)
+
+    first = deduplicator.deduplicate([make_chunk(text, 0, chunk_uid="uid-0")])
+    second = deduplicator.deduplicate([make_chunk(text, 5, chunk_uid="uid-5"), make_chunk(make_text(3), 6, chunk_uid="uid-6")])
+    third = deduplicator.deduplicate([make_chunk(text, 9, chunk_uid="uid-9")])
+
+    # The chunk returned by the first call may already be in Chroma
+    assert "duplicate_count" not in first[0].metadata
+    assert [chunk.metadata[CHUNK_UID_KEY] for chunk in second] == ["uid-6"]
+    assert third == []
+
+    late_merges = deduplicator.pop_late_merges()
+    assert len(late_merges) == 1
+    chunk_uid, metadata = late_merges[0]
+    assert chunk_uid == "uid-0"
+    assert metadata["duplicate_count"] == 2
+    assert [location["page"] for location in json.loads(metadata["duplicate_locations"])] == [5, 9]
+    assert deduplicator.pop_late_merges() == []
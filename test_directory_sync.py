@@ -0,0 +1,102 @@
+"""
+Tests for the incremental directory sync manifest
+
+Verifies that diffing a folder against its manifest classifies files as
+added, changed, removed or unchanged.
+"""
+
+import os
+import sys
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from directory_sync import (
+    diff_directory, load_directory_manifest, save_directory_manifest
+)
+
+
+def _index(manifest, diff):
+    # Record the files of a diff as indexed, like DocumentProcessor.sync_directory
+    for path in diff.added + diff.changed:
+        manifest["files"][path] = {**diff.fingerprints[path], "chunk_ids": [path], "index_seconds": 1.0}
+    for path in diff.removed:
+        manifest["files"].pop(path)
+
+
+def test_diff_classifies_files(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "keep.txt").write_text("unchanged")
+    (docs / "edit.txt").write_text("before")
+    (docs / "drop.txt").write_text("removed later")
+
+    manifest = load_directory_manifest("fake-model", "hashing", persist_dir=str(tmp_path / "db"))
+    first = diff_directory(manifest, sorted(docs.iterdir()))
+    assert len(first.added) == 3
+    _index(manifest, first)
+    save_directory_manifest(manifest, persist_dir=str(tmp_path / "db"))
+
+    (docs / "edit.txt").write_text("after!")
+    (docs / "drop.txt").unlink()
+    (docs / "new.txt").write_text("added")
+
+    manifest = load_directory_manifest("fake-model", "hashing", persist_dir=str(tmp_path / "db"))
+    second = diff_directory(manifest, sorted(docs.iterdir()))
+
+    assert second.added == [str((docs / "new.txt").resolve())]
+    assert second.changed == [str((docs / "edit.txt").resolve())]
+    assert second.removed == [str((docs / "drop.txt").resolve())]
+    assert second.unchanged == [str((docs / "keep.txt").resolve())]
+
+
+def test_touched_file_with_same_content_is_unchanged(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("same content")
+    manifest = load_directory_manifest("fake-model", "hashing", persist_dir=str(tmp_path / "db"))
+    _index(manifest, diff_directory(manifest, [path]))
+
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    diff = diff_directory(manifest, [path])
+    assert diff.unchanged == [str(path.resolve())]
+
+
+def test_settings_change_reindexes_everything(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("content")
+    manifest = load_directory_manifest("old-model", "hashing", persist_dir=str(tmp_path / "db"))
+    _index(manifest, diff_directory(manifest, [path]))
+    save_directory_manifest(manifest, persist_dir=str(tmp_path / "db"))
+
+    manifest = load_directory_manifest("new-model", "hashing", persist_dir=str(tmp_path / "db"))
+    assert manifest["files"] == {}
+    assert str(path.resolve()) in manifest["stale_files"]
+    assert diff_directory(manifest, [path]).added == [str(path.resolve())]
+
+
+def test_syncing_another_folder_keeps_the_first_one(tmp_path):
+    folder_a = tmp_path / "a"
+    folder_b = tmp_path / "b"
+    nested = folder_a / "nested"
+    nested.mkdir(parents=True)
+    folder_b.mkdir()
+    (folder_a / "a.txt").write_text("folder a")
+    (nested / "deep.txt").write_text("nested in a")
+    (folder_b / "b.txt").write_text("folder b")
+
+    manifest = load_directory_manifest("fake-model", "hashing", persist_dir=str(tmp_path / "db"))
+    _index(manifest, diff_directory(manifest, [folder_a / "a.txt", nested / "deep.txt"], directory=folder_a))
+    second = diff_directory(manifest, [folder_b / "b.txt"], directory=folder_b)
+    _index(manifest, second)
+
+    # Folder a's files are not in folder b, but were not removed from a either
+    assert second.added == [str((folder_b / "b.txt").resolve())]
+    assert second.removed == []
+    assert len(manifest["files"]) == 3
+
+    # A non-recursive sync of a leaves the files of its subfolders alone
+    (folder_a / "a.txt").unlink()
+    third = diff_directory(manifest, [], directory=folder_a, recursive=False)
+    assert third.removed == [str((folder_a / "a.txt").resolve())]
@@ -0,0 +1,80 @@
+"""
+Tests for the persistent embedding cache
+
+Verifies that repeated chunks are served from disk instead of being embedded
+again, and that the cache stays within its configured size.
+"""
+
+import os
+import sys
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    """Fake embedding function that records every text it embeds"""
+
+    model = "fake-embedding-model"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_only_unseen_chunks_are_embedded(tmp_path):
+    underlying = CountingEmbeddings()
+    cache = CachedEmbeddings(underlying, cache_dir=str(tmp_path))
+
+    first = cache.embed_documents(["alpha", "beta", "alpha"])
+    second = cache.embed_documents(["beta", "gamma"])
+
+    assert underlying.calls == ["alpha", "beta", "gamma"]
+    assert first == [[5.0, 1.0], [4.0, 1.0], [5.0, 1.0]]
+    assert second == [[4.0, 1.0], [5.0, 1.0]]
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+
+
+def test_cache_persists_across_instances(tmp_path):
+    CachedEmbeddings(CountingEmbeddings(), cache_dir=str(tmp_path)).embed_documents(["alpha"])
+
+    underlying = CountingEmbeddings()
+    cache = CachedEmbeddings(underlying, cache_dir=str(tmp_path))
+    cache.embed_documents(["alpha"])
+
+    assert underlying.calls == []
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_size_bounded_eviction(tmp_path):
+    cache = CachedEmbeddings(CountingEmbeddings(), cache_dir=str(tmp_path), max_entries=2)
+
+    cache.embed_documents(["one"])
+    cache.embed_documents(["two"])
+    cache.embed_documents(["three"])
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_queries_bypass_the_cache(tmp_path):
+    underlying = CountingEmbeddings()
+    cache = CachedEmbeddings(underlying, cache_dir=str(tmp_path))
+
+    cache.embed_query("what is this?")
+    cache.embed_query("what is this?")
+
+    assert underlying.calls == ["what is this?", "what is this?"]
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 0, 0)
@@ -0,0 +1,111 @@
+"""
+Tests for the rate-limit-aware embedding scheduler
+
+Runs the scheduler against a fake embedding endpoint that throttles requests
+beyond a fixed concurrency, and checks that every text is still embedded
+once, in order, with the concurrency limit backing off.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from embedding_scheduler import ScheduledEmbeddings
+
+
+class RateLimitError(Exception):
+    """Mimics the provider's HTTP 429 error"""
+
+    status_code = 429
+
+
+class ThrottlingEmbeddings:
+    """
+    Fake endpoint accepting at most `capacity` concurrent requests
+
+    After `max_throttles` rejections it stops throttling, like a provider
+    whose rate-limit window has passed, so retries are bound to succeed.
+    """
+
+    model = "fake-embedding-model"
+
+    def __init__(self, capacity, max_throttles=None):
+        self.capacity = capacity
+        self.max_throttles = max_throttles
+        self.in_flight = 0
+        self.requests = []
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            throttling = self.max_throttles is None or self.throttled < self.max_throttles
+            if throttling and self.in_flight >= self.capacity:
+                self.throttled += 1
+                raise RateLimitError("Too many requests")
+            self.in_flight += 1
+        try:
+            time.sleep(0.01)
+            with self._lock:
+                self.requests.append(list(texts))
+            return [[float(len(text))] for text in texts]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _word_count(texts):
+    return [len(text.split()) for text in texts]
+
+
+def test_batches_respect_token_budget_and_keep_order():
+    endpoint = ThrottlingEmbeddings(capacity=10)
+    scheduler = ScheduledEmbeddings(endpoint, max_batch_tokens=6, max_concurrency=4, token_counter=_word_count)
+    texts = [" ".join(["w"] * (i % 3 + 1)) + f" {i}" for i in range(40)]
+
+    vectors = scheduler.embed_documents(texts)
+
+    assert vectors == [[float(len(text))] for text in texts]
+    assert all(sum(_word_count(batch)) <= 6 for batch in endpoint.requests)
+    assert sorted(text for batch in endpoint.requests for text in batch) == sorted(texts)
+
+
+def test_throttling_reduces_concurrency_and_retries():
+    # Fewer rejections in total than retries per batch: no batch can run out of retries
+    endpoint = ThrottlingEmbeddings(capacity=1, max_throttles=4)
+    scheduler = ScheduledEmbeddings(
+        endpoint, max_batch_tokens=2, max_concurrency=8, max_retries=6,
+        backoff_seconds=0.01, max_backoff_seconds=0.05, token_counter=_word_count
+    )
+    texts = [f"text {i}" for i in range(16)]
+
+    vectors = scheduler.embed_documents(texts)
+
+    stats = scheduler.get_stats()
+    assert vectors == [[float(len(text))] for text in texts]
+    assert endpoint.throttled > 0
+    assert stats["throttled"] == endpoint.throttled
+    assert stats["concurrency_limit"] < 8
+    assert stats["chunks"] == 16 and stats["chunks_per_second"] > 0
+
+
+def test_non_retryable_errors_are_raised():
+    class BrokenEmbeddings:
+        def embed_documents(self, texts):
+            raise ValueError("bad input")
+
+    scheduler = ScheduledEmbeddings(BrokenEmbeddings(), token_counter=_word_count)
+    try:
+        scheduler.embed_documents(["a"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ValueError was not raised")
+    assert scheduler.get_stats()["retries"] == 0
@@ -0,0 +1,159 @@
+"""
+Tests for the Check Hallucinations node of the RAG workflow
+
+Runs the compiled graph with stubbed retriever, grader and generation chains
+and checks that the grader scores reach the final state in every
+HALLUCINATION_CHECK_MODE, that an ungrounded answer is generated again (and
+graded again, even when it repeats the failed one and the grader cache is
+on), and that the retry limit ends the run.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda, RunnableParallel
+
+from chains.answer_verification import AnswerVerification
+from chains.document_relevance import DocumentRelevance
+from chains.evaluate import EvaluateDocs
+from chains.grader_cache import MemoizedGrader
+from chains.question_relevance import QuestionRelevance
+from rag_workflow import RAGWorkflow
+
+MODES = ["sequential", "parallel", "combined"]
+
+
+class StubChains:
+    """Stand-ins for the LLM chains used by the graph, with scripted grounding results"""
+
+    def __init__(self, grounded, answers_question=True, same_answer=False, memoized=False):
+        self.grounded = list(grounded)
+        self.answers_question = answers_question
+        self.same_answer = same_answer
+        self.memoized = memoized
+        self.generations = 0
+        self.grounding_checks = 0
+
+    def generate(self, inputs):
+        self.generations += 1
+        return "resposta" if self.same_answer else f"resposta {self.generations}"
+
+    def grade_document(self, inputs):
+        return EvaluateDocs(score="yes", relevance_score=1.0, coverage_assessment="ok", missing_information="")
+
+    def document_relevance(self, inputs):
+        grounded = self.grounded[min(self.grounding_checks, len(self.grounded) - 1)]
+        self.grounding_checks += 1
+        return DocumentRelevance(binary_score=grounded, confidence=0.9, reasoning="stub")
+
+    def question_relevance(self, inputs):
+        return QuestionRelevance(binary_score=self.answers_question, relevance_score=0.8,
+                                 completeness="complete", reasoning="stub", missing_aspects="")
+
+    def answer_verification(self, inputs):
+        return AnswerVerification(grounding=self.document_relevance(inputs),
+                                  question_relevance=self.question_relevance(inputs))
+
+    def grader(self, func):
+        grader = RunnableLambda(func)
+        # Behind the shared grader cache, under a name no other test uses
+        return MemoizedGrader(grader, name=f"test.{func.__name__}.{uuid.uuid4()}") if self.memoized else grader
+
+    def patches(self, mode):
+        document_relevance = self.grader(self.document_relevance)
+        question_relevance = self.grader(self.question_relevance)
+        return patch.multiple(
+            "rag_workflow",
+            HALLUCINATION_CHECK_MODE=mode,
+            evaluate_docs=RunnableLambda(self.grade_document),
+            generate_chain=RunnableLambda(self.generate),
+            document_relevance=document_relevance,
+            question_relevance=question_relevance,
+            speculative_verification=RunnableParallel(
+                document_relevance=document_relevance,
+                question_relevance=question_relevance,
+            ),
+            answer_verification=self.grader(self.answer_verification),
+        )
+
+
+def run_graph(stubs, mode, use_async=False):
+    with patch("rag_workflow.ANSWER_CACHE_ENABLED", False):
+        workflow = RAGWorkflow()
+    retriever = RunnableLambda(lambda question: [Document(page_content="balanço hídrico mensal", metadata={"page": 0})])
+    with patch("streamlit.session_state", {}), stubs.patches(mode):
+        workflow.set_retriever(retriever)
+        graph = workflow._create_graph()
+        if use_async:
+            return asyncio.run(graph.ainvoke({"question": "Como calcular o balanço hídrico?"}))
+        return graph.invoke({"question": "Como calcular o balanço hídrico?"})
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_scores_reach_the_final_state(mode):
+    stubs = StubChains(grounded=[True])
+
+    result = run_graph(stubs, mode)
+
+    assert result["verification_result"] == "Answers Question"
+    assert result["document_relevance_score"].binary_score is True
+    assert result["question_relevance_score"].relevance_score == 0.8
+    assert result["solution"] == "resposta 1"
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_scores_reach_the_final_state_async(mode):
+    stubs = StubChains(grounded=[True], answers_question=False)
+
+    result = run_graph(stubs, mode, use_async=True)
+
+    assert result["verification_result"] == "Question not addressed"
+    assert result["question_relevance_score"].binary_score is False
+    assert not result.get("retry_limit_reached")
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_hallucinations_loop_back_to_generation(mode):
+    stubs = StubChains(grounded=[False, True])
+
+    result = run_graph(stubs, mode)
+
+    assert stubs.generations == 2
+    assert result["retry_count"] == 2
+    assert result["solution"] == "resposta 2"
+    assert result["verification_result"] == "Answers Question"
+    assert result["document_relevance_score"].binary_score is True
+
+
+def test_retry_limit_ends_the_run():
+    stubs = StubChains(grounded=[False])
+
+    result = run_graph(stubs, "sequential")
+
+    # Three answers were generated; the third one is not checked again
+    assert stubs.generations == 3
+    assert stubs.grounding_checks == 2
+    assert result["retry_limit_reached"] is True
+    assert result["verification_result"] == "Question not addressed"
+    assert result["document_relevance_score"].binary_score is False
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_retry_of_the_same_answer_is_graded_again(mode):
+    # The regenerated answer repeats the failed one, so the grader inputs are identical
+    stubs = StubChains(grounded=[False, True], same_answer=True, memoized=True)
+
+    result = run_graph(stubs, mode, use_async=mode == "parallel")
+
+    assert stubs.grounding_checks == 2
+    assert result["verification_result"] == "Answers Question"
+    assert not result.get("retry_limit_reached")
@@ -0,0 +1,78 @@
+"""
+Tests for the hybrid BM25 + vector retriever
+
+Verifies the reciprocal rank fusion ordering, and that HybridRetriever
+returns chunks found by either ranking, fetching BM25-only chunks from the
+vector store by id.
+"""
+
+import os
+import sys
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+
+from hybrid_retriever import CHUNK_UID_KEY, HybridRetriever, reciprocal_rank_fusion
+from lexical_index import BM25Index
+
+
+class FakeVectorStore:
+    """Returns a fixed dense ranking and serves get(ids=...) like Chroma"""
+
+    def __init__(self, texts, dense_ranking):
+        self.texts = texts
+        self.dense_ranking = dense_ranking
+        self.fetched_ids = []
+
+    def similarity_search(self, query, k=4):
+        return [Document(page_content=self.texts[doc_id], metadata={CHUNK_UID_KEY: doc_id})
+                for doc_id in self.dense_ranking[:k]]
+
+    def get(self, ids, include=None):
+        self.fetched_ids.extend(ids)
+        return {
+            "ids": ids,
+            "documents": [self.texts[doc_id] for doc_id in ids],
+            "metadatas": [{CHUNK_UID_KEY: doc_id} for doc_id in ids],
+        }
+
+
+def test_rrf_rewards_chunks_ranked_by_both_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], rrf_k=60)
+
+    # a: 1/61 + 1/63, c: 1/63 + 1/61, both above chunks seen by one list only
+    assert set(fused[:2]) == {"a", "c"}
+    assert fused[2:] == ["b", "d"]
+
+
+def test_rrf_ties_keep_first_seen_order():
+    assert reciprocal_rank_fusion([["a", "b"], ["b", "a"]]) == ["a", "b"]
+    assert reciprocal_rank_fusion([["x"], ["y"], ["z"]]) == ["x", "y", "z"]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_rrf_k_controls_the_weight_of_top_ranks():
+    rankings = [["a", "b", "c"], ["d", "e", "c"]]
+
+    # A small k lets one first place beat two third places; a large k does not
+    assert reciprocal_rank_fusion(rankings, rrf_k=0)[0] == "a"
+    assert reciprocal_rank_fusion(rankings, rrf_k=60)[0] == "c"
+
+
+def test_hybrid_retriever_fetches_lexical_only_chunks():
+    texts = {
+        "c1": "evapotranspiração potencial pelo método de Thornthwaite",
+        "c2": "clima tropical e chuvas de verão",
+        "c3": "capacidade de água disponível no solo CAD",
+    }
+    vectorstore = FakeVectorStore(texts, dense_ranking=["c1", "c2"])
+    lexical_index = BM25Index.from_texts(texts.values(), ids=texts.keys())
+    retriever = HybridRetriever(vectorstore=vectorstore, lexical_index=lexical_index, k=3, fetch_k=2)
+
+    documents = retriever.invoke("capacidade de água no solo")
+
+    assert [document.metadata[CHUNK_UID_KEY] for document in documents] == ["c1", "c3", "c2"]
+    assert vectorstore.fetched_ids == ["c3"]
+    assert documents[1].page_content == texts["c3"]
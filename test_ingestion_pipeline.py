@@ -0,0 +1,118 @@
+"""
+Tests for the streaming ingestion pipeline
+
+Verifies that chunks are indexed in order in fixed-size batches, that a slow
+indexing stage stops the loader from running ahead of the bounded queues, and
+that an error in any stage is raised to the caller and stops the workers.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+
+from ingestion_pipeline import StreamingIngestionPipeline
+
+
+def make_documents(count):
+    return [Document(page_content=f"documento {number}", metadata={"page": number}) for number in range(count)]
+
+
+def split_in_three(document):
+    page = document.metadata["page"]
+    return [Document(page_content=f"{document.page_content} parte {part}", metadata={"page": page, "part": part})
+            for part in range(3)]
+
+
+def pipeline_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("ingestion-")]
+
+
+def test_chunks_are_indexed_in_order_in_batches():
+    batches = []
+    reported = []
+    pipeline = StreamingIngestionPipeline(split_fn=split_in_three, index_fn=batches.append, batch_size=4)
+
+    progress = pipeline.run(make_documents(5), lambda progress: reported.append(progress.chunks_indexed))
+
+    assert [len(batch) for batch in batches] == [4, 4, 4, 3]
+    indexed = [(chunk.metadata["page"], chunk.metadata["part"]) for batch in batches for chunk in batch]
+    assert indexed == [(page, part) for page in range(5) for part in range(3)]
+    assert (progress.documents_loaded, progress.chunks_split, progress.chunks_indexed) == (5, 15, 15)
+    assert progress.batches_indexed == 4
+    assert progress.fraction == 1.0
+    assert reported[-1] == 15
+
+
+def test_slow_indexing_holds_back_loading():
+    pulled = 0
+    pulled_while_indexing = []
+
+    def documents():
+        nonlocal pulled
+        for document in make_documents(100):
+            pulled += 1
+            yield document
+
+    def slow_index(batch):
+        if not pulled_while_indexing:
+            # Give the upstream stages time to fill every queue
+            time.sleep(0.5)
+            pulled_while_indexing.append(pulled)
+
+    pipeline = StreamingIngestionPipeline(split_fn=lambda document: [document], index_fn=slow_index,
+                                          batch_size=1, queue_size=1)
+    progress = pipeline.run(documents())
+
+    # One batch being indexed, one per queue, one held by each upstream stage
+    assert pulled_while_indexing[0] <= 5
+    assert progress.chunks_indexed == 100
+
+
+def test_split_error_is_raised_and_stops_the_workers():
+    indexed = []
+
+    def split_fn(document):
+        if document.metadata["page"] == 3:
+            raise ValueError("página ilegível")
+        return [document]
+
+    pipeline = StreamingIngestionPipeline(split_fn=split_fn, index_fn=indexed.extend, batch_size=1)
+
+    with pytest.raises(ValueError, match="página ilegível"):
+        pipeline.run(make_documents(100))
+
+    assert len(indexed) <= 3
+    assert pipeline_threads() == []
+
+
+def test_load_error_is_raised():
+    def documents():
+        yield from make_documents(2)
+        raise OSError("arquivo truncado")
+
+    pipeline = StreamingIngestionPipeline(split_fn=split_in_three, index_fn=lambda batch: None)
+
+    with pytest.raises(OSError, match="arquivo truncado"):
+        pipeline.run(documents())
+
+    assert pipeline_threads() == []
+
+
+def test_index_error_is_raised_and_stops_the_workers():
+    def index_fn(batch):
+        raise RuntimeError("limite de requisições")
+
+    pipeline = StreamingIngestionPipeline(split_fn=split_in_three, index_fn=index_fn, batch_size=2, queue_size=1)
+
+    with pytest.raises(RuntimeError, match="limite de requisições"):
+        pipeline.run(make_documents(100))
+
+    assert pipeline_threads() == []
@@ -0,0 +1,61 @@
+"""
+Tests for the workflow metrics collector
+
+Verifies that LLM calls and token usage are attributed to the node that was
+running when they were made.
+"""
+
+import json
+import os
+import sys
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.outputs import LLMResult
+
+from metrics import UNTRACKED_NODE, MetricsCallbackHandler, WorkflowMetrics, metrics_log_line, node_metrics
+
+
+def test_llm_calls_are_attributed_to_the_running_node():
+    metrics = WorkflowMetrics()
+    handler = MetricsCallbackHandler(metrics)
+    usage = LLMResult(generations=[], llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}})
+
+    with metrics.node("Grade Documents"):
+        handler.on_chat_model_start({}, [[]])
+        handler.on_llm_end(usage)
+        handler.on_text("grader_cache_hit")
+    with metrics.node("Generate Answer"):
+        handler.on_chat_model_start({}, [[]])
+    with metrics.node("Generate Answer"):
+        handler.on_chat_model_start({}, [[]])
+        handler.on_llm_error(RuntimeError("boom"))
+    handler.on_chat_model_start({}, [[]])
+
+    summary = metrics.summary(retry_count=2)
+    assert summary["nodes"]["Grade Documents"]["prompt_tokens"] == 120
+    assert summary["nodes"]["Grade Documents"]["grader_cache_hits"] == 1
+    assert summary["nodes"]["Generate Answer"]["runs"] == 2
+    assert summary["nodes"]["Generate Answer"]["llm_errors"] == 1
+    assert summary["nodes"][UNTRACKED_NODE]["llm_calls"] == 1
+    assert summary["llm_calls"] == 4
+    assert summary["completion_tokens"] == 30
+    assert summary["retries"] == 1
+
+
+def test_node_metrics_without_collector_is_a_no_op():
+    with node_metrics({}, "Retrieve Documents"):
+        pass
+    with node_metrics(None, "Retrieve Documents"):
+        pass
+
+
+def test_log_line_hashes_the_question():
+    question = "Qual é o balanço hídrico de Campina Grande?"
+    line = json.loads(metrics_log_line(question, WorkflowMetrics().summary()))
+
+    assert "question" not in line
+    assert question not in json.dumps(line, ensure_ascii=False)
+    assert line["question_sha256"] == json.loads(metrics_log_line(question, {}))["question_sha256"]
+    assert line["event"] == "workflow_metrics"
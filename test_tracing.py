@@ -0,0 +1,48 @@
+"""
+Tests for the OpenTelemetry callback handler
+
+Verifies that traced runs are attached to their nearest traced ancestor and
+that untraced runnables in between are skipped.
+"""
+
+import os
+import sys
+from uuid import uuid4
+
+# Add the current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from tracing import OpenTelemetryCallbackHandler
+
+
+def test_runs_are_nested_under_the_nearest_traced_ancestor():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    handler = OpenTelemetryCallbackHandler(provider.get_tracer(__name__))
+
+    node, sequence, chain, retriever = uuid4(), uuid4(), uuid4(), uuid4()
+    metadata = {"langgraph_node": "Grade Documents"}
+    handler.on_chain_start({}, {}, run_id=node, metadata=metadata, name="Grade Documents")
+    handler.on_chain_start({}, {}, run_id=sequence, parent_run_id=node, metadata=metadata, name="RunnableSequence")
+    handler.on_chain_start({}, {}, run_id=chain, parent_run_id=sequence, metadata=metadata, name="chains.evaluate")
+    handler.on_text("grader_cache_hit", run_id=chain)
+    handler.on_chain_end({}, run_id=chain)
+    handler.on_chain_end({}, run_id=sequence)
+    handler.on_retriever_start({}, "pergunta", run_id=retriever, parent_run_id=node, name="HybridRetriever")
+    handler.on_retriever_end([Document(page_content="a"), Document(page_content="b")], run_id=retriever)
+    handler.on_chain_end({"documents": []}, run_id=node)
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert set(spans) == {"rag.node Grade Documents", "rag.chain chains.evaluate", "rag.retriever"}
+    node_span = spans["rag.node Grade Documents"]
+    assert spans["rag.chain chains.evaluate"].parent.span_id == node_span.context.span_id
+    assert spans["rag.chain chains.evaluate"].attributes["rag.grader_cache_hit"] is True
+    assert spans["rag.retriever"].parent.span_id == node_span.context.span_id
+    assert spans["rag.retriever"].attributes["rag.documents.count"] == 2
+    assert node_span.attributes["rag.documents.count"] == 0
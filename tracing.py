@@ -0,0 +1,253 @@
+"""
+Opt-in OpenTelemetry tracing for question answering and ingestion
+
+When TRACING_ENABLED is set, every question gets a root span with child spans
+for each graph node, each chain from chains/, each LLM call and each
+retriever call, and every ingestion gets spans for its load, chunk, dedup and
+index stages. Spans are sent to the exporters listed in TRACING_EXPORTERS:
+
+- "console": printed to stdout
+- "file":    appended as JSON lines to TRACING_FILE_PATH
+- "otlp":    sent over gRPC to TRACING_OTLP_ENDPOINT (e.g. a local collector)
+
+The OpenTelemetry packages are optional: when they are missing or tracing is
+disabled, span() and the callback handler are no-ops.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import (
+    TRACING_ENABLED, TRACING_EXPORTERS, TRACING_FILE_PATH, TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME
+)
+from metrics import token_usage
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.trace import Status, StatusCode
+    OPENTELEMETRY_AVAILABLE = True
+except ImportError:
+    OPENTELEMETRY_AVAILABLE = False
+
+# Prefixes of the run names given to the chains in chains/ and chains_pt/
+TRACED_CHAIN_PREFIXES = ("chains.", "chains_pt.")
+
+_tracer = None
+_setup_lock = threading.Lock()
+_setup_done = False
+
+
+def _file_exporter(path):
+    """ConsoleSpanExporter writing one JSON span per line to path"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Kept open for the lifetime of the process, like the console exporter's stdout
+    out = open(path, "a", encoding="utf-8")
+    return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+
+
+def _otlp_exporter(endpoint):
+    try:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        print("OTLP exporter requested but opentelemetry-exporter-otlp-proto-grpc is not installed")
+        return None
+    return OTLPSpanExporter(endpoint=endpoint, insecure=True)
+
+
+def setup_tracing():
+    """Configure the tracer provider once; returns the tracer or None when tracing is off"""
+    global _tracer, _setup_done
+    with _setup_lock:
+        if _setup_done:
+            return _tracer
+        _setup_done = True
+
+        if not TRACING_ENABLED:
+            return None
+        if not OPENTELEMETRY_AVAILABLE:
+            print("Tracing enabled but opentelemetry-sdk is not installed - spans are not recorded")
+            return None
+
+        provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+        for name in TRACING_EXPORTERS:
+            if name == "console":
+                provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+            elif name == "file":
+                provider.add_span_processor(SimpleSpanProcessor(_file_exporter(TRACING_FILE_PATH)))
+            elif name == "otlp":
+                exporter = _otlp_exporter(TRACING_OTLP_ENDPOINT)
+                if exporter is not None:
+                    provider.add_span_processor(BatchSpanProcessor(exporter))
+            else:
+                print(f"Unknown tracing exporter: {name}")
+
+        trace.set_tracer_provider(provider)
+        _tracer = trace.get_tracer(__name__)
+        print(f"Tracing enabled: exporting spans to {', '.join(TRACING_EXPORTERS)}")
+        return _tracer
+
+
+def _clean_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop None values and stringify anything OpenTelemetry cannot store"""
+    cleaned = {}
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if not isinstance(value, (str, bool, int, float)):
+            value = str(value)
+        cleaned[key] = value
+    return cleaned
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Start a span as a child of the current one
+
+    Yields the span (or None when tracing is off), so callers can add
+    attributes once the traced work has finished.
+    """
+    tracer = setup_tracing()
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=_clean_attributes(attributes)) as current:
+        yield current
+
+
+def set_attributes(current, **attributes):
+    """Add attributes to a span yielded by span(), ignoring disabled tracing"""
+    if current is not None:
+        current.set_attributes(_clean_attributes(attributes))
+
+
+def tracing_callbacks():
+    """Callback handlers that turn LangChain runs into spans (empty when tracing is off)"""
+    if setup_tracing() is None:
+        return []
+    return [OpenTelemetryCallbackHandler(_tracer)]
+
+
+class OpenTelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Maps LangChain runs to OpenTelemetry spans
+
+    Graph nodes, chains from chains/, LLM calls and retriever calls become
+    spans; other runnables (prompts, parsers, sequences) are skipped and their
+    children are attached to the nearest traced ancestor. Runs without a
+    traced ancestor are attached to the span that was current when they
+    started, e.g. the question's root span.
+    """
+
+    # Run in the caller's thread/task so the current span is visible
+    run_inline = True
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._spans: Dict[UUID, Any] = {}
+        self._names: Dict[UUID, str] = {}
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, name, run_id, parent_run_id, attributes, traced=True, collapse_nested=False):
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            if not traced:
+                return
+            parent = parent_run_id
+            while parent is not None and parent not in self._spans:
+                parent = self._parents.get(parent)
+            # A node's own runnable runs inside the graph's run of that node
+            if collapse_nested and self._names.get(parent) == name:
+                return
+            parent_span = self._spans.get(parent)
+        context = trace.set_span_in_context(parent_span) if parent_span is not None else None
+        started = self.tracer.start_span(name, context=context, attributes=_clean_attributes(attributes))
+        with self._lock:
+            self._spans[run_id] = started
+            self._names[run_id] = name
+
+    def _end(self, run_id, error=None, **attributes):
+        with self._lock:
+            self._parents.pop(run_id, None)
+            ended = self._spans.pop(run_id, None)
+            self._names.pop(run_id, None)
+        if ended is None:
+            return
+        ended.set_attributes(_clean_attributes(attributes))
+        if error is not None:
+            ended.record_exception(error)
+            ended.set_status(Status(StatusCode.ERROR, str(error)))
+        ended.end()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, name=None, **kwargs):
+        metadata = metadata or {}
+        name = name or (serialized or {}).get("name", "chain")
+        graph_node = metadata.get("langgraph_node")
+        if name == graph_node:
+            self._start(f"rag.node {name}", run_id, parent_run_id, {
+                "rag.node": name,
+                "rag.graph_step": metadata.get("langgraph_step"),
+            }, collapse_nested=True)
+        elif name.startswith(TRACED_CHAIN_PREFIXES):
+            self._start(f"rag.chain {name}", run_id, parent_run_id, {"rag.chain": name})
+        else:
+            self._start(name, run_id, parent_run_id, {}, traced=False)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        attributes = {}
+        if isinstance(outputs, dict) and isinstance(outputs.get("documents"), list):
+            attributes["rag.documents.count"] = len(outputs["documents"])
+        self._end(run_id, **attributes)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start("rag.llm", run_id, parent_run_id, {
+            "gen_ai.request.model": (metadata or {}).get("ls_model_name"),
+            "gen_ai.system": (metadata or {}).get("ls_provider"),
+        })
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start("rag.llm", run_id, parent_run_id, {
+            "gen_ai.request.model": (metadata or {}).get("ls_model_name"),
+            "gen_ai.system": (metadata or {}).get("ls_provider"),
+        })
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens, completion_tokens = token_usage(response)
+        self._end(run_id, **{
+            "gen_ai.usage.input_tokens": prompt_tokens,
+            "gen_ai.usage.output_tokens": completion_tokens,
+        })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, name=None, **kwargs):
+        self._start("rag.retriever", run_id, parent_run_id, {
+            "rag.retriever": name or (serialized or {}).get("name"),
+            "rag.query.length": len(query),
+        })
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, **{"rag.documents.count": len(documents)})
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_text(self, text, *, run_id, **kwargs):
+        # Emitted by chains.grader_cache when a grading result is reused
+        if text == "grader_cache_hit":
+            with self._lock:
+                current = self._spans.get(run_id)
+            if current is not None:
+                current.set_attribute("rag.grader_cache_hit", True)
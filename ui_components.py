@@ -146,3 +146,39 @@ def render_answer_section(result):
     st.markdown("### 📝 Resposta")
     st.success(result['solution'])
     st.markdown("---")
+
+
+def render_streaming_answer(events):
+    """
+    Shows the answer section, rendering tokens as they are generated
+    Returns the final workflow result once validation has finished
+    """
+    st.markdown("### 📝 Resposta")
+    answer_placeholder = st.empty()
+    status_placeholder = st.empty()
+    answer_placeholder.info("🧠 Analisando sua pergunta e recuperando informações relevantes...")
+    
+    answer_text = ""
+    result = None
+    for event, payload in events:
+        if event == "answer_start":
+            # A retry after failed validation starts the answer over
+            answer_text = ""
+            status_placeholder.caption("✍️ Gerando resposta...")
+        elif event == "token":
+            answer_text += payload
+            answer_placeholder.markdown(answer_text + "▌")
+        elif event == "answer_end":
+            # The answer is complete; the hallucination checks run next
+            answer_placeholder.markdown(answer_text)
+            status_placeholder.caption("🔎 Validando a resposta...")
+        elif event == "result":
+            result = payload
+    
+    status_placeholder.empty()
+    if result is not None:
+        answer_placeholder.success(result['solution'])
+    else:
+        answer_placeholder.error("❌ Não foi possível gerar uma resposta.")
+    st.markdown("---")
+    return result
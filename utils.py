@@ -1,17 +1,7 @@
 """
 Utility functions for the Advanced RAG application
 """
-import shutil
-import os
 import streamlit as st
-from config import CHROMA_PERSIST_DIR
-
-
-def clear_chroma_db():
-    """Clear ChromaDB data directory for fresh start"""
-    if os.path.exists(CHROMA_PERSIST_DIR):
-        shutil.rmtree(CHROMA_PERSIST_DIR)
-        print("Cleared existing ChromaDB data for fresh start")
 
 
 def initialize_session_state():